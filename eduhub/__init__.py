@@ -1,2 +1,7 @@
 from eduhub.common.database import Base
 from eduhub.models import *
+from eduhub import quota  # registers quota counters on booking status transitions
+from eduhub import changefeed  # registers outbox writes of booking changes
+from eduhub import organization  # registers closure table maintenance of organization tree
+from eduhub import similarity  # registers MinHash index maintenance of repositories and datasets
+from eduhub import recommendations  # registers outdated rows of recommendation index
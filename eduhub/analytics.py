@@ -0,0 +1,332 @@
+"""
+Equipment utilization analytics (occupancy, idle gaps, and peak concurrency) over time buckets.
+
+Occupancy is computed in SQL (generate_series for buckets and range intersection with bookings),
+in NumPy for in-memory frames (vectorized interval sweep), or read from precomputed utilization_rollup.
+"""
+import dataclasses
+import datetime
+from typing import Sequence
+
+import numpy as np
+from sqlalchemy import delete, select, text
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import BookingStatus, BucketSize, UtilizationDimension
+from eduhub.models import UtilizationRollup
+
+# only these bookings actually occupy equipment
+OCCUPYING_STATUSES = [BookingStatus.APPROVED.name, BookingStatus.COMPLETED.name]
+
+BUCKET_SECONDS = {
+    BucketSize.HOUR: 60 * 60,
+    BucketSize.DAY: 24 * 60 * 60,
+    BucketSize.WEEK: 7 * 24 * 60 * 60,
+}
+
+_GROUP_COLUMNS = {
+    UtilizationDimension.EQUIPMENT: "e.id",
+    UtilizationDimension.EQUIPMENT_TYPE: "coalesce(e.equipment_type_id, 0)",
+    UtilizationDimension.LABORATORY: "e.laboratory_id",
+}
+
+
+@dataclasses.dataclass(slots=True)
+class Utilization:
+    key: int
+    bucket_start: datetime.datetime
+    booking_count: int
+    occupied_seconds: float
+    capacity_seconds: float
+    peak_concurrency: int
+
+    @property
+    def occupancy(self) -> float:
+        """Share of capacity that was booked (greater than 1 means overlapping bookings)"""
+        return self.occupied_seconds / self.capacity_seconds if self.capacity_seconds else 0.0
+
+    @property
+    def idle_seconds(self) -> float:
+        return max(self.capacity_seconds - self.occupied_seconds, 0.0)
+
+
+@dataclasses.dataclass(slots=True)
+class IdleGap:
+    equipment_id: int
+    start: datetime.datetime
+    end: datetime.datetime
+
+    @property
+    def duration(self) -> datetime.timedelta:
+        return self.end - self.start
+
+
+def _utilization_statement(dimension: UtilizationDimension) -> str:
+    group = _GROUP_COLUMNS[dimension]
+    return f"""
+        WITH buckets AS (
+            SELECT bucket_start, bucket_start + CAST(:step AS interval) AS bucket_end
+            FROM generate_series(
+                date_trunc(:unit, CAST(:start AS timestamptz), 'UTC'),
+                CAST(:end AS timestamptz) - interval '1 microsecond',
+                CAST(:step AS interval)
+            ) AS bucket_start
+        ),
+        capacity AS (
+            SELECT {group} AS key, count(*) AS equipment_count
+            FROM equipment AS e
+            WHERE e.deleted_at IS NULL
+            GROUP BY 1
+        ),
+        overlaps AS (
+            SELECT
+                {group} AS key,
+                buckets.bucket_start,
+                tstzrange(b.start_ts, b.end_ts) * tstzrange(buckets.bucket_start, buckets.bucket_end) AS overlap
+            FROM booking AS b
+            JOIN equipment AS e ON e.id = b.equipment_id
+            JOIN buckets ON b.start_ts < buckets.bucket_end AND b.end_ts > buckets.bucket_start
+            WHERE b.status = ANY(CAST(:statuses AS bookingstatus[]))
+              AND b.deleted_at IS NULL AND e.deleted_at IS NULL
+        ),
+        running AS (
+            SELECT key, bucket_start, sum(delta) OVER (
+                PARTITION BY key, bucket_start ORDER BY ts, delta ROWS UNBOUNDED PRECEDING
+            ) AS concurrency
+            FROM (
+                SELECT key, bucket_start, lower(overlap) AS ts, 1 AS delta FROM overlaps
+                UNION ALL
+                SELECT key, bucket_start, upper(overlap) AS ts, -1 AS delta FROM overlaps
+            ) AS events
+        ),
+        peaks AS (
+            SELECT key, bucket_start, max(concurrency) AS peak_concurrency
+            FROM running
+            GROUP BY key, bucket_start
+        )
+        SELECT
+            o.key,
+            o.bucket_start,
+            count(*) AS booking_count,
+            sum(extract(epoch FROM upper(o.overlap) - lower(o.overlap)))::float AS occupied_seconds,
+            (c.equipment_count * extract(epoch FROM CAST(:step AS interval)))::float AS capacity_seconds,
+            p.peak_concurrency
+        FROM overlaps AS o
+        JOIN capacity AS c ON c.key = o.key
+        JOIN peaks AS p ON p.key = o.key AND p.bucket_start = o.bucket_start
+        GROUP BY o.key, o.bucket_start, c.equipment_count, p.peak_concurrency
+        ORDER BY o.key, o.bucket_start
+    """
+
+
+def _parameters(bucket: BucketSize, start: datetime.datetime, end: datetime.datetime) -> dict:
+    return {
+        "unit": bucket.value,
+        "step": f"1 {bucket.value}",
+        "start": start,
+        "end": end,
+        "statuses": OCCUPYING_STATUSES,
+    }
+
+
+def utilization(
+    session: Session,
+    dimension: UtilizationDimension,
+    bucket: BucketSize,
+    start: datetime.datetime,
+    end: datetime.datetime,
+) -> list[Utilization]:
+    """Occupancy and peak concurrency per equipment/equipment type/laboratory computed by database"""
+    rows = session.execute(text(_utilization_statement(dimension)), _parameters(bucket, start, end))
+    return [Utilization(*row) for row in rows]
+
+
+def idle_gaps(
+    session: Session,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    equipment_ids: Sequence[int] | None = None,
+    min_gap: datetime.timedelta = datetime.timedelta(0),
+) -> list[IdleGap]:
+    """Periods between consecutive bookings of the same equipment (window function over start_ts)"""
+    equipment_filter = "AND equipment_id = ANY(:equipment_ids)" if equipment_ids is not None else ""
+    statement = text(f"""
+        SELECT equipment_id, previous_end, start_ts
+        FROM (
+            SELECT equipment_id, start_ts, max(end_ts) OVER (
+                PARTITION BY equipment_id ORDER BY start_ts
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS previous_end
+            FROM booking
+            WHERE status = ANY(CAST(:statuses AS bookingstatus[])) AND deleted_at IS NULL
+              AND start_ts < :end AND end_ts > :start {equipment_filter}
+        ) AS ordered
+        WHERE start_ts > previous_end AND start_ts - previous_end >= :min_gap
+        ORDER BY equipment_id, previous_end
+    """)
+    rows = session.execute(
+        statement,
+        {
+            "start": start,
+            "end": end,
+            "statuses": OCCUPYING_STATUSES,
+            "equipment_ids": list(equipment_ids or []),
+            "min_gap": min_gap,
+        },
+    )
+    return [IdleGap(*row) for row in rows]
+
+
+def bucket_edges(bucket: BucketSize, start: datetime.datetime, end: datetime.datetime) -> list[datetime.datetime]:
+    """Bucket boundaries aligned the same way as date_trunc(bucket, start, 'UTC')"""
+    start = start.astimezone(datetime.UTC)
+    aligned = start.replace(minute=0, second=0, microsecond=0)
+    if bucket != BucketSize.HOUR:
+        aligned = aligned.replace(hour=0)
+    if bucket == BucketSize.WEEK:
+        aligned -= datetime.timedelta(days=aligned.weekday())
+    step = datetime.timedelta(seconds=BUCKET_SECONDS[bucket])
+    edges = [aligned]
+    while edges[-1] < end:
+        edges.append(edges[-1] + step)
+    return edges
+
+
+def _sweep(starts: np.ndarray, ends: np.ndarray, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized sweep over intervals of one key: returns booking count, booked seconds,
+    and peak concurrency per bucket (all arrays have len(edges) - 1 elements)
+    """
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate([np.ones(len(starts), dtype=np.int64), -np.ones(len(ends), dtype=np.int64)])
+    order = np.lexsort((deltas, times))  # ends go before starts at same timestamp, because ranges are [)
+    times, deltas = times[order], deltas[order]
+    concurrency = np.cumsum(deltas)
+
+    # concurrency is constant between events, so its integral is piecewise linear and exact under interpolation
+    integral = np.concatenate([[0.0], np.cumsum(concurrency[:-1] * np.diff(times))])
+    occupied = np.diff(np.interp(edges, times, integral))
+
+    sorted_starts, sorted_ends = np.sort(starts), np.sort(ends)
+    counts = np.searchsorted(sorted_starts, edges[1:], side="left") - np.searchsorted(sorted_ends, edges[:-1], side="right")
+
+    # peak is either concurrency in effect at bucket start or after any event inside bucket
+    before = np.searchsorted(times, edges[:-1], side="right") - 1
+    peaks = np.where(before >= 0, concurrency[np.maximum(before, 0)], 0)
+    inside = np.searchsorted(edges, times, side="right") - 1
+    valid = (inside >= 0) & (inside < len(edges) - 1) & (times > edges[np.clip(inside, 0, len(edges) - 1)])
+    np.maximum.at(peaks, inside[valid], concurrency[valid])
+    return counts, occupied, peaks
+
+
+def _epoch_seconds(values: Sequence[datetime.datetime] | np.ndarray) -> np.ndarray:
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[us]").astype(np.int64) / 1e6
+    return np.fromiter((value.timestamp() for value in values), dtype=np.float64, count=len(values))
+
+
+def utilization_frame(
+    keys: Sequence[int] | np.ndarray,
+    starts: Sequence[datetime.datetime] | np.ndarray,
+    ends: Sequence[datetime.datetime] | np.ndarray,
+    bucket: BucketSize,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    equipment_count: dict[int, int] | None = None,
+) -> list[Utilization]:
+    """
+    NumPy fallback of utilization() for in-memory frames (e.g., bookings that are already loaded
+    or generated), where keys are equipment ids or ids of group (equipment type, laboratory)
+    and equipment_count is amount of equipment per group to compute capacity
+    """
+    keys = np.asarray(keys)
+    starts, ends = _epoch_seconds(starts), _epoch_seconds(ends)
+    edges_datetime = bucket_edges(bucket, start, end)
+    edges = np.array([edge.timestamp() for edge in edges_datetime])
+    bucket_seconds = BUCKET_SECONDS[bucket]
+
+    result = []
+    for key in np.unique(keys):
+        mask = keys == key
+        counts, occupied, peaks = _sweep(starts[mask], ends[mask], edges)
+        capacity = (equipment_count or {}).get(int(key), 1) * bucket_seconds
+        for index in np.flatnonzero(counts > 0):
+            result.append(
+                Utilization(
+                    key=int(key),
+                    bucket_start=edges_datetime[index],
+                    booking_count=int(counts[index]),
+                    occupied_seconds=float(occupied[index]),
+                    capacity_seconds=float(capacity),
+                    peak_concurrency=int(peaks[index]),
+                )
+            )
+    return result
+
+
+def refresh_rollup(
+    session: Session,
+    bucket: BucketSize,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    dimensions: Sequence[UtilizationDimension] = tuple(UtilizationDimension),
+) -> int:
+    """Recompute utilization_rollup for buckets in [start, end) and returns amount of written rows"""
+    computed_at = datetime.datetime.now(tz=datetime.UTC)
+    aligned_start = bucket_edges(bucket, start, end)[0]
+    written = 0
+    for dimension in dimensions:
+        session.execute(
+            delete(UtilizationRollup).where(
+                UtilizationRollup.dimension == dimension,
+                UtilizationRollup.bucket_size == bucket,
+                UtilizationRollup.bucket_start >= aligned_start,
+                UtilizationRollup.bucket_start < end,
+            )
+        )
+        statement = text(
+            "INSERT INTO utilization_rollup "
+            "(dimension, key, bucket_size, bucket_start, booking_count, occupied_seconds, "
+            "capacity_seconds, peak_concurrency, computed_at) "
+            "SELECT CAST(:dimension AS utilizationdimension), key, CAST(:bucket_size AS bucketsize), bucket_start, "
+            "booking_count, occupied_seconds, capacity_seconds, peak_concurrency, :computed_at "
+            f"FROM ({_utilization_statement(dimension)}) AS computed"
+        )
+        written += session.execute(
+            statement,
+            {
+                **_parameters(bucket, start, end),
+                "dimension": dimension.name,
+                "bucket_size": bucket.name,
+                "computed_at": computed_at,
+            },
+        ).rowcount
+    return written
+
+
+def cached_utilization(
+    session: Session,
+    dimension: UtilizationDimension,
+    bucket: BucketSize,
+    start: datetime.datetime,
+    end: datetime.datetime,
+) -> list[Utilization]:
+    """Read utilization from utilization_rollup (instant for dashboards, as fresh as last refresh_rollup)"""
+    rows = session.execute(
+        select(
+            UtilizationRollup.key,
+            UtilizationRollup.bucket_start,
+            UtilizationRollup.booking_count,
+            UtilizationRollup.occupied_seconds,
+            UtilizationRollup.capacity_seconds,
+            UtilizationRollup.peak_concurrency,
+        )
+        .where(
+            UtilizationRollup.dimension == dimension,
+            UtilizationRollup.bucket_size == bucket,
+            UtilizationRollup.bucket_start >= bucket_edges(bucket, start, end)[0],
+            UtilizationRollup.bucket_start < end,
+        )
+        .order_by(UtilizationRollup.key, UtilizationRollup.bucket_start)
+    )
+    return [Utilization(*row) for row in rows]
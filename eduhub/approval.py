@@ -0,0 +1,375 @@
+"""
+Approval rules for bookings defined in Equipment.approval_requirements
+(with defaults from EquipmentType.approval_requirements), for example:
+
+{
+    "minimal_role": "student",                 # requester must have at least this AccountRole
+    "approver_role": "staff",                  # approver must have at least this AccountRole
+    "same_laboratory": true,                   # requester must belong to laboratory of equipment
+    "max_duration_hours": 48,
+    "schedule": [                              # booking must fit into one of windows (UTC)
+        {"days": ["mon", "tue", "wed", "thu", "fri"], "from": "09:00", "to": "18:00"}
+    ],
+    "approval_steps": ["staff", "moderator"]   # multi-step approval, roles of approvers in order
+}
+
+Each distinct document is compiled once into vectorized checks (cached by hash of canonical JSON),
+and bookings are evaluated in batches grouped by compiled rule. Booking with approval_steps that
+passes checks stays requested, until sign_off() is called for each step (BookingApproval rows).
+"""
+import dataclasses
+import datetime
+import functools
+import hashlib
+import json
+import time
+from collections import defaultdict
+from typing import Any, Callable, Sequence
+
+import numpy as np
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+
+from eduhub import changefeed, quota
+from eduhub.common.types import AccountRole, BookingStatus, ChangeOperation
+from eduhub.models import Account, Booking, BookingApproval, BookingHistory, Equipment, EquipmentType
+
+ROLE_RANKS = {role: rank for rank, role in enumerate(AccountRole)}
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class RuleError(ValueError):
+    """Approval requirements document cannot be compiled"""
+
+
+class StepError(Exception):
+    """Approver cannot sign pending approval step of booking"""
+
+
+@dataclasses.dataclass(slots=True)
+class BookingBatch:
+    """Columns of bookings that share same compiled rule"""
+    booking_ids: np.ndarray
+    requester_ranks: np.ndarray
+    approver_ranks: np.ndarray
+    same_laboratory: np.ndarray
+    starts: np.ndarray  # seconds since epoch (UTC)
+    ends: np.ndarray
+
+
+Check = Callable[[BookingBatch], np.ndarray]
+
+
+@dataclasses.dataclass(slots=True)
+class CompiledRule:
+    key: str
+    checks: list[tuple[str, Check]]
+    approval_steps: tuple[AccountRole, ...] = ()
+
+
+@dataclasses.dataclass(slots=True)
+class Decision:
+    booking_id: int
+    allowed: bool
+    violations: list[str]
+    approval_steps: tuple[AccountRole, ...] = ()
+    pending_step: AccountRole | None = None  # role of first unsigned step, booking stays requested
+
+
+@dataclasses.dataclass
+class RuleTimings:
+    """Accumulated evaluation time per rule name"""
+    calls: dict[str, int] = dataclasses.field(default_factory=lambda: defaultdict(int))
+    rows: dict[str, int] = dataclasses.field(default_factory=lambda: defaultdict(int))
+    seconds: dict[str, float] = dataclasses.field(default_factory=lambda: defaultdict(float))
+
+    def add(self, name: str, rows: int, seconds: float) -> None:
+        self.calls[name] += 1
+        self.rows[name] += rows
+        self.seconds[name] += seconds
+
+    def report(self) -> None:
+        print(f"{'rule':<24}{'calls':>8}{'rows':>10}{'total ms':>12}{'us/row':>10}")
+        for name in sorted(self.seconds, key=self.seconds.get, reverse=True):
+            rows = self.rows[name]
+            print(
+                f"{name:<24}{self.calls[name]:>8}{rows:>10}{self.seconds[name] * 1000:>12.3f}"
+                f"{self.seconds[name] / rows * 1e6 if rows else 0:>10.3f}"
+            )
+
+
+def _role(value: Any) -> AccountRole:
+    try:
+        return AccountRole(str(value).lower())
+    except ValueError:
+        raise RuleError(f"unknown role {value!r}, expected one of {[role.value for role in AccountRole]}")
+
+
+def _seconds_of_day(value: str) -> int:
+    try:
+        time_value = datetime.time.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise RuleError(f"invalid time {value!r}, expected HH:MM")
+    return time_value.hour * 3600 + time_value.minute * 60 + time_value.second
+
+
+def _minimal_role_check(value: Any) -> Check:
+    rank = ROLE_RANKS[_role(value)]
+    return lambda batch: batch.requester_ranks >= rank
+
+
+def _approver_role_check(value: Any) -> Check:
+    rank = ROLE_RANKS[_role(value)]
+    return lambda batch: batch.approver_ranks >= rank
+
+
+def _same_laboratory_check(value: Any) -> Check:
+    if not value:
+        return lambda batch: np.ones(len(batch.booking_ids), dtype=bool)
+    return lambda batch: batch.same_laboratory
+
+
+def _max_duration_check(value: Any) -> Check:
+    if not isinstance(value, (int, float)) or value <= 0:
+        raise RuleError(f"max_duration_hours must be positive number, got {value!r}")
+    limit = value * 3600
+    return lambda batch: (batch.ends - batch.starts) <= limit
+
+
+def _schedule_check(value: Any) -> Check:
+    if not isinstance(value, list) or not value:
+        raise RuleError("schedule must be non-empty list of windows")
+    windows = []
+    for window in value:
+        days = window.get("days", list(WEEKDAYS))
+        unknown = set(days) - set(WEEKDAYS)
+        if unknown:
+            raise RuleError(f"unknown days in schedule: {sorted(unknown)}")
+        mask = np.zeros(7, dtype=bool)
+        mask[[WEEKDAYS.index(day) for day in days]] = True
+        windows.append((mask, _seconds_of_day(window.get("from", "00:00")), _seconds_of_day(window.get("to", "23:59:59"))))
+
+    def check(batch: BookingBatch) -> np.ndarray:
+        start_days, end_days = batch.starts // SECONDS_PER_DAY, (batch.ends - 1) // SECONDS_PER_DAY
+        weekdays = (start_days + 3) % 7  # 1970-01-01 was thursday
+        start_times = batch.starts - start_days * SECONDS_PER_DAY
+        end_times = batch.ends - end_days * SECONDS_PER_DAY
+        result = np.zeros(len(batch.booking_ids), dtype=bool)
+        for mask, window_start, window_end in windows:
+            result |= (
+                mask[weekdays]
+                & (start_days == end_days)
+                & (start_times >= window_start)
+                & (end_times <= window_end)
+            )
+        return result
+
+    return check
+
+
+RULE_COMPILERS: dict[str, Callable[[Any], Check]] = {
+    "minimal_role": _minimal_role_check,
+    "approver_role": _approver_role_check,
+    "same_laboratory": _same_laboratory_check,
+    "max_duration_hours": _max_duration_check,
+    "schedule": _schedule_check,
+}
+
+
+def effective_requirements(
+    type_requirements: dict[str, Any] | None,
+    equipment_requirements: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """Equipment rules override defaults of its equipment type"""
+    return {**(type_requirements or {}), **(equipment_requirements or {})}
+
+
+def requirements_key(document: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(document, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile(key: str, canonical: str) -> CompiledRule:
+    document = json.loads(canonical)
+    unknown = set(document) - set(RULE_COMPILERS) - {"approval_steps"}
+    if unknown:
+        raise RuleError(f"unknown rules: {sorted(unknown)}")
+    checks = [(name, RULE_COMPILERS[name](value)) for name, value in sorted(document.items()) if name in RULE_COMPILERS]
+    steps = tuple(_role(role) for role in document.get("approval_steps", []))
+    return CompiledRule(key=key, checks=checks, approval_steps=steps)
+
+
+def compile_requirements(document: dict[str, Any]) -> CompiledRule:
+    """Compiled rule for requirements document (cached by hash of canonical JSON)"""
+    canonical = json.dumps(document, sort_keys=True, default=str)
+    return _compile(hashlib.sha256(canonical.encode()).hexdigest(), canonical)
+
+
+def evaluate_batch(rule: CompiledRule, batch: BookingBatch, timings: RuleTimings | None = None) -> list[Decision]:
+    violations: list[list[str]] = [[] for _ in range(len(batch.booking_ids))]
+    for name, check in rule.checks:
+        started = time.perf_counter()
+        passed = check(batch)
+        if timings is not None:
+            timings.add(name, len(batch.booking_ids), time.perf_counter() - started)
+        for position in np.flatnonzero(~passed):
+            violations[position].append(name)
+    return [
+        Decision(int(booking_id), not booking_violations, booking_violations, rule.approval_steps)
+        for booking_id, booking_violations in zip(batch.booking_ids, violations)
+    ]
+
+
+def evaluate(
+    session: Session,
+    booking_ids: Sequence[int],
+    timings: RuleTimings | None = None,
+) -> list[Decision]:
+    """Evaluate bookings with one query for inputs and one vectorized pass per distinct rule"""
+    requester, approver = aliased(Account), aliased(Account)
+    rows = session.execute(
+        select(
+            Booking.id,
+            Booking.start_ts,
+            Booking.end_ts,
+            requester.role,
+            approver.role,
+            requester.laboratory_id == Equipment.laboratory_id,
+            EquipmentType.approval_requirements,
+            Equipment.approval_requirements,
+        )
+        .join(Equipment, Equipment.id == Booking.equipment_id)
+        .outerjoin(EquipmentType, EquipmentType.id == Equipment.equipment_type_id)
+        .join(requester, requester.id == Booking.requester_id)
+        .join(approver, approver.id == Booking.approver_id)
+        .where(Booking.id.in_(list(booking_ids)))
+    ).all()
+
+    groups: dict[str, list] = defaultdict(list)
+    rules: dict[str, CompiledRule | None] = {}
+    decisions = []
+    for row in rows:
+        document = effective_requirements(row[6], row[7])
+        key = requirements_key(document)
+        if key not in rules:
+            try:
+                rules[key] = compile_requirements(document)
+            except RuleError as e:
+                rules[key] = None
+                print(f"[approval] invalid requirements {document}: {e}")
+        if rules[key] is None:
+            decisions.append(Decision(row[0], False, ["invalid_requirements"]))
+            continue
+        groups[key].append(row)
+
+    for key, group in groups.items():
+        batch = BookingBatch(
+            booking_ids=np.array([row[0] for row in group], dtype=np.int64),
+            requester_ranks=np.array([ROLE_RANKS[row[3]] for row in group], dtype=np.int64),
+            approver_ranks=np.array([ROLE_RANKS[row[4]] for row in group], dtype=np.int64),
+            same_laboratory=np.array([row[5] for row in group], dtype=bool),
+            starts=np.array([int(row[1].timestamp()) for row in group], dtype=np.int64),
+            ends=np.array([int(row[2].timestamp()) for row in group], dtype=np.int64),
+        )
+        decisions.extend(evaluate_batch(rules[key], batch, timings))
+    return decisions
+
+
+def _await_steps(session: Session, decisions: Sequence[Decision]) -> None:
+    """Create approval steps of allowed bookings (once) and set pending_step of bookings with unsigned steps"""
+    decisions = [decision for decision in decisions if decision.allowed and decision.approval_steps]
+    if not decisions:
+        return
+    session.execute(
+        pg_insert(BookingApproval.__table__).on_conflict_do_nothing(),
+        [
+            {"booking_id": decision.booking_id, "step": step, "role": role}
+            for decision in decisions
+            for step, role in enumerate(decision.approval_steps)
+        ],
+    )
+    # steps in descending order, so first unsigned step of booking is written last
+    pending = dict(
+        session.execute(
+            select(BookingApproval.booking_id, BookingApproval.role)
+            .where(
+                BookingApproval.booking_id.in_([decision.booking_id for decision in decisions]),
+                BookingApproval.approved_at.is_(None),
+            )
+            .order_by(BookingApproval.booking_id, BookingApproval.step.desc())
+        ).tuples()
+    )
+    for decision in decisions:
+        decision.pending_step = pending.get(decision.booking_id)
+
+
+def sign_off(session: Session, booking_id: int, approver_id: int) -> AccountRole | None:
+    """
+    Sign first pending approval step of booking (caller commits), returns role of next pending step,
+    or None when all steps are signed (booking is approved by next bulk_approve)
+    """
+    steps = session.scalars(
+        select(BookingApproval)
+        .where(BookingApproval.booking_id == booking_id)
+        .order_by(BookingApproval.step)
+        .with_for_update()
+    ).all()
+    pending = [step for step in steps if step.approved_at is None]
+    if not pending:
+        raise StepError(f"booking {booking_id} has no pending approval steps")
+    if any(step.approver_id == approver_id for step in steps):
+        raise StepError(f"account {approver_id} already signed approval step of booking {booking_id}")
+    role = session.scalar(select(Account.role).where(Account.id == approver_id))
+    if role is None or ROLE_RANKS[role] < ROLE_RANKS[pending[0].role]:
+        raise StepError(f"step {pending[0].step} of booking {booking_id} requires role {pending[0].role.value}")
+    pending[0].approver_id = approver_id
+    pending[0].approved_at = datetime.datetime.now(tz=datetime.UTC)
+    session.flush()
+    return pending[1].role if len(pending) > 1 else None
+
+
+def bulk_approve(session: Session, booking_ids: Sequence[int], timings: RuleTimings | None = None) -> list[Decision]:
+    """
+    Approve requested bookings that satisfy rules and reject the rest (two UPDATE statements),
+    bookings with unsigned approval steps stay requested (see Decision.pending_step).
+    History and outbox rows are inserted and quota counters of rejected requesters are released in bulk,
+    because bulk UPDATE does not trigger mapper events
+    """
+    decisions = evaluate(session, booking_ids, timings)
+    _await_steps(session, decisions)
+    now = datetime.datetime.now(tz=datetime.UTC)
+    for status, allowed in ((BookingStatus.APPROVED, True), (BookingStatus.REJECTED, False)):
+        ids = [
+            decision.booking_id
+            for decision in decisions
+            if decision.allowed is allowed and decision.pending_step is None
+        ]
+        if not ids:
+            continue
+        updated = session.execute(
+            update(Booking)
+            .where(Booking.id.in_(ids), Booking.status == BookingStatus.REQUESTED)
+            .values(status=status)
+            .returning(Booking.id, Booking.requester_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if updated:
+            session.execute(
+                insert(BookingHistory),
+                [
+                    {
+                        "booking_id": row.id,
+                        "changed_at": now,
+                        "note": "Updated fields: status",
+                        "operation": ChangeOperation.UPDATE,
+                        "changes": {"status": [BookingStatus.REQUESTED.name, status.name]},
+                    }
+                    for row in updated
+                ],
+            )
+        changefeed.publish_status_changes(session.connection(), [(row.id, status) for row in updated])
+        if status not in quota.ACTIVE_STATUSES:
+            quota.release(session.connection(), [row.requester_id for row in updated])
+    return decisions
@@ -0,0 +1,323 @@
+"""
+Cold archive of closed bookings (rejected, cancelled, completed) that ended before cutoff.
+
+Each batch of bookings is moved out of hot tables in one transaction: rows of booking go to
+archive.booking (narrow heap without foreign keys, only indexed by id and equipment schedule),
+while their booking_history and booking_snapshot rows are written into zstd-compressed
+segment file on local disk (JSON lines, or Parquet with zstd codec) registered in archive.segment.
+Segment file is fsynced before transaction commits, so committed archive never points
+to missing file (failed batch leaves at most orphan file, which is removed when possible).
+
+Read functions below union hot and archived data, so callers do not need to know whether
+booking was archived. Utilization rollups (eduhub.analytics) are computed from hot table,
+so cutoff should be older than any period that is still refreshed.
+"""
+import dataclasses
+import datetime
+import functools
+import hashlib
+import io
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Literal, Sequence
+
+import zstandard
+from sqlalchemy import select, text, union_all
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import BookingStatus
+from eduhub.history import BookingRecord, _record, _replay, bookings_as_of as hot_bookings_as_of
+from eduhub.models import ArchivedBooking, Booking
+
+Format = Literal["jsonl", "parquet"]
+
+ARCHIVE_DIRECTORY = Path("booking_archive")
+CLOSED_STATUSES = [BookingStatus.REJECTED.name, BookingStatus.CANCELLED.name, BookingStatus.COMPLETED.name]
+COMPRESSION_LEVEL = 9
+
+# primary key order, so batch is found by index scan that stops after batch_size matches
+CANDIDATES_STATEMENT = text(
+    """
+    SELECT id FROM booking
+    WHERE status = ANY(CAST(:statuses AS bookingstatus[])) AND deleted_at IS NULL AND end_ts < :cutoff
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+    """
+)
+
+ENTRIES_STATEMENT = text(
+    """
+    SELECT
+        booking.id,
+        to_jsonb(booking) AS booking,
+        coalesce((
+            SELECT jsonb_agg(to_jsonb(history) ORDER BY history.changed_at, history.id)
+            FROM booking_history AS history WHERE history.booking_id = booking.id
+        ), '[]') AS history,
+        coalesce((
+            SELECT jsonb_agg(to_jsonb(snapshot) ORDER BY snapshot.changed_at, snapshot.history_id)
+            FROM booking_snapshot AS snapshot WHERE snapshot.booking_id = booking.id
+        ), '[]') AS snapshots
+    FROM booking
+    WHERE booking.id = ANY(:ids)
+    ORDER BY booking.id
+    """
+)
+
+MOVE_STATEMENTS = (
+    text(
+        "INSERT INTO archive.booking "
+        "(id, equipment_id, requester_id, start_ts, end_ts, status, approver_id, comment, deleted_at, segment_id) "
+        "SELECT id, equipment_id, requester_id, start_ts, end_ts, status, approver_id, comment, deleted_at, :segment_id "
+        "FROM booking WHERE id = ANY(:ids)"
+    ),
+    text("DELETE FROM booking_snapshot WHERE booking_id = ANY(:ids)"),
+    text("DELETE FROM booking_history WHERE booking_id = ANY(:ids)"),
+    text("DELETE FROM booking WHERE id = ANY(:ids)"),
+)
+
+SEGMENT_STATEMENT = text(
+    """
+    INSERT INTO archive.segment (path, format, bookings, history_rows, raw_bytes, stored_bytes, sha256)
+    VALUES (:path, :format, :bookings, :history_rows, :raw_bytes, :stored_bytes, :sha256)
+    RETURNING id
+    """
+)
+
+HOT_HISTORY_STATEMENT = text(
+    "SELECT to_jsonb(history) FROM booking_history AS history WHERE booking_id = :booking_id ORDER BY changed_at, id"
+)
+
+ARCHIVED_SEGMENTS_STATEMENT = text(
+    """
+    SELECT booking.id, segment.path, segment.format
+    FROM archive.booking AS booking
+    JOIN archive.segment AS segment ON segment.id = booking.segment_id
+    WHERE booking.id = ANY(:ids)
+    """
+)
+
+
+@dataclasses.dataclass(slots=True)
+class ArchiveStats:
+    bookings: int = 0
+    history_rows: int = 0
+    segments: int = 0
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.0
+
+
+def _fsync_write(path: Path, content: bytes) -> None:
+    """Write file under temporary name, fsync it, and rename (file appears only complete)"""
+    temporary = path.with_name(path.name + ".tmp")
+    with temporary.open("wb") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    directory = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def _parquet(entries: list[dict[str, Any]]) -> bytes:
+    # optional dependency, JSON lines segments do not need it
+    import pyarrow
+    import pyarrow.parquet
+
+    table = pyarrow.table({
+        "id": [entry["id"] for entry in entries],
+        "booking": [json.dumps(entry["booking"]) for entry in entries],
+        "history": [json.dumps(entry["history"]) for entry in entries],
+        "snapshots": [json.dumps(entry["snapshots"]) for entry in entries],
+    })
+    buffer = io.BytesIO()
+    pyarrow.parquet.write_table(table, buffer, compression="zstd", compression_level=COMPRESSION_LEVEL)
+    return buffer.getvalue()
+
+
+def write_segment(directory: Path, entries: list[dict[str, Any]], format: Format = "jsonl") -> dict[str, Any]:
+    """Durable segment file with entries {"id", "booking", "history", "snapshots"}, returns row of archive.segment"""
+    directory.mkdir(parents=True, exist_ok=True)
+    raw = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries).encode()
+    if format == "jsonl":
+        content = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(raw)
+        suffix = "jsonl.zst"
+    else:
+        content = _parquet(entries)
+        suffix = "parquet"
+    name = f"bookings-{entries[0]['id']}-{entries[-1]['id']}-{uuid.uuid4().hex[:8]}.{suffix}"
+    _fsync_write(directory / name, content)
+    return {
+        "path": name,
+        "format": format,
+        "bookings": len(entries),
+        "history_rows": sum(len(entry["history"]) for entry in entries),
+        "raw_bytes": len(raw),
+        "stored_bytes": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+
+
+@functools.lru_cache(maxsize=16)
+def read_segment(path: Path, format: Format) -> dict[int, dict[str, Any]]:
+    """Entries of segment by booking id (recently read segments are kept decoded)"""
+    entries = {}
+    if format == "jsonl":
+        with path.open("rb") as file, zstandard.ZstdDecompressor().stream_reader(file) as reader:
+            for line in io.TextIOWrapper(reader, encoding="utf-8"):
+                entry = json.loads(line)
+                entries[entry["id"]] = entry
+        return entries
+    import pyarrow.parquet
+
+    for row in pyarrow.parquet.read_table(path).to_pylist():
+        entries[row["id"]] = {
+            "id": row["id"],
+            **{name: json.loads(row[name]) for name in ("booking", "history", "snapshots")},
+        }
+    return entries
+
+
+def archive_batch(
+    session: Session,
+    cutoff: datetime.datetime,
+    batch_size: int = 1000,
+    directory: Path = ARCHIVE_DIRECTORY,
+    format: Format = "jsonl",
+) -> dict[str, Any] | None:
+    """Move up to batch_size closed bookings into archive (caller commits), returns written segment"""
+    ids = session.execute(
+        CANDIDATES_STATEMENT, {"statuses": CLOSED_STATUSES, "cutoff": cutoff, "batch_size": batch_size}
+    ).scalars().all()
+    if not ids:
+        return None
+    entries = [dict(row._mapping) for row in session.execute(ENTRIES_STATEMENT, {"ids": ids})]
+    segment = write_segment(directory, entries, format)
+    try:
+        segment_id = session.execute(SEGMENT_STATEMENT, segment).scalar_one()
+        for statement in MOVE_STATEMENTS:
+            session.execute(statement, {"ids": ids, "segment_id": segment_id})
+    except Exception:
+        (directory / segment["path"]).unlink(missing_ok=True)
+        raise
+    return segment
+
+
+def archive(
+    session: Session,
+    older_than: datetime.timedelta,
+    batch_size: int = 1000,
+    directory: Path = ARCHIVE_DIRECTORY,
+    format: Format = "jsonl",
+    pause: float = 0.0,
+) -> ArchiveStats:
+    """Archive all closed bookings that ended before now - older_than in short transactions"""
+    cutoff = datetime.datetime.now(tz=datetime.UTC) - older_than
+    stats = ArchiveStats()
+    while True:
+        segment = archive_batch(session, cutoff, batch_size, directory, format)
+        session.commit()
+        if segment is None:
+            break
+        stats.bookings += segment["bookings"]
+        stats.history_rows += segment["history_rows"]
+        stats.segments += 1
+        stats.raw_bytes += segment["raw_bytes"]
+        stats.stored_bytes += segment["stored_bytes"]
+        print(f"[archive] {stats.bookings} bookings in {stats.segments} segments, compression {stats.ratio:.1f}x")
+        time.sleep(pause)
+    return stats
+
+
+def _archived_entries(session: Session, booking_ids: Sequence[int], directory: Path) -> dict[int, dict[str, Any]]:
+    entries = {}
+    for booking_id, path, format in session.execute(ARCHIVED_SEGMENTS_STATEMENT, {"ids": list(booking_ids)}):
+        entries[booking_id] = read_segment(directory / path, format)[booking_id]
+    return entries
+
+
+def booking_history(session: Session, booking_id: int, directory: Path = ARCHIVE_DIRECTORY) -> list[dict[str, Any]]:
+    """History rows of booking (as JSON objects, oldest first) from hot table or from its segment"""
+    rows = session.execute(HOT_HISTORY_STATEMENT, {"booking_id": booking_id}).scalars().all()
+    if rows:
+        return rows
+    entry = _archived_entries(session, [booking_id], directory).get(booking_id)
+    return entry["history"] if entry is not None else []
+
+
+def _union(*conditions) -> Any:
+    columns = BookingRecord._fields
+    hot = select(*(getattr(Booking, name) for name in columns))
+    archived = select(*(getattr(ArchivedBooking, name) for name in columns))
+    # archive.booking is not soft deletable, so both sides are filtered by conditions only
+    return union_all(
+        hot.where(*(condition(Booking) for condition in conditions)),
+        archived.where(*(condition(ArchivedBooking) for condition in conditions)),
+    ).execution_options(include_deleted=True)
+
+
+def bookings(session: Session, booking_ids: Sequence[int]) -> dict[int, Any]:
+    """Current bookings (BookingRecord) by id, hot or archived, soft-deleted ones included (deleted_at is set)"""
+    statement = _union(lambda model: model.id.in_(list(booking_ids)))
+    return {row.id: BookingRecord(*row) for row in session.execute(statement)}
+
+
+def equipment_bookings(
+    session: Session,
+    equipment_id: int,
+    start_ts: datetime.datetime,
+    end_ts: datetime.datetime,
+) -> list:
+    """Bookings of equipment that intersect [start_ts, end_ts), hot and archived, by start"""
+    statement = _union(
+        lambda model: model.equipment_id == equipment_id,
+        lambda model: model.start_ts < end_ts,
+        lambda model: model.end_ts > start_ts,
+        lambda model: model.deleted_at.is_(None),
+    )
+    records = [BookingRecord(*row) for row in session.execute(statement)]
+    return sorted(records, key=lambda record: (record.start_ts, record.id))
+
+
+def _archived_as_of(entry: dict[str, Any], at: datetime.datetime) -> dict[str, Any] | None:
+    """Latest archived snapshot not after at with replay of later archived changes (same as eduhub.history)"""
+    snapshots = [
+        snapshot for snapshot in entry["snapshots"]
+        if datetime.datetime.fromisoformat(snapshot["changed_at"]) <= at
+    ]
+    latest = snapshots[-1] if snapshots else None
+    state = dict(latest["data"]) if latest is not None else None
+    after = (datetime.datetime.fromisoformat(latest["changed_at"]), latest["history_id"]) if latest is not None else None
+    deltas = []
+    for row in entry["history"]:
+        changed_at = datetime.datetime.fromisoformat(row["changed_at"])
+        if row["operation"] is None or changed_at > at or (after is not None and (changed_at, row["id"]) <= after):
+            continue
+        deltas.append((row["operation"], row["changes"]))
+    return _replay(state, deltas)
+
+
+def bookings_as_of(
+    session: Session,
+    booking_ids: Sequence[int],
+    at: datetime.datetime,
+    directory: Path = ARCHIVE_DIRECTORY,
+) -> dict[int, Any]:
+    """Bookings as they were at time at (eduhub.history.bookings_as_of that also reads archived history)"""
+    records = hot_bookings_as_of(session, booking_ids, at)
+    for booking_id, entry in _archived_entries(session, booking_ids, directory).items():
+        state = _archived_as_of(entry, at)
+        if state is not None:
+            records[booking_id] = _record(state)
+    return records
@@ -0,0 +1,69 @@
+"""
+Booking requests checked against overlapping active bookings of same equipment.
+
+Check and insert are correct only when concurrent requests cannot both pass the check, so
+request_booking is meant to run in SERIALIZABLE transaction of eduhub.common.transaction.TransactionRunner:
+Postgres aborts one of two transactions that read each other's slot, runner repeats it,
+and repeated check sees committed booking and raises BookingConflict.
+"""
+import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import BookingStatus
+from eduhub.models import Booking
+from eduhub.quota import ACTIVE_STATUSES
+
+
+class BookingConflict(Exception):
+    """Equipment already has active booking that overlaps requested interval"""
+
+    def __init__(self, equipment_id: int, booking_ids: list[int]):
+        super().__init__(f"equipment {equipment_id} is already booked by {booking_ids}")
+        self.equipment_id = equipment_id
+        self.booking_ids = booking_ids
+
+
+def overlapping(
+    session: Session,
+    equipment_id: int,
+    start_ts: datetime.datetime,
+    end_ts: datetime.datetime,
+) -> list[int]:
+    """Ids of active bookings of equipment that intersect [start_ts, end_ts)"""
+    return session.scalars(
+        select(Booking.id).where(
+            Booking.equipment_id == equipment_id,
+            Booking.status.in_(ACTIVE_STATUSES),
+            Booking.start_ts < end_ts,
+            Booking.end_ts > start_ts,
+        )
+    ).all()
+
+
+def request_booking(
+    session: Session,
+    equipment_id: int,
+    requester_id: int,
+    approver_id: int,
+    start_ts: datetime.datetime,
+    end_ts: datetime.datetime,
+    comment: str | None = None,
+) -> int:
+    """Insert requested booking (caller commits) and return its id, or raise BookingConflict"""
+    conflicts = overlapping(session, equipment_id, start_ts, end_ts)
+    if conflicts:
+        raise BookingConflict(equipment_id, conflicts)
+    booking = Booking(
+        equipment_id=equipment_id,
+        requester_id=requester_id,
+        approver_id=approver_id,
+        start_ts=start_ts,
+        end_ts=end_ts,
+        status=BookingStatus.REQUESTED,
+        comment=comment,
+    )
+    session.add(booking)
+    session.flush()
+    return booking.id
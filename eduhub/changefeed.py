@@ -0,0 +1,258 @@
+"""
+Change feed of bookings built on transactional outbox.
+
+Every insert and update of booking writes row into booking_outbox within same transaction
+(mapper events next to booking history, soft deletion is published as DELETE), and trigger on
+booking_outbox sends compact NOTIFY payload {"outbox_id", "id", "status", "changed"} to CHANNEL
+when transaction commits.
+
+Physical deletes produce no feed event. ORM delete of booking is blocked by foreign key of its
+history, so rows are only removed by Core statements of eduhub.purge (tombstones, whose soft
+deletion was already published) and eduhub.archive (closed bookings moved to cold storage,
+their last published state stays valid).
+
+ChangeFeedConsumer LISTENs to CHANNEL, treats notifications as wake-up signals, reads batches
+of outbox rows after its stored offset, and stores new offset after handler succeeds
+(at-least-once delivery, resumed after restart). Outbox ids are allocated before commit,
+so rows are read in (transaction_id, id) order and only from transactions older than
+every running transaction, otherwise row of slower transaction with lower id could be skipped.
+"""
+import dataclasses
+import datetime
+import json
+import time
+from typing import Callable, Iterable
+
+from sqlalchemy import Connection, create_engine, event, insert, inspect, text
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import BookingStatus, ChangeOperation
+from eduhub.models import Booking, BookingOutbox
+
+CHANNEL = "booking_changes"
+
+# rows of transactions that are finished for every snapshot (no lower transaction_id can appear later)
+BATCH_STATEMENT = """
+    SELECT id, transaction_id, booking_id, operation, status, changed_columns, created_at
+    FROM booking_outbox
+    WHERE (transaction_id, id) > (:transaction_id, :outbox_id)
+    AND transaction_id < pg_snapshot_xmin(pg_current_snapshot())::text::bigint
+    ORDER BY transaction_id, id
+    LIMIT :limit
+"""
+
+# notified rows which are still after offset of consumer
+PENDING_STATEMENT = """
+    SELECT id FROM booking_outbox WHERE id = ANY(:ids) AND (transaction_id, id) > (:transaction_id, :outbox_id)
+"""
+
+BACKLOG_STATEMENT = """
+    SELECT count(*)
+    FROM booking_outbox
+    WHERE (transaction_id, id) > (:transaction_id, :outbox_id)
+"""
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ChangeEvent:
+    outbox_id: int
+    transaction_id: int
+    booking_id: int
+    operation: ChangeOperation
+    status: BookingStatus
+    changed_columns: list[str]
+    created_at: datetime.datetime
+
+
+@dataclasses.dataclass
+class FeedStats:
+    """Delivery metrics of consumer (latency is time between write into outbox and handler call)"""
+    delivered: int = 0
+    batches: int = 0
+    notifications: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    @property
+    def latency_mean(self) -> float:
+        return self.latency_total / self.delivered if self.delivered else 0.0
+
+    def report(self, backlog: int) -> None:
+        print(
+            f"[changefeed] delivered={self.delivered} batches={self.batches} notifications={self.notifications} "
+            f"latency mean={self.latency_mean * 1000:.1f}ms max={self.latency_max * 1000:.1f}ms backlog={backlog}"
+        )
+
+
+def _write(connection: Connection, rows: list[dict]) -> None:
+    if rows:
+        connection.execute(insert(BookingOutbox.__table__), rows)
+
+
+def publish_status_changes(connection: Connection, changes: Iterable[tuple[int, BookingStatus]]) -> None:
+    """Outbox rows for bulk status updates, which bypass mapper events"""
+    _write(
+        connection,
+        [
+            {
+                "booking_id": booking_id,
+                "operation": ChangeOperation.UPDATE,
+                "status": status,
+                "changed_columns": ["status"],
+            }
+            for booking_id, status in changes
+        ],
+    )
+
+
+def _changed_columns(mapper, target: Booking) -> list[str]:
+    state = inspect(target)
+    return [attr.key for attr in mapper.column_attrs if state.attrs[attr.key].history.has_changes()]
+
+
+@event.listens_for(Booking, "after_insert")
+def booking_outbox_insert_event(mapper, connection, target: Booking):
+    _write(
+        connection,
+        [{"booking_id": target.id, "operation": ChangeOperation.INSERT, "status": target.status, "changed_columns": []}],
+    )
+
+
+@event.listens_for(Booking, "after_update")
+def booking_outbox_update_event(mapper, connection, target: Booking):
+    changed = _changed_columns(mapper, target)
+    if changed:
+        # soft deletion is published as deletion, restoration as update of deleted_at
+        operation = ChangeOperation.DELETE if "deleted_at" in changed and target.is_deleted else ChangeOperation.UPDATE
+        _write(
+            connection,
+            [{"booking_id": target.id, "operation": operation, "status": target.status, "changed_columns": changed}],
+        )
+
+
+def purge(session: Session, retention: datetime.timedelta) -> int:
+    """Delete outbox rows older than retention, which all consumers have already processed"""
+    result = session.execute(
+        text(
+            "DELETE FROM booking_outbox AS outbox "
+            "WHERE outbox.created_at < now() - :retention "
+            "AND NOT EXISTS ("
+            "    SELECT FROM change_feed_offset AS consumer_offset "
+            "    WHERE (consumer_offset.transaction_id, consumer_offset.outbox_id) < (outbox.transaction_id, outbox.id)"
+            ")"
+        ),
+        {"retention": retention},
+    )
+    return result.rowcount
+
+
+class ChangeFeedConsumer:
+    """
+    Named consumer of booking change feed, handler receives batches of events,
+    and position is stored in change_feed_offset only after handler returns
+    """
+
+    def __init__(
+        self,
+        url: str,
+        name: str,
+        handler: Callable[[list[ChangeEvent]], None],
+        batch_size: int = 500,
+        batch_window: float = 0.05,
+        poll_interval: float = 10.0,
+    ):
+        self.engine = create_engine(url)
+        self.name = name
+        self.handler = handler
+        self.batch_size = batch_size
+        self.batch_window = batch_window  # wait after wake-up to collect more changes into one batch
+        self.poll_interval = poll_interval  # fallback in case notification was missed (e.g., reconnect)
+        self.stats = FeedStats()
+        self.position = (0, 0)
+
+    def _load_position(self, connection: Connection) -> None:
+        row = connection.execute(
+            text("SELECT transaction_id, outbox_id FROM change_feed_offset WHERE consumer = :consumer"),
+            {"consumer": self.name},
+        ).first()
+        if row is not None:
+            self.position = (row.transaction_id, row.outbox_id)
+
+    def _store_position(self, connection: Connection) -> None:
+        connection.execute(
+            text(
+                "INSERT INTO change_feed_offset (consumer, transaction_id, outbox_id, updated_at) "
+                "VALUES (:consumer, :transaction_id, :outbox_id, now()) "
+                "ON CONFLICT (consumer) DO UPDATE SET transaction_id = excluded.transaction_id, "
+                "outbox_id = excluded.outbox_id, updated_at = excluded.updated_at"
+            ),
+            {"consumer": self.name, "transaction_id": self.position[0], "outbox_id": self.position[1]},
+        )
+
+    def _parameters(self) -> dict:
+        return {"transaction_id": self.position[0], "outbox_id": self.position[1]}
+
+    def backlog(self, connection: Connection) -> int:
+        return connection.execute(text(BACKLOG_STATEMENT), self._parameters()).scalar()
+
+    def _drain(self, connection: Connection) -> int:
+        """Deliver batches until no visible rows are left, returns amount of delivered events"""
+        delivered = 0
+        while True:
+            rows = connection.execute(text(BATCH_STATEMENT), {**self._parameters(), "limit": self.batch_size}).all()
+            if not rows:
+                return delivered
+            events = [
+                ChangeEvent(
+                    outbox_id=row.id,
+                    transaction_id=row.transaction_id,
+                    booking_id=row.booking_id,
+                    operation=ChangeOperation[row.operation],
+                    status=BookingStatus[row.status],
+                    changed_columns=row.changed_columns,
+                    created_at=row.created_at,
+                )
+                for row in rows
+            ]
+            self.handler(events)
+            now = datetime.datetime.now(tz=datetime.UTC)
+            for change in events:
+                latency = (now - change.created_at).total_seconds()
+                self.stats.latency_total += latency
+                self.stats.latency_max = max(self.stats.latency_max, latency)
+            self.stats.delivered += len(events)
+            self.stats.batches += 1
+            self.position = (events[-1].transaction_id, events[-1].outbox_id)
+            self._store_position(connection)
+            delivered += len(events)
+
+    def run(self, duration: float | None = None, report_interval: float = 10.0) -> None:
+        """Consume changes until duration (seconds) elapses, or forever"""
+        started = last_report = time.monotonic()
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.exec_driver_sql(f"LISTEN {CHANNEL}")
+            driver_connection = connection.connection.driver_connection
+            self._load_position(connection)
+            pending: set[int] = set()  # notified outbox ids, which are not visible for consumer yet
+            while duration is None or time.monotonic() - started < duration:
+                self._drain(connection)
+                if pending:
+                    pending = set(
+                        connection.execute(text(PENDING_STATEMENT), {**self._parameters(), "ids": list(pending)}).scalars()
+                    )
+                if time.monotonic() - last_report >= report_interval:
+                    self.stats.report(self.backlog(connection))
+                    last_report = time.monotonic()
+
+                # rows of transaction can be held back by older running transaction, so retry soon
+                timeout = min(0.1, self.poll_interval) if pending else self.poll_interval
+                for notify in driver_connection.notifies(timeout=timeout, stop_after=1):
+                    self.stats.notifications += 1
+                    pending.add(json.loads(notify.payload)["outbox_id"])
+                if self.batch_window:
+                    time.sleep(self.batch_window)
+                    # collect notifications that arrived while waiting without blocking
+                    for notify in driver_connection.notifies(timeout=0):
+                        self.stats.notifications += 1
+                        pending.add(json.loads(notify.payload)["outbox_id"])
+            self.stats.report(self.backlog(connection))
@@ -12,6 +12,8 @@ class Config:
     POSTGRES_DB: str
     POSTGRES_HOST: str
     POSTGRES_PORT: int
+    POSTGRES_SHARDS: str = ""  # comma-separated databases of laboratory shards (see eduhub.sharding)
+    POSTGRES_PREPARE_THRESHOLD: str = "5"  # executions before psycopg prepares statement, empty disables (see eduhub.hotqueries)
 
     @classmethod
     def load_from_env(cls) -> Self:
@@ -36,3 +38,11 @@ class Config:
             database=self.POSTGRES_DB,
         )
         return url.render_as_string(hide_password=False)
+
+    def prepare_threshold(self) -> int | None:
+        return int(self.POSTGRES_PREPARE_THRESHOLD) if str(self.POSTGRES_PREPARE_THRESHOLD).strip() else None
+
+    def shard_configs(self) -> list[Self]:
+        """Configuration per shard database (same server and credentials as POSTGRES_DB)"""
+        names = [name.strip() for name in self.POSTGRES_SHARDS.split(",") if name.strip()]
+        return [dataclasses.replace(self, POSTGRES_DB=name, POSTGRES_SHARDS="") for name in names]
@@ -24,8 +24,10 @@ def get_session(url: str):
     session_local = session()
     try:
         yield session_local
-    except SQLAlchemyError as e: # or any exception like Exception
-        print(e)
-        # optionally, rollback and raise exception here
+    except SQLAlchemyError:
+        # unfinished transaction must not leak into close(), caller decides what to do with error
+        # (see eduhub.common.transaction for retries of serialization failures and deadlocks)
+        session_local.rollback()
+        raise
     finally:
         session_local.close()
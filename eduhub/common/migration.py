@@ -0,0 +1,248 @@
+"""
+Helpers for online-safe alembic migrations on large tables (booking, booking_history, ...).
+
+Conventions:
+    - every index on an existing table is created with create_index_concurrently()
+      (outside of the migration transaction, so reads/writes are not blocked)
+    - every DDL that needs ACCESS EXCLUSIVE lock is wrapped into guarded() to fail fast
+      with lock_timeout instead of queueing behind long transactions (and all traffic behind it)
+    - new constraints are added as NOT VALID and validated separately with validate_constraint()
+    - data changes are done with batched_backfill() (batched_insert() for copies) instead of one huge statement
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator, Sequence
+import time
+
+from alembic import op
+from sqlalchemy import TextClause, text
+from sqlalchemy.exc import OperationalError
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+DEFAULT_LOCK_TIMEOUT = "2s"
+DEFAULT_STATEMENT_TIMEOUT = "1min"
+
+
+def _is_offline() -> bool:
+    return op.get_context().as_sql
+
+
+@contextmanager
+def session_timeouts(
+    lock_timeout: str = DEFAULT_LOCK_TIMEOUT,
+    statement_timeout: str = "0",
+) -> Iterator[None]:
+    """Set session-level timeouts (for statements outside of transaction) and reset them afterwards"""
+    op.execute(f"SET lock_timeout = '{lock_timeout}'")
+    op.execute(f"SET statement_timeout = '{statement_timeout}'")
+    try:
+        yield
+    finally:
+        op.execute("RESET lock_timeout")
+        op.execute("RESET statement_timeout")
+
+
+def guarded(
+    operation: Callable[[], None],
+    *,
+    lock_timeout: str = DEFAULT_LOCK_TIMEOUT,
+    statement_timeout: str = DEFAULT_STATEMENT_TIMEOUT,
+    attempts: int = 5,
+    backoff: float = 1.0,
+) -> None:
+    """
+    Run DDL operation inside savepoint with lock_timeout/statement_timeout
+    and retry it (with linear backoff) when lock cannot be acquired in time
+    """
+    if _is_offline():
+        op.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+        op.execute(f"SET LOCAL statement_timeout = '{statement_timeout}'")
+        operation()
+        return
+
+    bind = op.get_bind()
+    for attempt in range(1, attempts + 1):
+        try:
+            with bind.begin_nested():
+                bind.exec_driver_sql(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+                bind.exec_driver_sql(f"SET LOCAL statement_timeout = '{statement_timeout}'")
+                operation()
+            break
+        except OperationalError as e:
+            sqlstate = getattr(e.orig, "sqlstate", None)
+            if sqlstate != LOCK_NOT_AVAILABLE or attempt == attempts:
+                raise
+            delay = backoff * attempt
+            print(f"[migration] lock not available (attempt {attempt}/{attempts}), retry in {delay}s")
+            time.sleep(delay)
+    bind.exec_driver_sql("SET LOCAL lock_timeout TO DEFAULT")
+    bind.exec_driver_sql("SET LOCAL statement_timeout TO DEFAULT")
+
+
+def _drop_invalid_index(index_name: str) -> None:
+    """Failed CREATE INDEX CONCURRENTLY leaves INVALID index behind, so it must be removed before retry"""
+    if _is_offline():
+        return
+    is_invalid = op.get_bind().execute(
+        text(
+            "SELECT NOT i.indisvalid FROM pg_index AS i "
+            "JOIN pg_class AS c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :index_name"
+        ),
+        {"index_name": index_name},
+    ).scalar_one_or_none()
+    if is_invalid:
+        print(f"[migration] dropping invalid index {index_name}")
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+
+def create_index_concurrently(
+    index_name: str,
+    table_name: str,
+    columns: Sequence[str],
+    *,
+    unique: bool = False,
+    lock_timeout: str = DEFAULT_LOCK_TIMEOUT,
+    **kw,
+) -> None:
+    """CREATE INDEX CONCURRENTLY outside of migration transaction (requires transaction_per_migration)"""
+    with op.get_context().autocommit_block():
+        with session_timeouts(lock_timeout=lock_timeout):
+            _drop_invalid_index(index_name)
+            op.create_index(
+                index_name,
+                table_name,
+                columns,
+                unique=unique,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                **kw,
+            )
+
+
+def drop_index_concurrently(
+    index_name: str,
+    table_name: str,
+    *,
+    lock_timeout: str = DEFAULT_LOCK_TIMEOUT,
+) -> None:
+    with op.get_context().autocommit_block():
+        with session_timeouts(lock_timeout=lock_timeout):
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def add_check_constraint_not_valid(constraint_name: str, table_name: str, condition: str, **kw) -> None:
+    """Add CHECK constraint without scanning existing rows (only new/updated rows are checked)"""
+    guarded(
+        lambda: op.execute(
+            f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} CHECK ({condition}) NOT VALID"
+        ),
+        **kw,
+    )
+
+
+def add_foreign_key_not_valid(
+    constraint_name: str,
+    source_table: str,
+    referent_table: str,
+    local_cols: Sequence[str],
+    remote_cols: Sequence[str],
+    **kw,
+) -> None:
+    """Add FOREIGN KEY without scanning existing rows (only new/updated rows are checked)"""
+    guarded(
+        lambda: op.execute(
+            f"ALTER TABLE {source_table} ADD CONSTRAINT {constraint_name} "
+            f"FOREIGN KEY ({', '.join(local_cols)}) REFERENCES {referent_table} ({', '.join(remote_cols)}) "
+            "NOT VALID"
+        ),
+        **kw,
+    )
+
+
+def validate_constraint(constraint_name: str, table_name: str) -> None:
+    """
+    VALIDATE CONSTRAINT in its own transaction, it takes only SHARE UPDATE EXCLUSIVE lock,
+    so reads and writes continue while existing rows are scanned
+    """
+    with op.get_context().autocommit_block():
+        with session_timeouts():
+            op.execute(f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {constraint_name}")
+
+
+def _in_key_ranges(table_name: str, statement: TextClause, key: str, batch_size: int, pause: float, verb: str) -> int:
+    """Execute statement with :lower/:upper for every range of batch_size keys of table, each batch committed separately"""
+    if _is_offline():
+        raise RuntimeError("batched migrations require online mode (key range is read from table)")
+
+    affected = 0
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        lower, upper = bind.execute(text(f"SELECT min({key}), max({key}) FROM {table_name}")).one()
+        if lower is None:
+            return affected
+        started = time.perf_counter()
+        for batch_lower in range(lower, upper + 1, batch_size):
+            batch_upper = batch_lower + batch_size
+            with session_timeouts(statement_timeout=DEFAULT_STATEMENT_TIMEOUT):
+                affected += bind.execute(statement, {"lower": batch_lower, "upper": batch_upper}).rowcount
+            done = min(batch_upper, upper + 1) - lower
+            total = upper + 1 - lower
+            elapsed = time.perf_counter() - started
+            print(
+                f"[backfill] {table_name}: {done}/{total} keys ({done / total:.0%}), "
+                f"{affected} rows {verb}, {affected / elapsed if elapsed else 0:.0f} rows/s"
+            )
+            time.sleep(pause)
+    return affected
+
+
+def batched_backfill(
+    table_name: str,
+    set_clause: str,
+    where: str | None = None,
+    *,
+    key: str = "id",
+    batch_size: int = 10_000,
+    pause: float = 0.1,
+) -> int:
+    """
+    UPDATE table in key ranges of batch_size rows, where each batch is committed separately
+    and followed by pause (throttling for replication and vacuum). Returns amount of updated rows
+    """
+    condition = f" AND ({where})" if where else ""
+    statement = text(
+        f"UPDATE {table_name} SET {set_clause} "
+        f"WHERE {key} >= :lower AND {key} < :upper{condition}"
+    )
+    return _in_key_ranges(table_name, statement, key, batch_size, pause, "updated")
+
+
+def batched_insert(
+    target: str,
+    columns: Sequence[str],
+    expressions: Sequence[str],
+    source: str,
+    where: str | None = None,
+    *,
+    key: str = "id",
+    batch_size: int = 10_000,
+    pause: float = 0.1,
+) -> int:
+    """
+    INSERT INTO target SELECT expressions FROM source in key ranges of source, like batched_backfill()
+    (where should skip rows that are already copied, so interrupted migration can be repeated).
+    Returns amount of inserted rows
+    """
+    condition = f" AND ({where})" if where else ""
+    statement = text(
+        f"INSERT INTO {target} ({', '.join(columns)}) "
+        f"SELECT {', '.join(expressions)} FROM {source} "
+        f"WHERE {key} >= :lower AND {key} < :upper{condition}"
+    )
+    return _in_key_ranges(source, statement, key, batch_size, pause, "inserted")
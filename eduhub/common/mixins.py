@@ -0,0 +1,43 @@
+import datetime
+
+from sqlalchemy import DateTime, event
+from sqlalchemy.orm import Mapped, ORMExecuteState, Session, mapped_column, with_loader_criteria
+
+
+class SoftDeleteMixin:
+    """
+    Row is marked with deleted_at (tombstone) instead of physical deletion, so history and
+    foreign keys stay intact. Tombstones are hidden from every ORM query by soft_delete_criteria_event
+    (use execution option include_deleted=True to see them), and old tombstones are archived and
+    physically removed by eduhub.purge
+
+    __purge_cascade__ lists tables that are archived and deleted together with tombstone
+    (other references without ON DELETE CASCADE keep tombstone until they are gone)
+    """
+
+    __purge_cascade__: tuple[str, ...] = ()
+
+    deleted_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True), default=None)
+
+    @property
+    def is_deleted(self) -> bool:
+        return self.deleted_at is not None
+
+    def soft_delete(self) -> None:
+        if self.deleted_at is None:
+            self.deleted_at = datetime.datetime.now(tz=datetime.UTC)
+
+    def restore(self) -> None:
+        self.deleted_at = None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def soft_delete_criteria_event(execute_state: ORMExecuteState):
+    if (
+        (execute_state.is_select or execute_state.is_update or execute_state.is_delete)
+        and not execute_state.is_column_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(SoftDeleteMixin, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
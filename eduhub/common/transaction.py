@@ -0,0 +1,187 @@
+"""
+Transaction runner: unit of work (callable that receives session) is executed in its own
+transaction with isolation level chosen by call site, and whole unit is repeated when Postgres
+aborts it with serialization failure or deadlock (so unit of work must not have side effects
+outside of database). Retries wait with jittered exponential backoff and are limited by shared
+retry budget, so contention storm does not multiply load. Conflicts and retry latency
+are recorded per call site, for example:
+
+runner = TransactionRunner(engine)
+booking = runner.run(lambda session: request_booking(session, ...), name="request_booking")
+for line in runner.report():
+    print(line)
+"""
+import collections
+import dataclasses
+import random
+import statistics
+import threading
+import time
+from typing import Callable, Literal, TypeVar
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+IsolationLevel = Literal["SERIALIZABLE", "REPEATABLE READ", "READ COMMITTED"]
+
+SERIALIZATION_FAILURE = "40001"
+DEADLOCK_DETECTED = "40P01"
+RETRYABLE_SQLSTATES = {SERIALIZATION_FAILURE, DEADLOCK_DETECTED}
+
+
+def sqlstate(error: BaseException) -> str | None:
+    return getattr(getattr(error, "orig", None), "sqlstate", None) if isinstance(error, DBAPIError) else None
+
+
+class RetryBudget:
+    """
+    Token bucket shared by call sites of runner: every first attempt deposits ratio of token,
+    every retry withdraws one, so retries stay within ratio of traffic (plus min_retries burst)
+    """
+
+    def __init__(self, ratio: float = 0.5, min_retries: int = 20):
+        self.ratio = ratio
+        self.capacity = float(max(min_retries, 1))
+        self._tokens = self.capacity
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+@dataclasses.dataclass(slots=True)
+class CallSiteMetrics:
+    calls: int = 0
+    attempts: int = 0
+    commits: int = 0
+    serialization_failures: int = 0
+    deadlocks: int = 0
+    exhausted: int = 0  # gave up after max_attempts or empty retry budget
+    errors: int = 0  # other exceptions (raised by unit of work or database)
+    # time spent in failed attempts and backoff by calls that had at least one retry (seconds, latest samples)
+    retry_latencies: collections.deque = dataclasses.field(default_factory=lambda: collections.deque(maxlen=10_000))
+
+    @property
+    def conflicts(self) -> int:
+        return self.serialization_failures + self.deadlocks
+
+    @property
+    def conflict_rate(self) -> float:
+        """Share of attempts aborted by serialization failure or deadlock"""
+        return self.conflicts / self.attempts if self.attempts else 0.0
+
+    def retry_latency(self, quantile: float) -> float:
+        if not self.retry_latencies:
+            return 0.0
+        if len(self.retry_latencies) == 1:
+            return self.retry_latencies[0]
+        return statistics.quantiles(self.retry_latencies, n=100, method="inclusive")[int(quantile * 100) - 1]
+
+
+class TransactionRunner:
+    """Runs units of work with per-call isolation level and retries of serialization failures and deadlocks"""
+
+    def __init__(
+        self,
+        engine: Engine,
+        max_attempts: int = 10,
+        base_delay: float = 0.005,
+        max_delay: float = 0.5,
+        budget: RetryBudget | None = None,
+    ):
+        self.engine = engine
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.metrics: dict[str, CallSiteMetrics] = collections.defaultdict(CallSiteMetrics)
+        self._lock = threading.Lock()
+        self._engines: dict[tuple[str, bool], Engine] = {}
+
+    def _bind(self, isolation_level: IsolationLevel, read_only: bool) -> Engine:
+        key = (isolation_level, read_only)
+        if key not in self._engines:
+            # option engines share connection pool of engine, options are applied per checkout
+            options = {"isolation_level": isolation_level}
+            if read_only:
+                options["postgresql_readonly"] = True
+            self._engines[key] = self.engine.execution_options(**options)
+        return self._engines[key]
+
+    def _record(self, name: str, **increments: int) -> None:
+        with self._lock:
+            metrics = self.metrics[name]
+            for field, amount in increments.items():
+                setattr(metrics, field, getattr(metrics, field) + amount)
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform delay up to exponentially growing cap"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def run(
+        self,
+        work: Callable[[Session], T],
+        *,
+        isolation_level: IsolationLevel = "SERIALIZABLE",
+        read_only: bool = False,
+        name: str | None = None,
+    ) -> T:
+        """Execute work in new session and commit, whole work is repeated on retryable conflict"""
+        name = name or getattr(work, "__qualname__", repr(work))
+        bind = self._bind(isolation_level, read_only)
+        self._record(name, calls=1)
+        self.budget.deposit()
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            self._record(name, attempts=1)
+            try:
+                with Session(bind) as session:
+                    result = work(session)
+                    session.commit()
+            except DBAPIError as error:
+                state = sqlstate(error)
+                if state not in RETRYABLE_SQLSTATES:
+                    self._record(name, errors=1)
+                    raise
+                self._record(name, **{"deadlocks" if state == DEADLOCK_DETECTED else "serialization_failures": 1})
+                if attempt >= self.max_attempts or not self.budget.withdraw():
+                    self._record(name, exhausted=1)
+                    raise
+                time.sleep(self.backoff(attempt))
+                continue
+            except Exception:
+                self._record(name, errors=1)
+                raise
+            self._record(name, commits=1)
+            if attempt > 1:
+                with self._lock:
+                    self.metrics[name].retry_latencies.append(time.perf_counter() - started)
+            return result
+
+    def report(self) -> list[str]:
+        lines = [
+            f"{'call site':<32}{'calls':>8}{'attempts':>10}{'commits':>9}{'serial.':>9}{'deadlock':>10}"
+            f"{'exhaust.':>10}{'errors':>8}{'conflict':>10}{'retry p50':>11}{'retry p95':>11}"
+        ]
+        with self._lock:
+            items = sorted(self.metrics.items())
+        for name, metrics in items:
+            lines.append(
+                f"{name[:31]:<32}{metrics.calls:>8}{metrics.attempts:>10}{metrics.commits:>9}"
+                f"{metrics.serialization_failures:>9}{metrics.deadlocks:>10}{metrics.exhausted:>10}{metrics.errors:>8}"
+                f"{metrics.conflict_rate:>10.1%}{metrics.retry_latency(0.5) * 1000:>9.1f}ms{metrics.retry_latency(0.95) * 1000:>9.1f}ms"
+            )
+        return lines
@@ -56,3 +56,31 @@ class PresentationVisibility(enum.StrEnum):
     PRIVATE_INTERNAL = enum.auto()
     STAKEHOLDERS_ONLY = enum.auto()
     PUBLIC_COMMUNITY = enum.auto()
+
+
+class BucketSize(enum.StrEnum):
+    """Time bucket for aggregations (value is compatible with date_trunc in PostgreSQL)"""
+    HOUR = enum.auto()
+    DAY = enum.auto()
+    WEEK = enum.auto()
+
+
+class UtilizationDimension(enum.StrEnum):
+    """Level of equipment utilization aggregation"""
+    EQUIPMENT = enum.auto()
+    EQUIPMENT_TYPE = enum.auto()
+    LABORATORY = enum.auto()
+
+
+class ChangeOperation(enum.StrEnum):
+    """Kind of row change published to change feed"""
+    INSERT = enum.auto()
+    UPDATE = enum.auto()
+    DELETE = enum.auto()
+
+
+class OrganizationUnitKind(enum.StrEnum):
+    """Level of organization structure above laboratory"""
+    UNIVERSITY = enum.auto()
+    FACULTY = enum.auto()
+    DEPARTMENT = enum.auto()
@@ -0,0 +1,374 @@
+"""
+Write-behind counters for high-frequency increments (equipment page views, resource views and
+downloads, views of profile posts).
+
+Hit only increments process-local buffer (sharded dicts with lock per shard, no I/O, so it is
+safe to call from threads and from asyncio event loop), and flush() periodically writes all
+buffered increments as one UPDATE ... FROM (VALUES ...) per table, so hot rows get one update
+per flush instead of one per hit (less row lock contention and fewer dead tuples).
+
+Buffered increments are lost on crash. With spill_path they are appended to spill file every
+spill_interval, so loss is bounded by spill_interval and recover() replays spilled increments
+on start (increments that were written to database right before crash can be counted twice,
+so counters are at-least-once for spilled increments).
+
+counters = WriteBehindCounters(engine, spill_path="counters.spill")
+counters.recover()
+counters.start()
+counters.add("equipment_views", equipment_id)
+counters.add("post_views", (profile_id, slug))
+counters.stop()
+"""
+import asyncio
+import collections
+import dataclasses
+import json
+import os
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Hashable, Iterable
+
+from sqlalchemy import Connection, Engine, text
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ColumnCounter:
+    """Integer column incremented by id of row"""
+
+    table: str
+    column: str
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class PostViewCounter:
+    """views of post with slug within profile.posts (JSONB array), key is (profile_id, slug)"""
+
+    table: str = "profile"
+
+
+COUNTERS: dict[str, ColumnCounter | PostViewCounter] = {
+    "equipment_views": ColumnCounter("equipment", "view_count"),
+    "resource_views": ColumnCounter("resource", "view_count"),
+    "resource_downloads": ColumnCounter("resource", "download_count"),
+    "post_views": PostViewCounter(),
+}
+
+MAX_ROWS_PER_STATEMENT = 5000
+
+POST_VIEWS_STATEMENT = """
+    UPDATE profile SET posts = coalesce((
+        SELECT jsonb_agg(
+            CASE WHEN increments.amounts ? (element.post ->> 'slug') THEN jsonb_set(
+                element.post, '{{views}}',
+                to_jsonb(coalesce((element.post ->> 'views')::bigint, 0) + (increments.amounts ->> (element.post ->> 'slug'))::bigint)
+            ) ELSE element.post END
+            ORDER BY element.position
+        )
+        FROM jsonb_array_elements(profile.posts) WITH ORDINALITY AS element(post, position)
+    ), '[]'::jsonb)
+    FROM (
+        SELECT profile_id, jsonb_object_agg(slug, amount) AS amounts
+        FROM (VALUES {values}) AS increment(profile_id, slug, amount)
+        GROUP BY profile_id
+    ) AS increments
+    WHERE profile.id = increments.profile_id AND jsonb_typeof(profile.posts) = 'array'
+"""
+
+
+class CounterBuffer:
+    """Increments per (counter, key) in shards, each shard is guarded by its own lock"""
+
+    def __init__(self, shards: int = 16):
+        self._locks = [threading.Lock() for _ in range(shards)]
+        # pending since last drain, and part of it that is not written to spill file yet
+        self._pending: list[collections.Counter] = [collections.Counter() for _ in range(shards)]
+        self._unspilled: list[collections.Counter] = [collections.Counter() for _ in range(shards)]
+
+    def add(self, counter: str, key: Hashable, amount: int = 1, spilled: bool = False) -> int:
+        """Add increment (spilled when it is already in spill file) and return amount of keys buffered in its shard"""
+        shard = hash(key) % len(self._locks)
+        with self._locks[shard]:
+            self._pending[shard][counter, key] += amount
+            if not spilled:
+                self._unspilled[shard][counter, key] += amount
+            return len(self._pending[shard])
+
+    def __len__(self) -> int:
+        return sum(len(pending) for pending in self._pending)
+
+    def drain(self) -> collections.Counter:
+        """Take all pending increments (and forget unspilled ones, they are part of drained batch)"""
+        drained = collections.Counter()
+        for shard, lock in enumerate(self._locks):
+            with lock:
+                pending, self._pending[shard] = self._pending[shard], collections.Counter()
+                self._unspilled[shard] = collections.Counter()
+            drained.update(pending)
+        return drained
+
+    def drain_unspilled(self) -> collections.Counter:
+        drained = collections.Counter()
+        for shard, lock in enumerate(self._locks):
+            with lock:
+                unspilled, self._unspilled[shard] = self._unspilled[shard], collections.Counter()
+            drained.update(unspilled)
+        return drained
+
+
+@dataclasses.dataclass(slots=True)
+class FlushMetrics:
+    flushes: int = 0
+    failures: int = 0
+    increments: int = 0  # sum of flushed amounts (hits)
+    rows: collections.Counter = dataclasses.field(default_factory=collections.Counter)  # updated keys per table
+    last_size: int = 0
+    latencies: collections.deque = dataclasses.field(default_factory=lambda: collections.deque(maxlen=10_000))
+    sizes: collections.deque = dataclasses.field(default_factory=lambda: collections.deque(maxlen=10_000))
+
+    def latency(self, quantile: float) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[int(quantile * 100) - 1]
+
+
+def _values(rows: list[tuple], types: tuple[str, ...]) -> tuple[str, dict]:
+    """VALUES list with typed bound parameters"""
+    parameters = {}
+    tuples = []
+    for index, row in enumerate(rows):
+        cells = []
+        for position, (value, type_name) in enumerate(zip(row, types)):
+            parameters[f"v{index}_{position}"] = value
+            cells.append(f"CAST(:v{index}_{position} AS {type_name})")
+        tuples.append(f"({', '.join(cells)})")
+    return ", ".join(tuples), parameters
+
+
+def _chunks(rows: list, size: int = MAX_ROWS_PER_STATEMENT) -> Iterable[list]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def write_increments(connection: Connection, batch: collections.Counter) -> collections.Counter:
+    """Apply batch of (counter, key) increments with one UPDATE per table (and chunk), returns keys per table"""
+    columns_of: dict[str, dict[int, dict[str, int]]] = collections.defaultdict(lambda: collections.defaultdict(dict))
+    posts = []
+    for (name, key), amount in batch.items():
+        counter = COUNTERS[name]
+        if isinstance(counter, PostViewCounter):
+            profile_id, slug = key
+            posts.append((profile_id, slug, amount))
+        else:
+            columns_of[counter.table][key][counter.column] = amount
+
+    rows_per_table = collections.Counter()
+    for table, increments in sorted(columns_of.items()):
+        columns = sorted({column for amounts in increments.values() for column in amounts})
+        # rows are locked in order of id, so concurrent flushes of several processes do not deadlock
+        rows = [(row_id, *(amounts.get(column, 0) for column in columns)) for row_id, amounts in sorted(increments.items())]
+        assignments = ", ".join(f"{column} = target.{column} + increment.{column}" for column in columns)
+        for chunk in _chunks(rows):
+            values, parameters = _values(chunk, ("integer", *("bigint",) * len(columns)))
+            connection.execute(
+                text(
+                    f"UPDATE {table} AS target SET {assignments} "
+                    f"FROM (VALUES {values}) AS increment(id, {', '.join(columns)}) "
+                    "WHERE target.id = increment.id"
+                ),
+                parameters,
+            )
+        rows_per_table[table] += len(rows)
+    if posts:
+        posts.sort()
+        for chunk in _chunks(posts):
+            values, parameters = _values(chunk, ("integer", "text", "bigint"))
+            connection.execute(text(POST_VIEWS_STATEMENT.format(values=values)), parameters)
+        rows_per_table["profile"] += len({profile_id for profile_id, _, _ in posts})
+    return rows_per_table
+
+
+class WriteBehindCounters:
+    """Buffered counters flushed by background thread (start/stop) or asyncio task (run_async)"""
+
+    def __init__(
+        self,
+        engine: Engine,
+        flush_interval: float = 5.0,
+        shards: int = 16,
+        max_keys_per_shard: int = 10_000,
+        spill_path: str | Path | None = None,
+        spill_interval: float = 0.5,
+    ):
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.max_keys_per_shard = max_keys_per_shard
+        self.spill_path = Path(spill_path) if spill_path is not None else None
+        self.spill_interval = spill_interval
+        self.buffer = CounterBuffer(shards)
+        self.metrics = FlushMetrics()
+        self._flush_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, counter: str, key: Hashable, amount: int = 1) -> None:
+        if counter not in COUNTERS:
+            raise KeyError(f"unknown counter {counter!r}, expected one of {sorted(COUNTERS)}")
+        if self.buffer.add(counter, key, amount) >= self.max_keys_per_shard:
+            # too many distinct keys buffered, flush before interval ends
+            self._wake.set()
+
+    def _flushing_path(self) -> Path:
+        return self.spill_path.with_name(self.spill_path.name + ".flushing")
+
+    def _append(self, path: Path, increments: collections.Counter) -> None:
+        with path.open("a", encoding="utf-8") as file:
+            for (counter, key), amount in increments.items():
+                file.write(json.dumps({"counter": counter, "key": key, "amount": amount}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def spill(self) -> int:
+        """Append increments buffered since last spill to spill file, returns amount of written keys"""
+        if self.spill_path is None:
+            return 0
+        with self._spill_lock:
+            increments = self.buffer.drain_unspilled()
+            if increments:
+                self._append(self.spill_path, increments)
+            return len(increments)
+
+    def _recovering_path(self) -> Path:
+        return self.spill_path.with_name(self.spill_path.name + ".recovering")
+
+    @staticmethod
+    def _read(path: Path) -> collections.Counter:
+        increments = collections.Counter()
+        with path.open(encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # last line can be torn by crash in the middle of write
+                    continue
+                key = tuple(entry["key"]) if isinstance(entry["key"], list) else entry["key"]
+                increments[entry["counter"], key] += entry["amount"]
+        return increments
+
+    def recover(self) -> int:
+        """
+        Buffer increments of spill files left by previous process (call before start), returns amount of keys.
+        Files are first merged into one fsynced .recovering file that replaces them, so repeated
+        recovery (or crash in the middle of it) neither loses nor counts increments twice
+        """
+        if self.spill_path is None:
+            return 0
+        with self._spill_lock:
+            recovering = self._recovering_path()
+            if not recovering.exists():
+                paths = [path for path in (self._flushing_path(), self.spill_path) if path.exists()]
+                if not paths:
+                    return 0
+                increments = collections.Counter()
+                for path in paths:
+                    increments.update(self._read(path))
+                temporary = recovering.with_name(recovering.name + ".tmp")
+                temporary.unlink(missing_ok=True)
+                self._append(temporary, increments)
+                os.replace(temporary, recovering)
+            # merged file covers both old files from here on
+            self._flushing_path().unlink(missing_ok=True)
+            os.replace(recovering, self.spill_path)
+            increments = self._read(self.spill_path)
+            for (counter, key), amount in increments.items():
+                self.buffer.add(counter, key, amount, spilled=True)
+        return len(increments)
+
+    def flush(self) -> int:
+        """Write buffered increments to database, returns amount of updated keys"""
+        with self._flush_lock:
+            with self._spill_lock:
+                if self.spill_path is not None and self.spill_path.exists():
+                    # spill file now covers only part of drained batch, new increments go to new file
+                    os.replace(self.spill_path, self._flushing_path())
+                batch = self.buffer.drain()
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                with self.engine.begin() as connection:
+                    rows = write_increments(connection, batch)
+            except Exception:
+                self.metrics.failures += 1
+                # increments are kept for next flush (and spilled again)
+                for (counter, key), amount in batch.items():
+                    self.buffer.add(counter, key, amount)
+                self.spill()
+                self._remove_flushing()
+                raise
+            self._remove_flushing()
+            elapsed = time.perf_counter() - started
+            self.metrics.flushes += 1
+            self.metrics.increments += sum(batch.values())
+            self.metrics.rows.update(rows)
+            self.metrics.last_size = len(batch)
+            self.metrics.sizes.append(len(batch))
+            self.metrics.latencies.append(elapsed)
+            return len(batch)
+
+    def _remove_flushing(self) -> None:
+        if self.spill_path is not None:
+            self._flushing_path().unlink(missing_ok=True)
+
+    def _loop(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stopped.is_set():
+            woken = self._wake.wait(timeout=self.spill_interval if self.spill_path is not None else self.flush_interval)
+            self._wake.clear()
+            try:
+                if woken or time.monotonic() >= next_flush:
+                    self.flush()
+                    next_flush = time.monotonic() + self.flush_interval
+                else:
+                    self.spill()
+            except Exception as error:
+                print(f"[counters] flush failed, increments are kept: {error}")
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._loop, name="counters", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop background thread and flush remaining increments"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    async def run_async(self) -> None:
+        """Flush loop for asyncio applications (flushes run in worker thread), final flush on cancellation"""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await asyncio.to_thread(self.flush)
+        finally:
+            await asyncio.to_thread(self.flush)
+
+    def report(self) -> list[str]:
+        metrics = self.metrics
+        average = statistics.fmean(metrics.sizes) if metrics.sizes else 0.0
+        return [
+            f"flushes={metrics.flushes} failures={metrics.failures} increments={metrics.increments} "
+            f"buffered keys={len(self.buffer)}",
+            f"flush size: last={metrics.last_size} average={average:.0f} keys, "
+            f"latency p50={metrics.latency(0.5) * 1000:.1f}ms p95={metrics.latency(0.95) * 1000:.1f}ms",
+            "updated rows: " + ", ".join(f"{table} {amount}" for table, amount in sorted(metrics.rows.items())),
+        ]
@@ -0,0 +1,325 @@
+"""
+Metadata of dataset files on local disk (CSV, JSONL, Parquet): size, amount of rows and columns,
+and column names with inferred types that are merged into Dataset.attributes.
+
+Files are memory-mapped and scanned in CHUNK_SIZE slices (rows are counted as newlines,
+content is hashed in the same pass), and column types are inferred from first SAMPLE_ROWS
+rows, so memory does not depend on size of file. Parquet is read from footer with pyarrow.
+Files are scanned in process pool, and files with same size and mtime as on previous scan
+are skipped without reading (files with new mtime but same content hash keep their metadata).
+
+CSV rows are counted as lines, so quoted values with line breaks make rows_amount approximate.
+"""
+import csv
+import dataclasses
+import datetime
+import hashlib
+import io
+import json
+import mmap
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+from urllib.parse import unquote, urlparse
+
+from sqlalchemy import Engine, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from eduhub.models import Dataset, DatasetFile
+
+CHUNK_SIZE = 64 * 1024 * 1024
+SAMPLE_ROWS = 1000
+FORMATS = {".csv": "csv", ".tsv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+# type of column that has values of both types
+_WIDER = {frozenset({"int64", "float64"}): "float64"}
+
+
+@dataclasses.dataclass(slots=True)
+class FileMetadata:
+    dataset_id: int
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    format: str
+    rows_amount: int | None = None
+    columns: dict[str, dict[str, Any]] = dataclasses.field(default_factory=dict)  # name -> {"type", "nullable"}
+
+
+def resolve_path(link: str, root: Path) -> Path | None:
+    """Local file of dataset link (file:// URL, absolute path, or path relative to root), None for remote links"""
+    parsed = urlparse(link)
+    if parsed.scheme == "file":
+        return Path(unquote(parsed.path))
+    if parsed.scheme and len(parsed.scheme) > 1:
+        # http(s)://, s3://, ... (one-letter scheme is drive of windows path)
+        return None
+    path = Path(link)
+    return path if path.is_absolute() else root / path
+
+
+def _scalar_type(value: str) -> str | None:
+    if value == "":
+        return None
+    try:
+        int(value)
+        return "int64"
+    except ValueError:
+        pass
+    try:
+        float(value)
+        return "float64"
+    except ValueError:
+        pass
+    if value.lower() in ("true", "false"):
+        return "bool"
+    try:
+        datetime.datetime.fromisoformat(value)
+        return "timestamp"
+    except ValueError:
+        return "string"
+
+
+def _json_type(value: Any) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int64"
+    if isinstance(value, float):
+        return "float64"
+    if isinstance(value, str):
+        return _scalar_type(value) if value else "string"
+    return "json"
+
+
+def _merge_type(columns: dict[str, dict[str, Any]], name: str, value_type: str | None) -> None:
+    column = columns.setdefault(name, {"type": None, "nullable": False})
+    if value_type is None:
+        column["nullable"] = True
+    elif column["type"] is None:
+        column["type"] = value_type
+    elif column["type"] != value_type:
+        column["type"] = _WIDER.get(frozenset({column["type"], value_type}), "string")
+
+
+def _finish(columns: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    # columns without any value in sample
+    return {name: {**column, "type": column["type"] or "string"} for name, column in columns.items()}
+
+
+def _head(mapped: mmap.mmap, rows: int) -> str:
+    """First rows lines of file (without loading whole file)"""
+    end = 0
+    for _ in range(rows):
+        position = mapped.find(b"\n", end)
+        if position < 0:
+            end = len(mapped)
+            break
+        end = position + 1
+    return mapped[:end].decode("utf-8", errors="replace")
+
+
+def _count_and_hash(mapped: mmap.mmap) -> tuple[int, str]:
+    """Amount of lines (last line may have no line break) and blake2b of content, chunk by chunk"""
+    digest = hashlib.blake2b(digest_size=16)
+    newlines = 0
+    for start in range(0, len(mapped), CHUNK_SIZE):
+        chunk = mapped[start:start + CHUNK_SIZE]
+        newlines += chunk.count(b"\n")
+        digest.update(chunk)
+    lines = newlines + (1 if len(mapped) and mapped[-1:] != b"\n" else 0)
+    return lines, digest.hexdigest()
+
+
+def _scan_csv(mapped: mmap.mmap, path: Path, lines: int, metadata: FileMetadata) -> None:
+    head = _head(mapped, SAMPLE_ROWS + 1)
+    dialect = csv.excel_tab if path.suffix.lower() == ".tsv" else csv.excel
+    reader = csv.reader(io.StringIO(head), dialect)
+    header = next(reader, [])
+    columns: dict[str, dict[str, Any]] = {name: {"type": None, "nullable": False} for name in header}
+    for row in reader:
+        for name, value in zip(header, row):
+            _merge_type(columns, name, _scalar_type(value))
+    metadata.rows_amount = max(lines - 1, 0)
+    metadata.columns = _finish(columns)
+
+
+def _scan_jsonl(mapped: mmap.mmap, path: Path, lines: int, metadata: FileMetadata) -> None:
+    metadata.rows_amount = lines
+    columns: dict[str, dict[str, Any]] = {}
+    sampled = 0
+    for line in _head(mapped, SAMPLE_ROWS).splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # last sampled line can be cut by SAMPLE_ROWS boundary only when file has no line breaks
+            continue
+        if not isinstance(record, dict):
+            continue
+        sampled += 1
+        for name in columns.keys() - record.keys():
+            columns[name]["nullable"] = True
+        for name, value in record.items():
+            if name not in columns and sampled > 1:
+                # key missing in previous records
+                columns[name] = {"type": None, "nullable": True}
+            _merge_type(columns, name, _json_type(value))
+    metadata.columns = _finish(columns)
+
+
+def _scan_parquet(mapped: mmap.mmap, path: Path, lines: int, metadata: FileMetadata) -> None:
+    # optional dependency, only Parquet files need it
+    import pyarrow.parquet
+
+    parquet = pyarrow.parquet.ParquetFile(path)
+    metadata.rows_amount = parquet.metadata.num_rows
+    metadata.columns = {
+        field.name: {"type": str(field.type), "nullable": field.nullable}
+        for field in parquet.schema_arrow
+    }
+
+
+SCANNERS = {"csv": _scan_csv, "jsonl": _scan_jsonl, "parquet": _scan_parquet}
+
+
+def scan(dataset_id: int, path: str, known_hash: str | None = None) -> FileMetadata:
+    """Metadata of file (runs in worker process), rows and columns are not inferred when content hash is known_hash"""
+    file_path = Path(path)
+    status = file_path.stat()
+    metadata = FileMetadata(
+        dataset_id=dataset_id,
+        path=path,
+        size=status.st_size,
+        mtime_ns=status.st_mtime_ns,
+        content_hash="",
+        format=FORMATS[file_path.suffix.lower()],
+    )
+    if status.st_size == 0:
+        # empty file cannot be memory-mapped
+        metadata.content_hash = hashlib.blake2b(b"", digest_size=16).hexdigest()
+        metadata.rows_amount = 0
+        return metadata
+    with file_path.open("rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        # one sequential pass over file, touched files with same content keep their metadata
+        lines, metadata.content_hash = _count_and_hash(mapped)
+        if metadata.content_hash == known_hash:
+            return metadata
+        SCANNERS[metadata.format](mapped, file_path, lines, metadata)
+    return metadata
+
+
+def _attributes(existing: dict[str, Any] | None, columns: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """Inferred columns in file order, descriptions written by hand are kept"""
+    existing = existing if isinstance(existing, dict) else {}
+    return {
+        name: {**(existing.get(name) if isinstance(existing.get(name), dict) else {}), **column}
+        for name, column in columns.items()
+    }
+
+
+def _store(session: Session, results: list[FileMetadata]) -> int:
+    """Bulk update of changed datasets and upsert of scanned files, returns amount of updated datasets"""
+    now = datetime.datetime.now(tz=datetime.UTC)
+    changed = [metadata for metadata in results if metadata.rows_amount is not None]
+    if changed:
+        attributes = dict(
+            session.execute(
+                select(Dataset.id, Dataset.attributes).where(Dataset.id.in_([metadata.dataset_id for metadata in changed]))
+            ).tuples()
+        )
+        session.execute(
+            update(Dataset),
+            [
+                {
+                    "id": metadata.dataset_id,
+                    "size": metadata.size,
+                    "rows_amount": metadata.rows_amount,
+                    "columns_amount": len(metadata.columns),
+                    "attributes": _attributes(attributes.get(metadata.dataset_id), metadata.columns),
+                }
+                for metadata in changed
+            ],
+        )
+    statement = pg_insert(DatasetFile)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[DatasetFile.dataset_id],
+            set_={
+                name: getattr(statement.excluded, name)
+                for name in ("path", "size", "mtime_ns", "content_hash", "format", "scanned_at")
+            },
+        ),
+        [
+            {
+                "dataset_id": metadata.dataset_id,
+                "path": metadata.path,
+                "size": metadata.size,
+                "mtime_ns": metadata.mtime_ns,
+                "content_hash": metadata.content_hash,
+                "format": metadata.format,
+                "scanned_at": now,
+            }
+            for metadata in results
+        ],
+    )
+    return len(changed)
+
+
+def pending_files(session: Session, root: Path, force: bool = False) -> list[tuple[int, str, str | None]]:
+    """(dataset_id, path, known content hash) of local files that are new or changed since last scan"""
+    rows = session.execute(
+        select(Dataset.id, Dataset.link, DatasetFile.path, DatasetFile.size, DatasetFile.mtime_ns, DatasetFile.content_hash)
+        .outerjoin(DatasetFile, DatasetFile.dataset_id == Dataset.id)
+        .where(Dataset.deleted_at.is_(None))
+        .order_by(Dataset.id)
+    )
+    pending = []
+    for dataset_id, link, known_path, size, mtime_ns, content_hash in rows:
+        path = resolve_path(link, root)
+        if path is None or path.suffix.lower() not in FORMATS:
+            continue
+        try:
+            status = path.stat()
+        except OSError:
+            continue
+        same_file = str(path) == known_path and status.st_size == size
+        if not force and same_file and status.st_mtime_ns == mtime_ns:
+            continue
+        pending.append((dataset_id, str(path), content_hash if same_file and not force else None))
+    return pending
+
+
+def extract(engine: Engine, root: str | Path = ".", workers: int | None = None, force: bool = False, batch_size: int = 100) -> int:
+    """
+    Scan new and changed dataset files in process pool, metadata is written (committed per batch)
+    by main process. Returns amount of datasets with updated metadata
+    """
+    started = time.perf_counter()
+    with Session(engine) as session:
+        pending = pending_files(session, Path(root), force)
+        print(f"[datasets] {len(pending)} new or changed files")
+        updated = scanned = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(scan, *arguments) for arguments in pending]
+            for start in range(0, len(futures), batch_size):
+                results = []
+                for future in futures[start:start + batch_size]:
+                    try:
+                        results.append(future.result())
+                    except (OSError, ValueError, ImportError) as error:
+                        # unreadable file (or Parquet without pyarrow) is retried on next run
+                        print(f"[datasets] skipped file: {error!r}")
+                updated += _store(session, results)
+                session.commit()
+                scanned += len(results)
+                elapsed = time.perf_counter() - started
+                print(f"[datasets] {scanned}/{len(pending)} files scanned, {updated} datasets updated, {elapsed:.1f}s")
+    return updated
@@ -0,0 +1,374 @@
+"""
+Database health snapshots: cache hit ratios, bloat estimates, dead tuples and autovacuum lag
+of eduhub tables, lock waits, connections per state, and top pg_stat_statements entries.
+
+Snapshots are stored in local SQLite file (outside of monitored database, so collecting them
+does not change what is measured), and diff() of two snapshots shows what changed in between,
+e.g. before and after seeding or migration. Counters of statistics views are cumulative,
+so diff reports their increase (counter reset by pg_stat_reset() is treated as start from zero).
+
+Bloat is rough estimate from pg_stats widths (expected pages of live tuples compared with actual pages),
+it needs fresh ANALYZE and ignores fillfactor, pgstattuple gives exact numbers when it is installed.
+"""
+import datetime
+import json
+import math
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, text
+
+from eduhub.common.database import Base
+
+TUPLE_OVERHEAD = 28  # heap tuple header with item pointer
+INDEX_TUPLE_OVERHEAD = 12  # index tuple header with item pointer
+PAGE_OVERHEAD = 24
+BTREE_FILLFACTOR = 0.9
+
+DATABASE_STATEMENT = text(
+    """
+    SELECT
+        current_database() AS name, numbackends, xact_commit, xact_rollback, blks_read, blks_hit,
+        tup_returned, tup_fetched, tup_inserted, tup_updated, tup_deleted, temp_files, temp_bytes, deadlocks,
+        pg_database_size(datname) AS bytes, stats_reset, current_setting('block_size')::integer AS block_size
+    FROM pg_stat_database
+    WHERE datname = current_database()
+    """
+)
+
+TABLES_STATEMENT = text(
+    """
+    SELECT
+        stat.relname AS name, stat.n_live_tup, stat.n_dead_tup, stat.n_mod_since_analyze,
+        stat.seq_scan, coalesce(stat.idx_scan, 0) AS idx_scan,
+        stat.n_tup_ins, stat.n_tup_upd, stat.n_tup_del, stat.n_tup_hot_upd,
+        stat.vacuum_count, stat.autovacuum_count, stat.analyze_count, stat.autoanalyze_count,
+        extract(epoch FROM now() - greatest(stat.last_vacuum, stat.last_autovacuum))::float8 AS seconds_since_vacuum,
+        extract(epoch FROM now() - greatest(stat.last_analyze, stat.last_autoanalyze))::float8 AS seconds_since_analyze,
+        current_setting('autovacuum_vacuum_threshold')::float8
+            + current_setting('autovacuum_vacuum_scale_factor')::float8 * greatest(class.reltuples, 0) AS vacuum_threshold,
+        io.heap_blks_read, io.heap_blks_hit,
+        pg_table_size(stat.relid) AS table_bytes, pg_indexes_size(stat.relid) AS index_bytes,
+        class.relpages, greatest(class.reltuples, 0)::float8 AS reltuples, width.width
+    FROM pg_stat_user_tables AS stat
+    JOIN pg_statio_user_tables AS io ON io.relid = stat.relid
+    JOIN pg_class AS class ON class.oid = stat.relid
+    LEFT JOIN (
+        SELECT tablename, sum(avg_width)::float8 AS width FROM pg_stats WHERE schemaname = 'public' GROUP BY tablename
+    ) AS width ON width.tablename = stat.relname
+    WHERE stat.schemaname = 'public' AND stat.relname = ANY(:tables)
+    """
+)
+
+INDEXES_STATEMENT = text(
+    """
+    SELECT
+        stat.indexrelname AS name, stat.relname AS table_name, stat.idx_scan, stat.idx_tup_read,
+        io.idx_blks_read, io.idx_blks_hit, pg_relation_size(stat.indexrelid) AS bytes,
+        class.relpages, greatest(class.reltuples, 0)::float8 AS reltuples, method.amname AS method,
+        (
+            SELECT sum(column_stats.avg_width)::float8
+            FROM pg_attribute AS attribute
+            JOIN pg_stats AS column_stats ON column_stats.schemaname = 'public'
+                AND column_stats.tablename = stat.relname AND column_stats.attname = attribute.attname
+            WHERE attribute.attrelid = stat.relid AND attribute.attnum = ANY(definition.indkey)
+        ) AS width
+    FROM pg_stat_user_indexes AS stat
+    JOIN pg_statio_user_indexes AS io ON io.indexrelid = stat.indexrelid
+    JOIN pg_class AS class ON class.oid = stat.indexrelid
+    JOIN pg_am AS method ON method.oid = class.relam
+    JOIN pg_index AS definition ON definition.indexrelid = stat.indexrelid
+    WHERE stat.schemaname = 'public' AND stat.relname = ANY(:tables)
+    """
+)
+
+CONNECTIONS_STATEMENT = text(
+    """
+    SELECT coalesce(state, backend_type) AS state, count(*) AS amount
+    FROM pg_stat_activity
+    WHERE datname = current_database()
+    GROUP BY 1
+    """
+)
+
+ACTIVITY_STATEMENT = text(
+    """
+    SELECT
+        current_setting('max_connections')::integer AS max_connections,
+        (SELECT count(*) FROM pg_stat_activity) AS connections,
+        coalesce(extract(epoch FROM max(now() - xact_start)), 0)::float8 AS oldest_transaction_seconds,
+        count(*) FILTER (WHERE cardinality(pg_blocking_pids(pid)) > 0) AS blocked
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND pid <> pg_backend_pid()
+    """
+)
+
+LOCKS_STATEMENT = text(
+    """
+    SELECT
+        waiting_lock.locktype, waiting_lock.mode, count(*) AS waiting,
+        coalesce(extract(epoch FROM max(now() - activity.state_change)), 0)::float8 AS longest_wait_seconds
+    FROM pg_locks AS waiting_lock
+    JOIN pg_stat_activity AS activity ON activity.pid = waiting_lock.pid
+    WHERE NOT waiting_lock.granted
+    GROUP BY waiting_lock.locktype, waiting_lock.mode
+    ORDER BY waiting DESC
+    """
+)
+
+STATEMENTS_STATEMENT = text(
+    """
+    SELECT
+        queryid::text AS queryid, calls, total_exec_time, rows, shared_blks_hit, shared_blks_read,
+        left(regexp_replace(query, '\\s+', ' ', 'g'), 200) AS query
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) AND queryid IS NOT NULL
+    ORDER BY total_exec_time DESC
+    LIMIT :limit
+    """
+)
+
+DATABASE_COUNTERS = (
+    "xact_commit", "xact_rollback", "blks_read", "blks_hit", "tup_returned", "tup_fetched",
+    "tup_inserted", "tup_updated", "tup_deleted", "temp_files", "temp_bytes", "deadlocks",
+)
+TABLE_COUNTERS = (
+    "seq_scan", "idx_scan", "n_tup_ins", "n_tup_upd", "n_tup_del", "n_tup_hot_upd",
+    "vacuum_count", "autovacuum_count", "analyze_count", "autoanalyze_count", "heap_blks_read", "heap_blks_hit",
+)
+TABLE_GAUGES = ("n_live_tup", "n_dead_tup", "table_bytes", "index_bytes", "bloat_ratio", "autovacuum_lag")
+INDEX_COUNTERS = ("idx_scan", "idx_tup_read", "idx_blks_read", "idx_blks_hit")
+INDEX_GAUGES = ("bytes", "bloat_ratio")
+STATEMENT_COUNTERS = ("calls", "total_exec_time", "rows", "shared_blks_hit", "shared_blks_read")
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def _hit_ratio(hit: int | None, read: int | None) -> float | None:
+    total = (hit or 0) + (read or 0)
+    return (hit or 0) / total if total else None
+
+
+def _bloat_ratio(pages: int, tuples: float, width: float | None, tuple_overhead: int, page_bytes: float) -> float | None:
+    """Share of pages that would not be needed for live tuples (None without statistics)"""
+    if width is None or not pages:
+        return None
+    expected = math.ceil(tuples * (width + tuple_overhead) / page_bytes)
+    return max(0.0, 1 - expected / pages)
+
+
+def has_pg_stat_statements(connection: Connection) -> bool:
+    return connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements')")
+    ).scalar_one()
+
+
+def collect(connection: Connection, top_statements: int = 20) -> dict[str, Any]:
+    """Snapshot of health metrics of database (JSON-serializable)"""
+    # statistics are collected for public schema only (archive.booking would shadow booking)
+    parameters = {"tables": [table.name for table in Base.metadata.sorted_tables if table.schema is None]}
+    database = {key: _json_value(value) for key, value in connection.execute(DATABASE_STATEMENT).one()._asdict().items()}
+    database["cache_hit_ratio"] = _hit_ratio(database["blks_hit"], database["blks_read"])
+    block_size = database["block_size"]
+
+    tables = {}
+    for row in connection.execute(TABLES_STATEMENT, parameters):
+        table = row._asdict()
+        name = table.pop("name")
+        table["cache_hit_ratio"] = _hit_ratio(table["heap_blks_hit"], table["heap_blks_read"])
+        table["dead_ratio"] = table["n_dead_tup"] / max(table["n_live_tup"] + table["n_dead_tup"], 1)
+        # above 1 autovacuum is due (per-table storage parameters are not taken into account)
+        table["autovacuum_lag"] = table["n_dead_tup"] / max(table["vacuum_threshold"], 1)
+        table["bloat_ratio"] = _bloat_ratio(
+            table["relpages"], table["reltuples"], table.pop("width"), TUPLE_OVERHEAD, block_size - PAGE_OVERHEAD
+        )
+        tables[name] = table
+
+    indexes = {}
+    for row in connection.execute(INDEXES_STATEMENT, parameters):
+        index = row._asdict()
+        name = index.pop("name")
+        width = index.pop("width")
+        index["cache_hit_ratio"] = _hit_ratio(index["idx_blks_hit"], index["idx_blks_read"])
+        index["bloat_ratio"] = (
+            _bloat_ratio(index["relpages"], index["reltuples"], width, INDEX_TUPLE_OVERHEAD, block_size * BTREE_FILLFACTOR - PAGE_OVERHEAD)
+            if index["method"] == "btree"
+            else None
+        )
+        indexes[name] = index
+
+    statements = {}
+    if has_pg_stat_statements(connection):
+        statements = {
+            row.queryid: {key: value for key, value in row._asdict().items() if key != "queryid"}
+            for row in connection.execute(STATEMENTS_STATEMENT, {"limit": top_statements})
+        }
+
+    return {
+        "taken_at": datetime.datetime.now(tz=datetime.UTC).isoformat(),
+        "database": database,
+        "tables": tables,
+        "indexes": indexes,
+        "connections": {row.state: row.amount for row in connection.execute(CONNECTIONS_STATEMENT)},
+        "activity": connection.execute(ACTIVITY_STATEMENT).one()._asdict(),
+        "locks": [row._asdict() for row in connection.execute(LOCKS_STATEMENT)],
+        "statements": statements,
+    }
+
+
+class HealthStore:
+    """Local history of snapshots (SQLite file)"""
+
+    def __init__(self, path: str | Path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot ("
+            "id INTEGER PRIMARY KEY, taken_at TEXT NOT NULL, database TEXT NOT NULL, label TEXT, data TEXT NOT NULL)"
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def save(self, snapshot: dict[str, Any], label: str | None = None) -> int:
+        cursor = self.connection.execute(
+            "INSERT INTO snapshot (taken_at, database, label, data) VALUES (?, ?, ?, ?)",
+            (snapshot["taken_at"], snapshot["database"]["name"], label, json.dumps(snapshot)),
+        )
+        self.connection.commit()
+        return cursor.lastrowid
+
+    def load(self, snapshot_id: int) -> dict[str, Any]:
+        row = self.connection.execute("SELECT data FROM snapshot WHERE id = ?", (snapshot_id,)).fetchone()
+        if row is None:
+            raise LookupError(f"snapshot {snapshot_id} does not exist")
+        return json.loads(row[0])
+
+    def listing(self, limit: int = 20) -> list[tuple[int, str, str, str | None]]:
+        """(id, taken_at, database, label) of latest snapshots, newest first"""
+        return self.connection.execute(
+            "SELECT id, taken_at, database, label FROM snapshot ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    def latest_ids(self, amount: int) -> list[int]:
+        return [row[0] for row in reversed(self.listing(amount))]
+
+
+def _increase(before: float | None, after: float | None) -> float:
+    before, after = before or 0, after or 0
+    # counters start from zero again after pg_stat_reset()
+    return after - before if after >= before else after
+
+
+def _section_diff(before: dict, after: dict, counters: tuple[str, ...], gauges: tuple[str, ...]) -> dict[str, dict]:
+    changes = {}
+    for name, current in after.items():
+        previous = before.get(name, {})
+        change = {counter: _increase(previous.get(counter), current.get(counter)) for counter in counters}
+        change.update({gauge: (previous.get(gauge), current.get(gauge)) for gauge in gauges})
+        if any(change[counter] for counter in counters) or any(a != b for a, b in (change[gauge] for gauge in gauges)):
+            changes[name] = change
+    return changes
+
+
+def diff(before: dict[str, Any], after: dict[str, Any]) -> dict[str, Any]:
+    """Increase of counters and before/after of gauges between two snapshots (after is later one)"""
+    database = {counter: _increase(before["database"][counter], after["database"][counter]) for counter in DATABASE_COUNTERS}
+    database["cache_hit_ratio"] = _hit_ratio(database["blks_hit"], database["blks_read"])
+    database["bytes"] = (before["database"]["bytes"], after["database"]["bytes"])
+
+    tables = _section_diff(before["tables"], after["tables"], TABLE_COUNTERS, TABLE_GAUGES)
+    for change in tables.values():
+        change["cache_hit_ratio"] = _hit_ratio(change["heap_blks_hit"], change["heap_blks_read"])
+
+    statements = _section_diff(before["statements"], after["statements"], STATEMENT_COUNTERS, ())
+    for queryid, change in statements.items():
+        change["query"] = after["statements"][queryid]["query"]
+        change["mean_exec_time"] = change["total_exec_time"] / change["calls"] if change["calls"] else 0.0
+        # only top statements are kept, so statement missing from earlier snapshot counts its whole total
+        change["new"] = queryid not in before["statements"]
+
+    states = set(before["connections"]) | set(after["connections"])
+    return {
+        "interval_seconds": (
+            datetime.datetime.fromisoformat(after["taken_at"]) - datetime.datetime.fromisoformat(before["taken_at"])
+        ).total_seconds(),
+        "database": database,
+        "tables": tables,
+        "indexes": _section_diff(before["indexes"], after["indexes"], INDEX_COUNTERS, INDEX_GAUGES),
+        "connections": {state: (before["connections"].get(state, 0), after["connections"].get(state, 0)) for state in sorted(states)},
+        "activity": {key: (before["activity"].get(key), value) for key, value in after["activity"].items()},
+        "locks": after["locks"],
+        "statements": dict(sorted(statements.items(), key=lambda item: item[1]["total_exec_time"], reverse=True)),
+    }
+
+
+def _ratio(value: float | None) -> str:
+    return "-" if value is None else f"{value:.1%}"
+
+
+def _bytes(value: float | None) -> str:
+    value = value or 0
+    for unit in ("B", "kB", "MB", "GB"):
+        if abs(value) < 1024:
+            return f"{value:.0f}{unit}"
+        value /= 1024
+    return f"{value:.1f}TB"
+
+
+def report(change: dict[str, Any], limit: int = 10) -> list[str]:
+    """Human-readable lines of diff()"""
+    database = change["database"]
+    lines = [
+        f"Interval: {change['interval_seconds']:.0f}s",
+        f"Database: {database['xact_commit']} commits, {database['xact_rollback']} rollbacks, "
+        f"{database['deadlocks']} deadlocks, {database['temp_files']} temp files ({_bytes(database['temp_bytes'])}), "
+        f"cache hit {_ratio(database['cache_hit_ratio'])}, size {_bytes(database['bytes'][0])} -> {_bytes(database['bytes'][1])}",
+        f"  rows: {database['tup_inserted']} inserted, {database['tup_updated']} updated, "
+        f"{database['tup_deleted']} deleted, {database['tup_fetched']} fetched",
+        "Connections: " + ", ".join(f"{state} {a} -> {b}" for state, (a, b) in change["connections"].items()),
+        "Activity: " + ", ".join(f"{key} {a} -> {b}" for key, (a, b) in change["activity"].items()),
+    ]
+    if change["locks"]:
+        lines.append("Lock waits: " + ", ".join(
+            f"{lock['locktype']}/{lock['mode']} {lock['waiting']} (longest {lock['longest_wait_seconds']:.1f}s)"
+            for lock in change["locks"]
+        ))
+
+    tables = sorted(
+        change["tables"].items(),
+        key=lambda item: item[1]["n_tup_ins"] + item[1]["n_tup_upd"] + item[1]["n_tup_del"] + item[1]["seq_scan"],
+        reverse=True,
+    )
+    lines.append(f"\n{'table':<28}{'ins':>9}{'upd':>9}{'del':>9}{'seq':>7}{'idx':>9}{'dead tuples':>20}{'size':>20}{'bloat':>16}{'av lag':>14}{'hit':>8}")
+    for name, table in tables[:limit]:
+        dead, size, bloat, lag = (table[gauge] for gauge in ("n_dead_tup", "table_bytes", "bloat_ratio", "autovacuum_lag"))
+        lines.append(
+            f"{name:<28}{table['n_tup_ins']:>9}{table['n_tup_upd']:>9}{table['n_tup_del']:>9}{table['seq_scan']:>7}{table['idx_scan']:>9}"
+            f"{f'{dead[0]} -> {dead[1]}':>20}{f'{_bytes(size[0])} -> {_bytes(size[1])}':>20}"
+            f"{f'{_ratio(bloat[0])} -> {_ratio(bloat[1])}':>16}{f'{(lag[0] or 0):.2f} -> {(lag[1] or 0):.2f}':>14}"
+            f"{_ratio(table['cache_hit_ratio']):>8}"
+        )
+
+    indexes = sorted(change["indexes"].items(), key=lambda item: abs((item[1]["bytes"][1] or 0) - (item[1]["bytes"][0] or 0)), reverse=True)
+    lines.append(f"\n{'index':<56}{'scans':>9}{'size':>20}{'bloat':>16}")
+    for name, index in indexes[:limit]:
+        size, bloat = index["bytes"], index["bloat_ratio"]
+        lines.append(
+            f"{name:<56}{index['idx_scan']:>9}{f'{_bytes(size[0])} -> {_bytes(size[1])}':>20}"
+            f"{f'{_ratio(bloat[0])} -> {_ratio(bloat[1])}':>16}"
+        )
+
+    if change["statements"]:
+        lines.append(f"\n{'calls':>9}{'total ms':>12}{'mean ms':>10}  statement")
+        for statement in list(change["statements"].values())[:limit]:
+            marker = "* " if statement["new"] else "  "
+            lines.append(
+                f"{statement['calls']:>9}{statement['total_exec_time']:>12.1f}{statement['mean_exec_time']:>10.3f}{marker}{statement['query'][:100]}"
+            )
+    return lines
@@ -0,0 +1,209 @@
+"""
+As-of (point in time) reads of bookings from structured booking history.
+
+Every change of booking is written into booking_history as {"column": [old, new]} by mapper events
+(eduhub.models), and take_snapshots() periodically stores full rows into booking_snapshot after
+min_changes changes of booking. State of booking as of time T is its latest snapshot not after T
+with replay of changes between that snapshot and T, so point-in-time read touches at most
+min_changes history rows per booking (both lookups use (booking_id, changed_at) indexes).
+
+History rows written before structured history (without operation) cannot be replayed,
+so migration stores baseline snapshot of every booking and as-of reads are exact from then on.
+Deletion is not recorded: bookings are soft-deleted (change of deleted_at), and rows are removed
+only by eduhub.purge and eduhub.archive together with their history.
+"""
+import datetime
+import time
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import DateTime, Enum, text
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import ChangeOperation
+from eduhub.models import Booking
+from eduhub.readmodels import read_model
+
+BookingRecord = read_model(Booking)
+
+LATEST_SNAPSHOT = """
+    SELECT DISTINCT ON (booking_id) booking_id, history_id, changed_at{data}
+    FROM booking_snapshot
+    WHERE booking_id = ANY(:booking_ids) AND changed_at <= :at
+    ORDER BY booking_id, changed_at DESC, history_id DESC
+"""
+
+SNAPSHOT_STATEMENT = text(LATEST_SNAPSHOT.format(data=", data"))
+
+# changes after latest snapshot (or all changes when snapshots are not used), oldest first
+DELTA_STATEMENT = """
+    WITH latest AS ({latest})
+    SELECT history.booking_id, history.operation, history.changes
+    FROM booking_history AS history
+    LEFT JOIN latest ON latest.booking_id = history.booking_id
+    WHERE history.booking_id = ANY(:booking_ids)
+        AND history.changed_at <= :at
+        AND history.operation IS NOT NULL
+        AND (latest.booking_id IS NULL OR (history.changed_at, history.id) > (latest.changed_at, latest.history_id))
+    ORDER BY history.booking_id, history.changed_at, history.id
+"""
+
+SNAPSHOT_DELTA_STATEMENT = text(DELTA_STATEMENT.format(latest=LATEST_SNAPSHOT.format(data="")))
+FULL_DELTA_STATEMENT = text(
+    DELTA_STATEMENT.format(latest="SELECT NULL::integer AS booking_id, NULL::integer AS history_id, NULL::timestamptz AS changed_at WHERE false")
+)
+
+# bookings that were attached to equipment at any time (moves are found with partial index on history)
+EQUIPMENT_CANDIDATES_STATEMENT = text(
+    """
+    SELECT id FROM booking WHERE equipment_id = ANY(:equipment_ids)
+    UNION
+    SELECT booking_id FROM booking_history
+    WHERE operation = 'UPDATE' AND changes ? 'equipment_id'
+        AND (
+            (changes -> 'equipment_id' ->> 0)::integer = ANY(:equipment_ids)
+            OR (changes -> 'equipment_id' ->> 1)::integer = ANY(:equipment_ids)
+        )
+    """
+)
+
+TAKE_SNAPSHOTS_STATEMENT = text(
+    """
+    WITH latest AS (
+        SELECT DISTINCT ON (booking_id) booking_id, history_id, changed_at
+        FROM booking_snapshot
+        ORDER BY booking_id, changed_at DESC, history_id DESC
+    ),
+    pending AS (
+        SELECT history.booking_id
+        FROM booking_history AS history
+        LEFT JOIN latest ON latest.booking_id = history.booking_id
+        WHERE history.operation IN ('INSERT', 'UPDATE')
+            AND (latest.booking_id IS NULL OR (history.changed_at, history.id) > (latest.changed_at, latest.history_id))
+        GROUP BY history.booking_id
+        HAVING count(*) >= :min_changes
+        ORDER BY history.booking_id
+        LIMIT :batch_size
+    ),
+    -- bookings with change in progress are skipped, so snapshot never precedes change that commits later
+    locked AS (
+        SELECT booking.* FROM booking WHERE id IN (SELECT booking_id FROM pending) FOR UPDATE SKIP LOCKED
+    )
+    INSERT INTO booking_snapshot (booking_id, history_id, changed_at, data)
+    SELECT locked.id, last.id, last.changed_at, to_jsonb(locked)
+    FROM locked
+    CROSS JOIN LATERAL (
+        SELECT id, changed_at FROM booking_history
+        WHERE booking_id = locked.id AND operation IS NOT NULL
+        ORDER BY changed_at DESC, id DESC
+        LIMIT 1
+    ) AS last
+    """
+)
+
+
+def _decode(column, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(column.type, Enum):
+        return column.type.enum_class[value]
+    if isinstance(column.type, DateTime):
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+
+def _record(state: dict[str, Any]):
+    columns = Booking.__table__.c
+    return BookingRecord(*(_decode(columns[name], state.get(name)) for name in BookingRecord._fields))
+
+
+def _replay(state: dict[str, Any] | None, deltas: Iterable[tuple[str, dict | None]]) -> dict[str, Any] | None:
+    for operation, changes in deltas:
+        if operation == ChangeOperation.INSERT.name:
+            state = {}
+        elif state is None:
+            # change of booking created before structured history and without baseline snapshot
+            continue
+        for column, (_, new) in changes.items():
+            state[column] = new
+    return state
+
+
+def bookings_as_of(
+    session: Session,
+    booking_ids: Sequence[int],
+    at: datetime.datetime,
+    use_snapshots: bool = True,
+) -> dict[int, Any]:
+    """
+    Bookings (BookingRecord) as they were at time at, bookings that did not exist yet
+    (or were purged together with their history) are missing, use_snapshots=False replays whole history (baseline)
+    """
+    parameters = {"booking_ids": list(booking_ids), "at": at}
+    states: dict[int, dict | None] = {}
+    if use_snapshots:
+        states = {row.booking_id: row.data for row in session.execute(SNAPSHOT_STATEMENT, parameters)}
+    deltas: dict[int, list] = {}
+    statement = SNAPSHOT_DELTA_STATEMENT if use_snapshots else FULL_DELTA_STATEMENT
+    for row in session.execute(statement, parameters):
+        deltas.setdefault(row.booking_id, []).append((row.operation, row.changes))
+
+    records = {}
+    for booking_id in dict.fromkeys(booking_ids):
+        state = _replay(states.get(booking_id), deltas.get(booking_id, ()))
+        if state is not None:
+            records[booking_id] = _record(state)
+    return records
+
+
+def booking_as_of(session: Session, booking_id: int, at: datetime.datetime, use_snapshots: bool = True):
+    """Booking as it was at time at (None when it did not exist)"""
+    return bookings_as_of(session, [booking_id], at, use_snapshots).get(booking_id)
+
+
+def equipment_bookings_as_of(
+    session: Session,
+    equipment_ids: Sequence[int],
+    at: datetime.datetime,
+    include_deleted: bool = False,
+    use_snapshots: bool = True,
+) -> list:
+    """Schedule of equipment as it was at time at (bookings attached to equipment at that time, by start)"""
+    candidates = session.execute(EQUIPMENT_CANDIDATES_STATEMENT, {"equipment_ids": list(equipment_ids)}).scalars().all()
+    wanted = set(equipment_ids)
+    records = [
+        record
+        for record in bookings_as_of(session, candidates, at, use_snapshots).values()
+        if record.equipment_id in wanted and (include_deleted or record.deleted_at is None or record.deleted_at > at)
+    ]
+    return sorted(records, key=lambda record: (record.start_ts, record.id))
+
+
+def laboratory_bookings_as_of(
+    session: Session,
+    laboratory_id: int,
+    at: datetime.datetime,
+    include_deleted: bool = False,
+    use_snapshots: bool = True,
+) -> list:
+    """Bookings of all equipment of laboratory as they were at time at"""
+    equipment_ids = session.execute(
+        text("SELECT id FROM equipment WHERE laboratory_id = :laboratory_id"), {"laboratory_id": laboratory_id}
+    ).scalars().all()
+    return equipment_bookings_as_of(session, equipment_ids, at, include_deleted, use_snapshots)
+
+
+def take_snapshots_batch(session: Session, min_changes: int = 50, batch_size: int = 1000) -> int:
+    """Snapshot up to batch_size bookings with at least min_changes changes since their last snapshot (caller commits)"""
+    return session.execute(TAKE_SNAPSHOTS_STATEMENT, {"min_changes": min_changes, "batch_size": batch_size}).rowcount
+
+
+def take_snapshots(session: Session, min_changes: int = 50, batch_size: int = 1000, pause: float = 0.0) -> int:
+    """Snapshot all bookings with long enough unsnapshotted history in short transactions"""
+    taken = 0
+    while amount := take_snapshots_batch(session, min_changes, batch_size):
+        session.commit()
+        taken += amount
+        print(f"[history] {taken} booking snapshots taken")
+        time.sleep(pause)
+    session.commit()
+    return taken
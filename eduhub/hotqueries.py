@@ -0,0 +1,177 @@
+"""
+Registry of hot lookups (booking by id, live equipment of laboratory, account by email).
+
+Statements are lambda statements: SQLAlchemy analyses lambda once per code object, and
+values captured by closure become bound parameters, so repeated calls neither rebuild
+select() nor compile SQL again (compiled form is taken from engine compile cache).
+Engine from create_hot_engine() passes prepare_threshold to psycopg, so after that many
+executions on connection the statement is prepared on server and Postgres stops parsing
+and planning it again (prepared statements live per connection, so they do not survive
+PgBouncer in transaction mode, where prepare_threshold=None disables them).
+
+Lookups run with include_deleted=True and filter tombstones inside lambda themselves, otherwise
+soft delete criteria (eduhub.common.mixins) would replace lambda statement by plain select()
+on every call.
+
+engine = create_hot_engine(config.postgres_url(), prepare_threshold=config.prepare_threshold())
+hot = HotQueries(engine)
+with Session(engine) as session:
+    booking = hot.booking_by_id(session, booking_id)
+for line in hot.report():
+    print(line)
+"""
+import collections
+import dataclasses
+import re
+import statistics
+import threading
+import time
+from typing import Any, Callable
+
+from sqlalchemy import Connection, Engine, create_engine, event, lambda_stmt, select, text
+from sqlalchemy.engine.default import DefaultDialect
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+from eduhub.models import Account, Booking, Equipment
+
+HOT_QUERY_OPTION = "hot_query"
+
+
+def _booking_by_id(booking_id: int) -> StatementLambdaElement:
+    return lambda_stmt(lambda: select(Booking).where(Booking.id == booking_id, Booking.deleted_at.is_(None)))
+
+
+def _equipment_by_laboratory(laboratory_id: int) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Equipment)
+        .where(Equipment.laboratory_id == laboratory_id, Equipment.deleted_at.is_(None))
+        .order_by(Equipment.id)
+    )
+
+
+def _account_by_email(email: str) -> StatementLambdaElement:
+    return lambda_stmt(lambda: select(Account).where(Account.email == email))
+
+
+HOT_QUERIES: dict[str, Callable[..., StatementLambdaElement]] = {
+    "booking_by_id": _booking_by_id,
+    "equipment_by_laboratory": _equipment_by_laboratory,
+    "account_by_email": _account_by_email,
+}
+
+PREPARED_STATEMENTS_STATEMENT = text(
+    """
+    SELECT statement, generic_plans, custom_plans
+    FROM pg_prepared_statements
+    WHERE NOT from_sql
+    """
+)
+
+
+def create_hot_engine(url: str, prepare_threshold: int | None = 5, query_cache_size: int = 500, **kwargs: Any) -> Engine:
+    """
+    Engine with psycopg server-side prepared statements after prepare_threshold executions
+    (0 prepares on first execution, None disables) and compile cache of query_cache_size statements
+    """
+    connect_args = {**kwargs.pop("connect_args", {}), "prepare_threshold": prepare_threshold}
+    return create_engine(url, query_cache_size=query_cache_size, connect_args=connect_args, **kwargs)
+
+
+@dataclasses.dataclass(slots=True)
+class HotQueryMetrics:
+    calls: int = 0
+    compile_hits: int = 0  # compiled form was found in engine compile cache
+    compile_misses: int = 0
+    latencies: collections.deque = dataclasses.field(default_factory=lambda: collections.deque(maxlen=10_000))
+
+    @property
+    def compile_hit_rate(self) -> float:
+        compiled = self.compile_hits + self.compile_misses
+        return self.compile_hits / compiled if compiled else 0.0
+
+    def latency(self, quantile: float) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[int(quantile * 100) - 1]
+
+
+def _server_sql(statement: str) -> str:
+    """SQL as psycopg sends it to server (named placeholders become $1, $2 in order of first use)"""
+    numbers: dict[str, int] = {}
+
+    def number(match: re.Match) -> str:
+        if match.group(0) == "%%":
+            return "%"
+        return f"${numbers.setdefault(match.group(1), len(numbers) + 1)}"
+
+    return re.sub(r"%%|%\((\w+)\)s", number, statement)
+
+
+def prepared_executions(connection: Connection) -> dict[str, int]:
+    """Executions of statements prepared on this connection (plans of both kinds), by SQL"""
+    return {
+        row.statement: row.generic_plans + row.custom_plans
+        for row in connection.execute(PREPARED_STATEMENTS_STATEMENT)
+    }
+
+
+class HotQueries:
+    """Executes registered hot lookups and records latency and compile cache hits per lookup"""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.metrics: dict[str, HotQueryMetrics] = collections.defaultdict(HotQueryMetrics)
+        self.statements: dict[str, str] = {}  # SQL sent to server per lookup, for matching prepared statements
+        self._lock = threading.Lock()
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _after_cursor_execute(self, connection, cursor, statement, parameters, context, executemany) -> None:
+        name = context.execution_options.get(HOT_QUERY_OPTION)
+        if name is None:
+            return
+        with self._lock:
+            self.statements[name] = _server_sql(statement)
+            if context.cache_hit == DefaultDialect.CACHE_HIT:
+                self.metrics[name].compile_hits += 1
+            elif context.cache_hit == DefaultDialect.CACHE_MISS:
+                self.metrics[name].compile_misses += 1
+
+    def execute(self, session: Session, name: str, **parameters: Any):
+        statement = HOT_QUERIES[name](**parameters)
+        started = time.perf_counter()
+        result = session.execute(statement, execution_options={HOT_QUERY_OPTION: name, "include_deleted": True})
+        rows = result.scalars().all()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            metrics = self.metrics[name]
+            metrics.calls += 1
+            metrics.latencies.append(elapsed)
+        return rows
+
+    def booking_by_id(self, session: Session, booking_id: int) -> Booking | None:
+        return next(iter(self.execute(session, "booking_by_id", booking_id=booking_id)), None)
+
+    def equipment_by_laboratory(self, session: Session, laboratory_id: int) -> list[Equipment]:
+        return self.execute(session, "equipment_by_laboratory", laboratory_id=laboratory_id)
+
+    def account_by_email(self, session: Session, email: str) -> Account | None:
+        return next(iter(self.execute(session, "account_by_email", email=email)), None)
+
+    def report(self, connection: Connection | None = None) -> list[str]:
+        """
+        Latency and compile cache hit rate per lookup, with connection also share of calls
+        executed as prepared statement on that connection (exact when pool has one connection)
+        """
+        prepared = prepared_executions(connection) if connection is not None else {}
+        lines = [f"{'hot query':<28}{'calls':>8}{'p50':>10}{'p95':>10}{'compile hit':>13}{'prepared':>10}"]
+        with self._lock:
+            items = sorted(self.metrics.items())
+        for name, metrics in items:
+            executions = prepared.get(self.statements.get(name), 0)
+            prepared_rate = f"{executions / metrics.calls:>10.1%}" if connection is not None and metrics.calls else f"{'-':>10}"
+            lines.append(
+                f"{name:<28}{metrics.calls:>8}{metrics.latency(0.5) * 1e6:>8.0f}us{metrics.latency(0.95) * 1e6:>8.0f}us"
+                f"{metrics.compile_hit_rate:>13.1%}{prepared_rate}"
+            )
+        return lines
@@ -0,0 +1,163 @@
+"""
+Bulk ingestion of mixed polymorphic resources (joined-table inheritance).
+
+ORM flush inserts resource row with RETURNING for every object before its subtype row can be written,
+and project_resource links one by one. Here ids for whole batch are allocated from resource sequence
+with one statement, so parent table, every subtype table, and project_resource are each written
+by one COPY (or one insertmanyvalues INSERT) per batch.
+
+Record is dict with "type" (polymorphic identity, e.g. "dataset"), attributes of model,
+and optional "project_ids", for example:
+
+{"type": "dataset", "title": "Air quality", "link": "https://...", "tags": ["air"], "project_ids": [1]}
+"""
+import enum
+import itertools
+import time
+import types
+from typing import Any, Iterable, Literal, Sequence
+
+from psycopg.types.json import Jsonb
+from sqlalchemy import Column, Connection, Enum, Table, insert, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from eduhub import recommendations, similarity
+from eduhub.models import Dataset, Resource, SoftwareRepository, project_resource
+
+Method = Literal["copy", "values"]
+
+SUBTYPES = {
+    mapper.polymorphic_identity: mapper.class_
+    for mapper in Resource.__mapper__.self_and_descendants
+    if mapper.class_ is not Resource
+}
+
+
+def _default(column: Column) -> Any:
+    if column.default is not None and column.default.is_scalar:
+        return column.default.arg
+    return None
+
+
+def _rows(table: Table, ids: Sequence[int], records: Sequence[dict]) -> dict[tuple[str, ...], list[dict]]:
+    """
+    Rows of table grouped by set of columns, where missing columns with server default are omitted
+    (same as ORM does), so every group is written with one statement
+    """
+    groups: dict[tuple[str, ...], list[dict]] = {}
+    for resource_id, record in zip(ids, records):
+        row = {"id": resource_id}
+        for column in table.columns:
+            if column.name == "id":
+                continue
+            if column.name in record:
+                row[column.name] = record[column.name]
+            elif column.server_default is None:
+                row[column.name] = _default(column)
+        groups.setdefault(tuple(row), []).append(row)
+    return groups
+
+
+def _copy_value(column: Column, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(column.type, Enum):
+        # enum columns store names of members
+        return (value if isinstance(value, enum.Enum) else column.type.enum_class(value)).name
+    if isinstance(column.type, JSONB):
+        return Jsonb(value)
+    return value
+
+
+def _write(connection: Connection, table: Table, rows: list[dict], method: Method) -> None:
+    if not rows:
+        return
+    if method == "values":
+        # executemany of Core insert is sent as multi-row INSERT ... VALUES (insertmanyvalues)
+        connection.execute(insert(table), rows)
+        return
+    names = list(rows[0])
+    columns = [table.c[name] for name in names]
+    cursor = connection.connection.driver_connection.cursor()
+    with cursor.copy(f"COPY {table.fullname} ({', '.join(names)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row([_copy_value(column, row[column.name]) for column in columns])
+
+
+def allocate_ids(connection: Connection, amount: int) -> list[int]:
+    """Reserve amount of ids from resource sequence with one statement"""
+    return connection.execute(
+        text("SELECT nextval(pg_get_serial_sequence('resource', 'id')) FROM generate_series(1, :amount)"),
+        {"amount": amount},
+    ).scalars().all()
+
+
+def ingest_batch(session: Session, records: Sequence[dict], method: Method = "copy", index: bool = True) -> list[int]:
+    """Insert one batch of mixed resources with links to projects and return their ids in same order"""
+    unknown = {record.get("type") for record in records} - set(SUBTYPES)
+    if unknown:
+        raise ValueError(f"unknown resource types {sorted(map(str, unknown))}, expected one of {sorted(SUBTYPES)}")
+    connection = session.connection()
+    ids = allocate_ids(connection, len(records))
+
+    for rows in _rows(Resource.__table__, ids, records).values():
+        _write(connection, Resource.__table__, rows, method)
+    positions = sorted(range(len(records)), key=lambda position: records[position]["type"])
+    for identity, group in itertools.groupby(positions, key=lambda position: records[position]["type"]):
+        group = list(group)
+        table = SUBTYPES[identity].__table__
+        for rows in _rows(table, [ids[position] for position in group], [records[position] for position in group]).values():
+            _write(connection, table, rows, method)
+
+    links = [
+        {"project_id": project_id, "resource_id": resource_id}
+        for resource_id, record in zip(ids, records)
+        for project_id in dict.fromkeys(record.get("project_ids") or [])
+    ]
+    _write(connection, project_resource, links, method)
+
+    if index:
+        _index(session, ids, records)
+    return ids
+
+
+def _index(session: Session, ids: Sequence[int], records: Sequence[dict]) -> None:
+    """Same side effects as flush listeners of ORM path (similarity index and recommendation changes)"""
+    similar_types = {model.__mapper__.polymorphic_identity for model in (SoftwareRepository, Dataset)}
+    similarity.index_resources(
+        session,
+        [
+            types.SimpleNamespace(**{"description": None, "license": None, **record, "id": resource_id})
+            for resource_id, record in zip(ids, records)
+            if record["type"] in similar_types
+        ],
+    )
+    recommendations.add_pending(
+        session.connection(),
+        project_ids=[
+            project_id
+            for record in records
+            if record["type"] in {"publication", "dataset"}
+            for project_id in record.get("project_ids") or []
+        ],
+    )
+
+
+def ingest(
+    session: Session,
+    records: Iterable[dict],
+    batch_size: int = 10_000,
+    method: Method = "copy",
+    index: bool = True,
+) -> list[int]:
+    """Ingest resources in batches (each batch is committed), returns ids of inserted resources"""
+    ids = []
+    started = time.perf_counter()
+    iterator = iter(records)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        ids.extend(ingest_batch(session, batch, method, index))
+        session.commit()
+        elapsed = time.perf_counter() - started
+        print(f"[ingestion] {len(ids)} resources, {len(ids) / elapsed:.0f} resources/s")
+    return ids
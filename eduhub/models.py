@@ -1,22 +1,27 @@
 from typing import Any
 import datetime
+import enum
 
 from sqlalchemy.dialects.postgresql.json import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship, Session
 from sqlalchemy import (
     CheckConstraint, 
     UniqueConstraint,
+    Index,
     ForeignKey,
     Table,
     Column,
     ARRAY,
+    BigInteger,
     String,
     DateTime,
     event,
     inspect,
+    text,
 )
 
 from eduhub.common.database import Base
+from eduhub.common.mixins import SoftDeleteMixin
 from eduhub.common.types import (
     AccountRole, 
     PartnerType,
@@ -26,8 +31,44 @@ from eduhub.common.types import (
     EquipmentStatus,
     BookingStatus,
     ReportStatus,
+    BucketSize,
+    UtilizationDimension,
+    ChangeOperation,
+    OrganizationUnitKind,
 )
 
+class OrganizationUnit(Base):
+    """
+    University and its faculties, departments, and other units above laboratory (tree by parent_id),
+    all ancestor-descendant pairs are kept in organization_closure (see eduhub.organization)
+    """
+
+    __tablename__ = "organization_unit"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    title: Mapped[str]
+    kind: Mapped[OrganizationUnitKind]
+    parent_id: Mapped[int | None] = mapped_column(ForeignKey("organization_unit.id"), index=True)
+
+    parent: Mapped["OrganizationUnit | None"] = relationship(back_populates="children", remote_side=[id])
+    children: Mapped[list["OrganizationUnit"]] = relationship(back_populates="parent")
+    laboratories: Mapped[list["Laboratory"]] = relationship(back_populates="organization_unit")
+
+
+class OrganizationClosure(Base):
+    """Closure table of organization tree (every unit is also its own ancestor with depth 0)"""
+
+    __tablename__ = "organization_closure"
+
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("organization_unit.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("organization_unit.id", ondelete="CASCADE"), primary_key=True)
+    depth: Mapped[int]
+
+    __table_args__ = (
+        Index("ix_organization_closure_descendant_id_depth", "descendant_id", "depth"),
+    )
+
+
 class Laboratory(Base):
     """Scientific-research laboratory, center, or organization ("НИИ" in russian)"""
 
@@ -42,6 +83,23 @@ class Laboratory(Base):
     rooms: Mapped[list["Room"]] = relationship(back_populates="laboratory")
     accounts: Mapped[list["Account"]] = relationship(back_populates="laboratory")
 
+    # laboratory belongs to one unit of university (or to none, e.g., independent research center)
+    organization_unit_id: Mapped[int | None] = mapped_column(ForeignKey("organization_unit.id"), index=True)
+    organization_unit: Mapped["OrganizationUnit | None"] = relationship(back_populates="laboratories")
+
+
+class LaboratoryShard(Base):
+    """
+    Directory of laboratory shards (kept in directory database): laboratory ids are allocated here,
+    so they are unique across shard databases (see eduhub.sharding)
+    """
+
+    __tablename__ = "laboratory_shard"
+
+    laboratory_id: Mapped[int] = mapped_column(primary_key=True)
+    shard: Mapped[int] = mapped_column(index=True, comment="Position of database in POSTGRES_SHARDS")
+    assigned_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+
 
 project_resource = Table(
     "project_resource",
@@ -84,7 +142,7 @@ class Partner(Base):
     projects: Mapped[list["Project"]] = relationship(secondary=project_partner, back_populates="partners")
 
 
-class Project(Base):
+class Project(SoftDeleteMixin, Base):
     """Research and development project ("НИОКР" in russian)"""
 
     __tablename__ = "project"
@@ -102,8 +160,18 @@ class Project(Base):
     partners: Mapped[list["Partner"]] = relationship(secondary=project_partner, back_populates="projects")
     participants: Mapped[list["Account"]] = relationship(secondary=project_participant, back_populates="projects")
 
+    __purge_cascade__ = ("project_resource", "project_partner", "project_participant")
+    __table_args__ = (
+        # titles are unique within laboratory among live projects only, so title of deleted one can be reused
+        Index(
+            "uq_project_live_laboratory_id_title", "laboratory_id", "title",
+            unique=True, postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index("ix_project_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
+
 
-class Equipment(Base):
+class Equipment(SoftDeleteMixin, Base):
     """
     Inventory that is available to specific laboratory
     (e.g., physical devices, software licenses, subscriptions, etc.)
@@ -116,6 +184,9 @@ class Equipment(Base):
     description: Mapped[str | None]
     media_link: Mapped[str | None] = mapped_column(comment="video, image, audio, or other mimetype")
     approval_requirements: Mapped[dict[str, Any] | None] = mapped_column(JSONB)
+    view_count: Mapped[int] = mapped_column(
+        BigInteger, server_default="0", comment="page views, written behind by eduhub.counters"
+    )
 
     # laboratory has some equipment and doesn't share it between someone else (laboratory one-to-many equipment)
     laboratory_id: Mapped[int] = mapped_column(ForeignKey("laboratory.id"))
@@ -125,6 +196,11 @@ class Equipment(Base):
     equipment_type_id: Mapped[int | None] = mapped_column(ForeignKey("equipment_type.id"))
     # equipment_type: Mapped["EquipmentType"] = relationship(back_populates="")
 
+    __table_args__ = (
+        Index("ix_equipment_live_laboratory_id", "laboratory_id", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_equipment_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
+
 
 class EquipmentType(Base):
     """
@@ -138,6 +214,7 @@ class EquipmentType(Base):
     title: Mapped[str]
     description: Mapped[str | None]
     characteristics: Mapped[dict[str, Any] | None] = mapped_column(JSONB, comment="similar to SKU (e.g., brand, model, weight depending on the context)")
+    approval_requirements: Mapped[dict[str, Any] | None] = mapped_column(JSONB, comment="default approval rules for equipment of this type (overridden by equipment)")
 
 
 class Room(Base):
@@ -152,8 +229,11 @@ class Room(Base):
     laboratory_id: Mapped[int] = mapped_column(ForeignKey("laboratory.id"))
     laboratory: Mapped["Laboratory"] = relationship(back_populates="rooms")
 
+    # room can also be attached directly to any unit of university (e.g., auditorium of faculty)
+    organization_unit_id: Mapped[int | None] = mapped_column(ForeignKey("organization_unit.id"), index=True)
 
-class Resource(Base):
+
+class Resource(SoftDeleteMixin, Base):
     """
     Metadata of publication, scientific materials, or works that are developed
     within laboratory (e.g., videos, reports, article, papers, etc.)
@@ -168,9 +248,16 @@ class Resource(Base):
     description: Mapped[str | None]
     link: Mapped[str]
     type: Mapped[str]
+    view_count: Mapped[int] = mapped_column(BigInteger, server_default="0", comment="written behind by eduhub.counters")
+    download_count: Mapped[int] = mapped_column(BigInteger, server_default="0", comment="written behind by eduhub.counters")
 
     projects: Mapped[list["Project"]] = relationship(secondary=project_resource, back_populates="resources")
 
+    __purge_cascade__ = ("presentation", "report", "publication", "software_repository", "dataset", "project_resource")
+    __table_args__ = (
+        Index("ix_resource_live_type", "type", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_resource_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
     __mapper_args__ = {
         "polymorphic_identity": "resource",
         "polymorphic_on": "type",
@@ -254,12 +341,82 @@ class Dataset(Resource):
         comment="Fields/attributes names, description, with corresponding data types"
         # example: ["field_1": {"description": "something explained here", "type": "uint8"}, ...]
     )
+    columns_amount: Mapped[int | None] = mapped_column(comment="computed from file by eduhub.datasets")
+    rows_amount: Mapped[int | None] = mapped_column(BigInteger, comment="computed from file by eduhub.datasets")
 
     __mapper_args__ = {
         "polymorphic_identity": "dataset",
     }
 
 
+class DatasetFile(Base):
+    """Local file of dataset as of last metadata scan (unchanged files are skipped by size, mtime and hash)"""
+
+    __tablename__ = "dataset_file"
+
+    dataset_id: Mapped[int] = mapped_column(ForeignKey("dataset.id", ondelete="CASCADE"), primary_key=True)
+    path: Mapped[str]
+    size: Mapped[int] = mapped_column(BigInteger)
+    mtime_ns: Mapped[int] = mapped_column(BigInteger)
+    content_hash: Mapped[str] = mapped_column(comment="blake2b of file content")
+    format: Mapped[str] = mapped_column(comment="csv, jsonl, or parquet")
+    scanned_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+
+
+class ResourceMinhash(Base):
+    """MinHash signature of resource content (title, description, license, tags, attribute names)"""
+
+    __tablename__ = "resource_minhash"
+
+    resource_id: Mapped[int] = mapped_column(ForeignKey("resource.id", ondelete="CASCADE"), primary_key=True)
+    signature: Mapped[list[int]] = mapped_column(ARRAY(BigInteger, dimensions=1))
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+
+
+class ResourceLshBand(Base):
+    """
+    Locality-sensitive hashing buckets of MinHash signature (one row per band),
+    resources with same (band, band_hash) are candidates for similarity
+    """
+
+    __tablename__ = "resource_lsh_band"
+
+    band: Mapped[int] = mapped_column(primary_key=True)
+    band_hash: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    resource_id: Mapped[int] = mapped_column(ForeignKey("resource.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class ResourceSimilarity(Base):
+    """Precomputed top-k similar resources with estimated Jaccard similarity"""
+
+    __tablename__ = "resource_similarity"
+
+    resource_id: Mapped[int] = mapped_column(ForeignKey("resource.id", ondelete="CASCADE"), primary_key=True)
+    similar_id: Mapped[int] = mapped_column(ForeignKey("resource.id", ondelete="CASCADE"), primary_key=True)
+    score: Mapped[float]
+    computed_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+
+
+class FingerprintedDocument(Base):
+    """Text of resource (description, report comments, subtitles) that was processed by winnowing"""
+
+    __tablename__ = "fingerprinted_document"
+
+    resource_id: Mapped[int] = mapped_column(ForeignKey("resource.id", ondelete="CASCADE"), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(comment="md5 of text, unchanged documents are skipped")
+    fingerprint_count: Mapped[int]
+    fingerprinted_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+
+
+class ResourceFingerprint(Base):
+    """Winnowed k-gram hash of resource text (inverted index from fingerprint to resources)"""
+
+    __tablename__ = "resource_fingerprint"
+
+    fingerprint: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    resource_id: Mapped[int] = mapped_column(ForeignKey("resource.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
 class Account(Base):
     """Account of user in the system"""
 
@@ -274,6 +431,9 @@ class Account(Base):
     laboratory_id: Mapped[int] = mapped_column(ForeignKey("laboratory.id"))
     laboratory: Mapped["Laboratory"] = relationship(back_populates="accounts")
 
+    # unit of university where person studies or works, otherwise unit of laboratory is used
+    organization_unit_id: Mapped[int | None] = mapped_column(ForeignKey("organization_unit.id"), index=True)
+
     profile: Mapped["Profile"] = relationship(back_populates="account")
     projects: Mapped[list["Project"]] = relationship(secondary=project_participant, back_populates="participants")
 
@@ -298,7 +458,7 @@ class Profile(Base):
     )
 
 
-class Booking(Base):
+class Booking(SoftDeleteMixin, Base):
     __tablename__ = "booking"
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -316,8 +476,15 @@ class Booking(Base):
 
     booking_histories: Mapped[list["BookingHistory"]] = relationship(back_populates="booking")
 
+    __purge_cascade__ = ("booking_history", "booking_snapshot")
     __table_args__ = (
         CheckConstraint("end_ts > start_ts"),
+        Index("ix_booking_live_equipment_id_start_ts", "equipment_id", "start_ts", postgresql_where=text("deleted_at IS NULL")),
+        Index(
+            "ix_booking_live_active_requester_id", "requester_id",
+            postgresql_where=text("deleted_at IS NULL AND status IN ('REQUESTED', 'APPROVED')"),
+        ),
+        Index("ix_booking_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
     )
 
 
@@ -333,31 +500,279 @@ class BookingHistory(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     note: Mapped[str | None]
     changed_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+    operation: Mapped[ChangeOperation | None]
+    changes: Mapped[dict[str, Any] | None] = mapped_column(
+        JSONB, comment='Changed columns as {"column": [old, new]} (every column on insert), replayed by eduhub.history'
+    )
 
     booking_id: Mapped[int] = mapped_column(ForeignKey("booking.id"))
     booking: Mapped["Booking"] = relationship(back_populates="booking_histories")
 
+    __table_args__ = (
+        Index("ix_booking_history_booking_id_changed_at", "booking_id", "changed_at"),
+        # bookings moved between equipment (for schedules of equipment as of past time)
+        Index(
+            "ix_booking_history_equipment_moves", "booking_id",
+            postgresql_where=text("operation = 'UPDATE' AND changes ? 'equipment_id'"),
+        ),
+    )
 
-@event.listens_for(Booking, "after_insert")
-@event.listens_for(Booking, "after_update")
-@event.listens_for(Booking, "after_delete")
-def booking_history_event(mapper, connection, target: Booking):
-    session = Session.object_session(target)
-    if session is None:
+
+class BookingSnapshot(Base):
+    """
+    Full row of booking after history change history_id (periodic checkpoint taken by
+    eduhub.history.take_snapshots), so state as of any time is nearest snapshot plus few deltas
+    """
+
+    __tablename__ = "booking_snapshot"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    booking_id: Mapped[int] = mapped_column(ForeignKey("booking.id"))
+    history_id: Mapped[int] = mapped_column(comment="Last change included into snapshot (0 for baseline before structured history)")
+    changed_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), comment="changed_at of last included change")
+    data: Mapped[dict[str, Any]] = mapped_column(JSONB, comment="to_jsonb of booking row")
+
+    __table_args__ = (
+        Index("ix_booking_snapshot_booking_id_changed_at", "booking_id", "changed_at"),
+    )
+
+
+class BookingApproval(Base):
+    """
+    Step of multi-step approval (approval_steps of equipment requirements, see eduhub.approval),
+    booking stays requested until every step is signed by approver with at least role of step
+    """
+
+    __tablename__ = "booking_approval"
+
+    booking_id: Mapped[int] = mapped_column(ForeignKey("booking.id", ondelete="CASCADE"), primary_key=True)
+    step: Mapped[int] = mapped_column(primary_key=True, comment="Position in approval_steps, signed in order")
+    role: Mapped[AccountRole] = mapped_column(comment="Minimal role of approver of step")
+    approver_id: Mapped[int | None] = mapped_column(ForeignKey("account.id"), index=True, comment="NULL while step is pending")
+    approved_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+
+
+class ArchiveSegment(Base):
+    """Compressed file of archived bookings with their history and snapshots (written by eduhub.archive)"""
+
+    __tablename__ = "segment"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    path: Mapped[str] = mapped_column(comment="relative to archive directory")
+    format: Mapped[str] = mapped_column(comment="jsonl (zstd-compressed) or parquet (zstd codec)")
+    bookings: Mapped[int]
+    history_rows: Mapped[int]
+    raw_bytes: Mapped[int] = mapped_column(BigInteger, comment="size of uncompressed JSON lines")
+    stored_bytes: Mapped[int] = mapped_column(BigInteger)
+    sha256: Mapped[str]
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+
+    __table_args__ = {"schema": "archive"}
+
+
+class ArchivedBooking(Base):
+    """
+    Closed booking moved out of hot booking table (its history is in segment file), ids of
+    equipment and accounts are kept without foreign keys, archive does not block their changes
+    """
+
+    __tablename__ = "booking"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    equipment_id: Mapped[int]
+    requester_id: Mapped[int]
+    start_ts: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+    end_ts: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+    status: Mapped[BookingStatus]
+    approver_id: Mapped[int]
+    comment: Mapped[str | None]
+    deleted_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+    segment_id: Mapped[int] = mapped_column(ForeignKey("archive.segment.id"), index=True)
+    archived_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+
+    __table_args__ = (
+        Index("ix_archive_booking_equipment_id_start_ts", "equipment_id", "start_ts"),
+        {"schema": "archive"},
+    )
+
+
+class UtilizationRollup(Base):
+    """
+    Precomputed equipment utilization per time bucket (cache for dashboards),
+    refreshed by eduhub.analytics.refresh_rollup from booking table
+    """
+
+    __tablename__ = "utilization_rollup"
+
+    dimension: Mapped[UtilizationDimension] = mapped_column(primary_key=True)
+    key: Mapped[int] = mapped_column(primary_key=True, comment="id of equipment, equipment type (0 for untyped), or laboratory")
+    bucket_size: Mapped[BucketSize] = mapped_column(primary_key=True)
+    bucket_start: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    booking_count: Mapped[int]
+    occupied_seconds: Mapped[float] = mapped_column(comment="Sum of booked seconds within bucket")
+    capacity_seconds: Mapped[float] = mapped_column(comment="Amount of equipment multiplied by bucket length")
+    peak_concurrency: Mapped[int] = mapped_column(comment="Maximum amount of simultaneous bookings within bucket")
+    computed_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+
+
+class BookingQuota(Base):
+    """
+    Maximum amount of active (requested or approved) bookings per account,
+    configured either for role within the system or for laboratory (the lowest applicable limit wins)
+    """
+
+    __tablename__ = "booking_quota"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    role: Mapped[AccountRole | None]
+    laboratory_id: Mapped[int | None] = mapped_column(ForeignKey("laboratory.id", ondelete="CASCADE"))
+    max_active: Mapped[int]
+
+    __table_args__ = (
+        CheckConstraint("num_nonnulls(role, laboratory_id) = 1", name="role_or_laboratory"),
+        CheckConstraint("max_active >= 0", name="max_active_non_negative"),
+        UniqueConstraint("role"),
+        UniqueConstraint("laboratory_id"),
+    )
+
+
+class AccountBookingUsage(Base):
+    """
+    Counter of active bookings per account maintained on status transitions of booking
+    (see eduhub.quota), so quota is checked with one row instead of counting bookings
+    """
+
+    __tablename__ = "account_booking_usage"
+
+    account_id: Mapped[int] = mapped_column(ForeignKey("account.id", ondelete="CASCADE"), primary_key=True)
+    active_count: Mapped[int] = mapped_column(default=0)
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        CheckConstraint("active_count >= 0", name="active_count_non_negative"),
+    )
+
+
+class BookingOutbox(Base):
+    """
+    Transactional outbox of booking changes, each row is written within transaction of change
+    and announced with NOTIFY on commit (read by eduhub.changefeed consumers)
+    """
+
+    __tablename__ = "booking_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    transaction_id: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        comment="Writing transaction, consumers read only rows of finished transactions in (transaction_id, id) order",
+    )
+    booking_id: Mapped[int] = mapped_column(comment="Without foreign key, so deletions stay in feed")
+    operation: Mapped[ChangeOperation]
+    status: Mapped[BookingStatus]
+    changed_columns: Mapped[list[str]] = mapped_column(ARRAY(String, dimensions=1))
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), server_default=text("clock_timestamp()"))
+
+    __table_args__ = (
+        Index("ix_booking_outbox_transaction_id_id", "transaction_id", "id"),
+    )
+
+
+class ChangeFeedOffset(Base):
+    """Last processed position of named change feed consumer (to resume after restart)"""
+
+    __tablename__ = "change_feed_offset"
+
+    consumer: Mapped[str] = mapped_column(primary_key=True)
+    transaction_id: Mapped[int] = mapped_column(BigInteger)
+    outbox_id: Mapped[int] = mapped_column(BigInteger)
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+
+
+class RecommendationChange(Base):
+    """
+    Account or project whose row of recommendation index is outdated, written within transaction
+    of change and taken by next index update (see eduhub.recommendations)
+    """
+
+    __tablename__ = "recommendation_change"
+
+    kind: Mapped[str] = mapped_column(primary_key=True, comment="account or project")
+    entity_id: Mapped[int] = mapped_column(primary_key=True)
+
+
+class TableChange(Base):
+    """
+    Append-only log of write statements per table (statement-level triggers), sum of changes is
+    watermark of table that grows with every committed write, whatever order transactions commit in
+    (eduhub.reporting compacts rows of table into one row with sum, on build and by
+    eduhub.scripts.compact_table_changes between builds)
+    """
+
+    __tablename__ = "table_change"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    table_name: Mapped[str] = mapped_column(index=True)
+    changes: Mapped[int] = mapped_column(BigInteger, server_default="1")
+
+
+class TombstoneArchive(Base):
+    """Archived copies of purged soft-deleted rows together with rows of their __purge_cascade__ tables"""
+
+    __tablename__ = "tombstone_archive"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    table_name: Mapped[str]
+    row_id: Mapped[int]
+    deleted_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+    data: Mapped[dict[str, Any]] = mapped_column(JSONB, comment='Row as JSON with {"dependents": {table: [rows]}}')
+
+    __table_args__ = (
+        Index("ix_tombstone_archive_table_name_row_id", "table_name", "row_id"),
+    )
+
+
+def _history_value(value: Any) -> Any:
+    """JSON value of column in booking history (same representation as to_jsonb of row)"""
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def _write_booking_history(mapper, connection, target: Booking, operation: ChangeOperation) -> None:
+    state = inspect(target)
+    changes = {}
+    for attr in mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if operation == ChangeOperation.INSERT or history.has_changes():
+            previous = history.deleted[0] if history.deleted else None
+            changes[attr.key] = [_history_value(previous), _history_value(getattr(target, attr.key))]
+    if operation == ChangeOperation.UPDATE and not changes:
         return
-    note = "Booking changed"
-    if mapper.dispatch.after_update:
-        state = inspect(target)
-        changed = [
-            attr.key
-            for attr in state.attrs
-            if attr.history.has_changes()
-        ]
-        if changed:
-            note = f"Updated fields: {', '.join(changed)}"
-    history = BookingHistory(
-        booking_id=target.id,
-        changed_at=datetime.datetime.now(tz=datetime.timezone.utc),
-        note=note,
+    notes = {
+        ChangeOperation.INSERT: "Booking created",
+        ChangeOperation.UPDATE: f"Updated fields: {', '.join(changes)}",
+    }
+    connection.execute(
+        BookingHistory.__table__.insert().values(
+            booking_id=target.id,
+            changed_at=datetime.datetime.now(tz=datetime.timezone.utc),
+            note=notes[operation],
+            operation=operation,
+            changes=changes,
+        )
     )
-    session.add(history)
+
+
+@event.listens_for(Booking, "after_insert")
+def booking_history_insert_event(mapper, connection, target: Booking):
+    _write_booking_history(mapper, connection, target, ChangeOperation.INSERT)
+
+
+@event.listens_for(Booking, "after_update")
+def booking_history_update_event(mapper, connection, target: Booking):
+    _write_booking_history(mapper, connection, target, ChangeOperation.UPDATE)
+
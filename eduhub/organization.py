@@ -0,0 +1,225 @@
+"""
+Organization hierarchy (university -> faculty -> department -> ... -> laboratory) with closure table.
+
+organization_closure keeps every (ancestor, descendant, depth) pair and is maintained by mapper events
+when unit is inserted or moved to another parent, so subtree, ancestors, and rollups of whole subtree
+are single indexed joins instead of recursive walk over parent_id on every query.
+"""
+import dataclasses
+from typing import Iterable
+
+from sqlalchemy import Connection, event, inspect, select, text
+from sqlalchemy.orm import Session
+
+from eduhub.models import OrganizationClosure, OrganizationUnit
+
+
+class OrganizationError(ValueError):
+    """Change would break organization tree (e.g., unit is moved under its own descendant)"""
+
+
+@dataclasses.dataclass(slots=True)
+class SubtreeRollup:
+    unit_id: int
+    laboratories: int
+    accounts: int
+    equipment: int
+    projects: int
+
+
+def _link(connection: Connection, unit_id: int, parent_id: int | None) -> None:
+    """Closure rows of new leaf: itself and every ancestor of parent"""
+    connection.execute(
+        text(
+            "INSERT INTO organization_closure (ancestor_id, descendant_id, depth) "
+            "SELECT ancestor_id, :unit_id, depth + 1 FROM organization_closure WHERE descendant_id = :parent_id "
+            "UNION ALL SELECT :unit_id, :unit_id, 0"
+        ),
+        {"unit_id": unit_id, "parent_id": parent_id},
+    )
+
+
+def _move(connection: Connection, unit_id: int, parent_id: int | None) -> None:
+    """Detach subtree of unit from its former ancestors and attach it below new parent"""
+    connection.execute(
+        text(
+            "DELETE FROM organization_closure AS link "
+            "USING organization_closure AS subtree "
+            "WHERE subtree.ancestor_id = :unit_id AND link.descendant_id = subtree.descendant_id "
+            "AND link.ancestor_id NOT IN (SELECT descendant_id FROM organization_closure WHERE ancestor_id = :unit_id)"
+        ),
+        {"unit_id": unit_id},
+    )
+    if parent_id is not None:
+        connection.execute(
+            text(
+                "INSERT INTO organization_closure (ancestor_id, descendant_id, depth) "
+                "SELECT above.ancestor_id, subtree.descendant_id, above.depth + subtree.depth + 1 "
+                "FROM organization_closure AS above "
+                "CROSS JOIN organization_closure AS subtree "
+                "WHERE above.descendant_id = :parent_id AND subtree.ancestor_id = :unit_id"
+            ),
+            {"unit_id": unit_id, "parent_id": parent_id},
+        )
+
+
+def _parent_change(target: OrganizationUnit) -> tuple[int | None, int | None] | None:
+    history = inspect(target).attrs.parent_id.history
+    if not history.has_changes():
+        return None
+    previous = history.deleted[0] if history.deleted else None
+    return (previous, target.parent_id) if previous != target.parent_id else None
+
+
+@event.listens_for(OrganizationUnit, "after_insert")
+def organization_closure_insert_event(mapper, connection, target: OrganizationUnit):
+    _link(connection, target.id, target.parent_id)
+
+
+@event.listens_for(OrganizationUnit, "before_update")
+def organization_cycle_check_event(mapper, connection, target: OrganizationUnit):
+    change = _parent_change(target)
+    if change is None or change[1] is None:
+        return
+    inside = connection.execute(
+        text("SELECT 1 FROM organization_closure WHERE ancestor_id = :unit_id AND descendant_id = :parent_id"),
+        {"unit_id": target.id, "parent_id": change[1]},
+    ).first()
+    if inside is not None:
+        raise OrganizationError(f"unit {target.id} cannot be moved under its own descendant {change[1]}")
+
+
+@event.listens_for(OrganizationUnit, "after_update")
+def organization_closure_move_event(mapper, connection, target: OrganizationUnit):
+    change = _parent_change(target)
+    if change is not None:
+        _move(connection, target.id, change[1])
+
+
+def rebuild_closure(session: Session) -> int:
+    """Recompute closure table from parent_id (initial fill or repair after manual edits)"""
+    session.execute(text("DELETE FROM organization_closure"))
+    return session.execute(
+        text(
+            "INSERT INTO organization_closure (ancestor_id, descendant_id, depth) "
+            "WITH RECURSIVE paths AS ("
+            "    SELECT id AS ancestor_id, id AS descendant_id, 0 AS depth FROM organization_unit"
+            "    UNION ALL"
+            "    SELECT paths.ancestor_id, unit.id, paths.depth + 1"
+            "    FROM paths JOIN organization_unit AS unit ON unit.parent_id = paths.descendant_id"
+            ") "
+            "SELECT ancestor_id, descendant_id, depth FROM paths"
+        )
+    ).rowcount
+
+
+def subtree(session: Session, unit_id: int, max_depth: int | None = None) -> list[OrganizationUnit]:
+    """Unit and all its descendants ordered by depth (max_depth=1 gives direct children)"""
+    statement = (
+        select(OrganizationUnit)
+        .join(OrganizationClosure, OrganizationClosure.descendant_id == OrganizationUnit.id)
+        .where(OrganizationClosure.ancestor_id == unit_id)
+        .order_by(OrganizationClosure.depth, OrganizationUnit.id)
+    )
+    if max_depth is not None:
+        statement = statement.where(OrganizationClosure.depth <= max_depth)
+    return list(session.scalars(statement))
+
+
+def ancestors(session: Session, unit_id: int) -> list[OrganizationUnit]:
+    """Path from root (university) to unit itself"""
+    return list(
+        session.scalars(
+            select(OrganizationUnit)
+            .join(OrganizationClosure, OrganizationClosure.ancestor_id == OrganizationUnit.id)
+            .where(OrganizationClosure.descendant_id == unit_id)
+            .order_by(OrganizationClosure.depth.desc())
+        )
+    )
+
+
+# {scope} is set of (ancestor_id, descendant_id) pairs for requested units, every source is
+# aggregated separately, so joins do not multiply rows of each other
+ROLLUP_STATEMENT = """
+    WITH scope AS ({scope}),
+    laboratories AS (
+        SELECT scope.ancestor_id, laboratory.id AS laboratory_id
+        FROM scope
+        JOIN laboratory ON laboratory.organization_unit_id = scope.descendant_id
+    ),
+    laboratory_counts AS (
+        SELECT ancestor_id, count(*) AS amount FROM laboratories GROUP BY ancestor_id
+    ),
+    equipment_counts AS (
+        SELECT laboratories.ancestor_id, count(*) AS amount
+        FROM laboratories
+        JOIN equipment ON equipment.laboratory_id = laboratories.laboratory_id AND equipment.deleted_at IS NULL
+        GROUP BY laboratories.ancestor_id
+    ),
+    project_counts AS (
+        SELECT laboratories.ancestor_id, count(*) AS amount
+        FROM laboratories
+        JOIN project ON project.laboratory_id = laboratories.laboratory_id AND project.deleted_at IS NULL
+        GROUP BY laboratories.ancestor_id
+    ),
+    account_counts AS (
+        -- accounts attached to unit directly, or through laboratory when they are not attached to unit
+        SELECT ancestor_id, count(*) AS amount
+        FROM (
+            SELECT scope.ancestor_id
+            FROM scope
+            JOIN account ON account.organization_unit_id = scope.descendant_id
+            UNION ALL
+            SELECT laboratories.ancestor_id
+            FROM laboratories
+            JOIN account ON account.laboratory_id = laboratories.laboratory_id AND account.organization_unit_id IS NULL
+        ) AS attached
+        GROUP BY ancestor_id
+    )
+    SELECT
+        unit.id,
+        coalesce(laboratory_counts.amount, 0),
+        coalesce(account_counts.amount, 0),
+        coalesce(equipment_counts.amount, 0),
+        coalesce(project_counts.amount, 0)
+    FROM organization_unit AS unit
+    JOIN (SELECT DISTINCT ancestor_id FROM scope) AS requested ON requested.ancestor_id = unit.id
+    LEFT JOIN laboratory_counts ON laboratory_counts.ancestor_id = unit.id
+    LEFT JOIN account_counts ON account_counts.ancestor_id = unit.id
+    LEFT JOIN equipment_counts ON equipment_counts.ancestor_id = unit.id
+    LEFT JOIN project_counts ON project_counts.ancestor_id = unit.id
+    ORDER BY unit.id
+"""
+
+CLOSURE_SCOPE = "SELECT ancestor_id, descendant_id FROM organization_closure {where}"
+
+# baseline without closure table: pairs are generated by walking parent_id on every query
+RECURSIVE_SCOPE = """
+    WITH RECURSIVE paths AS (
+        SELECT id AS ancestor_id, id AS descendant_id FROM organization_unit {where}
+        UNION ALL
+        SELECT paths.ancestor_id, unit.id
+        FROM paths JOIN organization_unit AS unit ON unit.parent_id = paths.descendant_id
+    )
+    SELECT ancestor_id, descendant_id FROM paths
+"""
+
+
+def _rollup(session: Session, scope: str, column: str, unit_ids: Iterable[int] | None) -> list[SubtreeRollup]:
+    parameters = {}
+    where = ""
+    if unit_ids is not None:
+        parameters["unit_ids"] = list(unit_ids)
+        where = f"WHERE {column} = ANY(:unit_ids)"
+    rows = session.execute(text(ROLLUP_STATEMENT.format(scope=scope.format(where=where))), parameters)
+    return [SubtreeRollup(*row) for row in rows]
+
+
+def rollup(session: Session, unit_ids: Iterable[int] | None = None) -> list[SubtreeRollup]:
+    """Amount of laboratories, accounts, live equipment, and live projects within whole subtree of each unit"""
+    return _rollup(session, CLOSURE_SCOPE, "ancestor_id", unit_ids)
+
+
+def rollup_recursive(session: Session, unit_ids: Iterable[int] | None = None) -> list[SubtreeRollup]:
+    """Same as rollup(), but with recursive CTE over parent_id (baseline for benchmarks)"""
+    return _rollup(session, RECURSIVE_SCOPE, "id", unit_ids)
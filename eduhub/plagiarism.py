@@ -0,0 +1,182 @@
+"""
+Near-duplicate detection of resource texts (Resource.description, Report.responsibility_zone
+and Report.comments, Presentation.subtitles content) with winnowing fingerprints.
+
+Each document is reduced to a set of winnowed hashes of word k-grams, which is stored in
+resource_fingerprint, so documents sharing fingerprints are found by index lookups
+(any copied fragment of at least K_GRAM + WINDOW - 1 words is guaranteed to be detected).
+"""
+import datetime
+import hashlib
+import itertools
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import Engine, delete, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from eduhub.models import FingerprintedDocument, ResourceFingerprint
+
+K_GRAM = 5  # words per k-gram
+WINDOW = 4  # k-grams per winnowing window
+_BASE = np.uint64(1_000_003)
+_WORD = re.compile(r"\w+")
+
+# all texts of resource concatenated into one document, md5 is used to skip unchanged documents
+DOCUMENTS_STATEMENT = """
+    SELECT id, content, md5(content) AS content_hash
+    FROM (
+        SELECT
+            r.id,
+            concat_ws(
+                E'\\n',
+                r.description,
+                report.responsibility_zone,
+                report.comments,
+                (
+                    SELECT string_agg(value #>> '{}', E'\\n')
+                    FROM jsonb_path_query(presentation.subtitles, 'lax $.**.content') AS value
+                )
+            ) AS content
+        FROM resource AS r
+        LEFT JOIN report ON report.id = r.id
+        LEFT JOIN presentation ON presentation.id = r.id
+        WHERE r.deleted_at IS NULL
+    ) AS documents
+    LEFT JOIN fingerprinted_document AS fd ON fd.resource_id = documents.id
+    WHERE fd.content_hash IS DISTINCT FROM md5(documents.content)
+"""
+
+
+def _word_hashes(content: str) -> np.ndarray:
+    words = _WORD.findall(content.lower())
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little") for word in words),
+        dtype=np.uint64,
+        count=len(words),
+    )
+
+
+def fingerprints(content: str, k: int = K_GRAM, window: int = WINDOW) -> np.ndarray:
+    """Unique winnowed fingerprints (signed 64-bit to fit into BIGINT)"""
+    words = _word_hashes(content)
+    if len(words) < k:
+        return np.empty(0, dtype=np.int64)
+    # polynomial hash of each k-gram of words (uint64 arithmetic wraps around)
+    powers = _BASE ** np.arange(k - 1, -1, -1, dtype=np.uint64)
+    grams = (sliding_window_view(words, k) * powers).sum(axis=1, dtype=np.uint64)
+    if len(grams) <= window:
+        return np.unique(grams.view(np.int64))
+    # rightmost minimum of each window
+    windows = sliding_window_view(grams, window)
+    positions = np.arange(len(windows)) + (window - 1 - np.argmin(windows[:, ::-1], axis=1))
+    return np.unique(grams[np.unique(positions)].view(np.int64))
+
+
+def _fingerprint_batch(batch: list[tuple[int, str, str]]) -> list[tuple[int, str, np.ndarray]]:
+    """Executed in worker process"""
+    return [(resource_id, content_hash, fingerprints(content or "")) for resource_id, content, content_hash in batch]
+
+
+def _store(session: Session, results: list[tuple[int, str, np.ndarray]]) -> int:
+    now = datetime.datetime.now(tz=datetime.UTC)
+    resource_ids = [resource_id for resource_id, _, _ in results]
+    session.execute(delete(ResourceFingerprint).where(ResourceFingerprint.resource_id.in_(resource_ids)))
+    rows = [
+        {"fingerprint": int(fingerprint), "resource_id": resource_id}
+        for resource_id, _, values in results
+        for fingerprint in values
+    ]
+    if rows:
+        session.execute(insert(ResourceFingerprint), rows)
+    statement = pg_insert(FingerprintedDocument)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[FingerprintedDocument.resource_id],
+            set_={
+                "content_hash": statement.excluded.content_hash,
+                "fingerprint_count": statement.excluded.fingerprint_count,
+                "fingerprinted_at": statement.excluded.fingerprinted_at,
+            },
+        ),
+        [
+            {
+                "resource_id": resource_id,
+                "content_hash": content_hash,
+                "fingerprint_count": len(values),
+                "fingerprinted_at": now,
+            }
+            for resource_id, content_hash, values in results
+        ],
+    )
+    return len(rows)
+
+
+def _stream_documents(engine: Engine, batch_size: int) -> Iterator[list[tuple[int, str, str]]]:
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(
+            text(DOCUMENTS_STATEMENT)
+        )
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+def ingest(engine: Engine, workers: int | None = None, batch_size: int = 500, max_pending: int = 16) -> int:
+    """
+    Fingerprint changed documents: rows are streamed with server-side cursor, hashed in process pool,
+    and written (committed per batch) by main process. Returns amount of processed documents
+    """
+    processed = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor, Session(engine) as session:
+        batches = _stream_documents(engine, batch_size)
+        # bounded amount of batches in flight, so memory does not depend on amount of documents
+        pending = [executor.submit(_fingerprint_batch, batch) for batch in itertools.islice(batches, max_pending)]
+        while pending:
+            results = pending.pop(0).result()
+            next_batch = next(batches, None)
+            if next_batch is not None:
+                pending.append(executor.submit(_fingerprint_batch, next_batch))
+            _store(session, results)
+            session.commit()
+            processed += len(results)
+            elapsed = time.perf_counter() - started
+            print(f"[fingerprints] {processed} documents, {processed / elapsed:.0f} documents/s")
+    return processed
+
+
+def _overlaps(session: Session, values: Iterable[int], exclude: int | None, min_share: float) -> list[tuple[int, float]]:
+    values = [int(value) for value in values]
+    if not values:
+        return []
+    rows = session.execute(
+        text(
+            "SELECT resource_id, count(*) AS shared "
+            "FROM resource_fingerprint "
+            "WHERE fingerprint = ANY(:fingerprints) AND resource_id IS DISTINCT FROM :exclude "
+            "GROUP BY resource_id "
+            "HAVING count(*) >= :min_shared "
+            "ORDER BY shared DESC"
+        ),
+        {"fingerprints": values, "exclude": exclude, "min_shared": min_share * len(values)},
+    )
+    return [(row.resource_id, row.shared / len(values)) for row in rows]
+
+
+def overlapping_documents(session: Session, resource_id: int, min_share: float = 0.3) -> list[tuple[int, float]]:
+    """Resources that contain at least min_share of fingerprints of already fingerprinted resource"""
+    values = session.execute(
+        text("SELECT fingerprint FROM resource_fingerprint WHERE resource_id = :resource_id"),
+        {"resource_id": resource_id},
+    ).scalars().all()
+    return _overlaps(session, values, resource_id, min_share)
+
+
+def overlapping_text(session: Session, content: str, min_share: float = 0.3) -> list[tuple[int, float]]:
+    """Resources that contain at least min_share of fingerprints of new (not stored yet) text"""
+    return _overlaps(session, fingerprints(content), None, min_share)
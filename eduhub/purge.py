@@ -0,0 +1,102 @@
+"""
+Purge of old tombstones (rows of SoftDeleteMixin models with deleted_at older than cutoff).
+
+Each batch is archived into tombstone_archive as JSON (with rows of __purge_cascade__ tables)
+and physically deleted in one transaction. Tombstones that are still referenced by other rows
+(e.g., deleted equipment with bookings) are kept until those rows are purged or removed.
+"""
+import datetime
+import time
+
+from sqlalchemy import ForeignKey, Table, text
+from sqlalchemy.orm import Session
+
+from eduhub.common.database import Base
+from eduhub.common.mixins import SoftDeleteMixin
+from eduhub.models import Booking, Equipment, Project, Resource
+
+# bookings first, so deleted equipment is not blocked by its own deleted bookings
+PURGE_ORDER = (Booking, Project, Resource, Equipment)
+
+
+def _references(table: Table) -> list[ForeignKey]:
+    return [
+        foreign_key
+        for other in Base.metadata.sorted_tables
+        for foreign_key in other.foreign_keys
+        if foreign_key.column.table is table
+    ]
+
+
+def _cascade_references(model: type[SoftDeleteMixin]) -> dict[str, list[str]]:
+    """Table name to referencing columns of tables archived and deleted with tombstone"""
+    references: dict[str, list[str]] = {}
+    for foreign_key in _references(model.__table__):
+        if foreign_key.parent.table.fullname in model.__purge_cascade__:
+            references.setdefault(foreign_key.parent.table.fullname, []).append(foreign_key.parent.name)
+    return references
+
+
+def _blocking_conditions(model: type[SoftDeleteMixin]) -> list[str]:
+    """NOT EXISTS condition per reference, which would be violated by deletion of tombstone"""
+    return [
+        f"NOT EXISTS (SELECT FROM {foreign_key.parent.table.fullname} AS ref "
+        f"WHERE ref.{foreign_key.parent.name} = t.{foreign_key.column.name})"
+        for foreign_key in _references(model.__table__)
+        if foreign_key.parent.table.fullname not in model.__purge_cascade__ and foreign_key.ondelete != "CASCADE"
+    ]
+
+
+def purge_batch(session: Session, model: type[SoftDeleteMixin], cutoff: datetime.datetime, batch_size: int) -> int:
+    """Archive and delete up to batch_size tombstones of model (caller commits), returns amount of purged rows"""
+    table = model.__table__.name
+    conditions = " AND ".join(["t.deleted_at < :cutoff", *_blocking_conditions(model)])
+    ids = session.execute(
+        text(
+            f"SELECT t.id FROM {table} AS t WHERE {conditions} "
+            "ORDER BY t.deleted_at LIMIT :batch_size FOR UPDATE SKIP LOCKED"
+        ),
+        {"cutoff": cutoff, "batch_size": batch_size},
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    cascade = _cascade_references(model)
+    dependents = ", ".join(
+        f"'{child}', (SELECT coalesce(jsonb_agg(to_jsonb(c)), '[]') FROM {child} AS c "
+        f"WHERE {' OR '.join(f'c.{column} = t.id' for column in columns)})"
+        for child, columns in cascade.items()
+    )
+    session.execute(
+        text(
+            "INSERT INTO tombstone_archive (table_name, row_id, deleted_at, archived_at, data) "
+            f"SELECT :table, t.id, t.deleted_at, now(), to_jsonb(t) || jsonb_build_object('dependents', jsonb_build_object({dependents})) "
+            f"FROM {table} AS t WHERE t.id = ANY(:ids)"
+        ),
+        {"table": table, "ids": ids},
+    )
+    for child, columns in cascade.items():
+        session.execute(
+            text(f"DELETE FROM {child} WHERE {' OR '.join(f'{column} = ANY(:ids)' for column in columns)}"),
+            {"ids": ids},
+        )
+    session.execute(text(f"DELETE FROM {table} WHERE id = ANY(:ids)"), {"ids": ids})
+    return len(ids)
+
+
+def purge(session: Session, older_than: datetime.timedelta, batch_size: int = 1000, pause: float = 0.0) -> dict[str, int]:
+    """Purge tombstones of all soft-deletable models in short transactions, returns amount per table"""
+    cutoff = datetime.datetime.now(tz=datetime.UTC) - older_than
+    purged = {}
+    for model in PURGE_ORDER:
+        table = model.__table__.name
+        purged[table] = 0
+        while True:
+            amount = purge_batch(session, model, cutoff, batch_size)
+            session.commit()
+            if not amount:
+                break
+            purged[table] += amount
+            print(f"[purge] {table}: {purged[table]} tombstones archived")
+            time.sleep(pause)
+    return purged
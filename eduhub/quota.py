@@ -0,0 +1,210 @@
+"""
+Quota of active bookings per account (e.g., at most 5 pieces of equipment at a time).
+
+Instead of counting bookings of requester under row locks, each status transition of booking
+adjusts one row in account_booking_usage within same transaction, and quota is enforced by
+one conditional UPDATE of that row (it is rejected, when counter would exceed the limit).
+Counters can drift after bulk statements or manual edits, which is repaired by reconcile().
+"""
+import dataclasses
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import Connection, event, inspect, text
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import BookingStatus
+from eduhub.models import Booking
+
+ACTIVE_STATUSES = (BookingStatus.REQUESTED, BookingStatus.APPROVED)
+UNLIMITED = 2**31 - 1
+
+# the lowest quota of role and laboratory of account, or NULL when none of them is configured
+QUOTA_STATEMENT = """
+    SELECT min(quota.max_active)
+    FROM booking_quota AS quota
+    JOIN account ON account.role = quota.role OR account.laboratory_id = quota.laboratory_id
+    WHERE account.id = :account_id
+"""
+
+RESERVE_STATEMENT = f"""
+    UPDATE account_booking_usage
+    SET active_count = active_count + :amount, updated_at = now()
+    WHERE account_id = :account_id
+    AND active_count + :amount <= coalesce(({QUOTA_STATEMENT}), {UNLIMITED})
+    RETURNING active_count
+"""
+
+RELEASE_STATEMENT = """
+    UPDATE account_booking_usage AS counter
+    SET active_count = greatest(counter.active_count - released.amount, 0), updated_at = now()
+    FROM unnest(CAST(:account_ids AS integer[]), CAST(:amounts AS integer[])) AS released(account_id, amount)
+    WHERE counter.account_id = released.account_id
+"""
+
+# actual amount of active bookings compared with stored counters (missing counters are created beforehand)
+DRIFT_STATEMENT = """
+    SELECT counter.account_id, counter.active_count AS recorded, coalesce(actual.active_count, 0) AS actual
+    FROM account_booking_usage AS counter
+    LEFT JOIN (
+        SELECT requester_id, count(*) AS active_count
+        FROM booking
+        WHERE status = ANY(CAST(:statuses AS bookingstatus[])) AND deleted_at IS NULL {requester_filter}
+        GROUP BY requester_id
+    ) AS actual ON actual.requester_id = counter.account_id
+    WHERE counter.active_count IS DISTINCT FROM coalesce(actual.active_count, 0) {account_filter}
+    ORDER BY counter.account_id
+"""
+
+
+class QuotaExceeded(Exception):
+    """Account already has maximum amount of active bookings"""
+
+    def __init__(self, account_id: int, limit: int | None):
+        super().__init__(f"account {account_id} reached quota of {limit} active bookings")
+        self.account_id = account_id
+        self.limit = limit
+
+
+@dataclasses.dataclass(slots=True)
+class Drift:
+    account_id: int
+    recorded: int
+    actual: int
+
+
+def _statuses() -> list[str]:
+    # enum columns store names of members
+    return [status.name for status in ACTIVE_STATUSES]
+
+
+def quota_of(connection: Connection, account_id: int) -> int | None:
+    """Effective limit of account (None means unlimited)"""
+    return connection.execute(text(QUOTA_STATEMENT), {"account_id": account_id}).scalar()
+
+
+def reserve(connection: Connection, account_id: int, amount: int = 1) -> int:
+    """Increment counter of account within its quota and return new value, or raise QuotaExceeded"""
+    parameters = {"account_id": account_id, "amount": amount}
+    active_count = connection.execute(text(RESERVE_STATEMENT), parameters).scalar()
+    if active_count is None:
+        # counter is created lazily on first booking of account, then update is repeated once
+        connection.execute(
+            text(
+                "INSERT INTO account_booking_usage (account_id, active_count, updated_at) "
+                "VALUES (:account_id, 0, now()) ON CONFLICT (account_id) DO NOTHING"
+            ),
+            parameters,
+        )
+        active_count = connection.execute(text(RESERVE_STATEMENT), parameters).scalar()
+    if active_count is None:
+        raise QuotaExceeded(account_id, quota_of(connection, account_id))
+    return active_count
+
+
+def release(connection: Connection, account_ids: Iterable[int]) -> None:
+    """Decrement counters once per occurrence of account id (never below zero)"""
+    amounts = Counter(account_ids)
+    if amounts:
+        connection.execute(
+            text(RELEASE_STATEMENT),
+            {"account_ids": list(amounts.keys()), "amounts": list(amounts.values())},
+        )
+
+
+def _previous(target: Booking, key: str):
+    history = inspect(target).attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else getattr(target, key)
+
+
+def _is_active(status: BookingStatus | None, deleted_at) -> bool:
+    # status is None in before_insert when it is left to column default (BookingStatus.REQUESTED)
+    if status is None:
+        status = BookingStatus.REQUESTED
+    return status in ACTIVE_STATUSES and deleted_at is None
+
+
+@event.listens_for(Booking, "before_insert")
+def booking_quota_insert_event(mapper, connection, target: Booking):
+    if _is_active(target.status, target.deleted_at):
+        reserve(connection, target.requester_id)
+
+
+@event.listens_for(Booking, "before_update")
+def booking_quota_update_event(mapper, connection, target: Booking):
+    """Soft deletion releases quota like cancellation, and restoration reserves it again"""
+    previous_requester = _previous(target, "requester_id")
+    was_active = _is_active(_previous(target, "status"), _previous(target, "deleted_at"))
+    is_active = _is_active(target.status, target.deleted_at)
+    if was_active and (not is_active or previous_requester != target.requester_id):
+        release(connection, [previous_requester])
+    if is_active and (not was_active or previous_requester != target.requester_id):
+        reserve(connection, target.requester_id)
+
+
+@event.listens_for(Booking, "before_delete")
+def booking_quota_delete_event(mapper, connection, target: Booking):
+    if _is_active(_previous(target, "status"), _previous(target, "deleted_at")):
+        release(connection, [_previous(target, "requester_id")])
+
+
+def drifts(session: Session, account_ids: Iterable[int] | None = None) -> list[Drift]:
+    """Counters that differ from actual amount of active bookings"""
+    parameters = {"statuses": _statuses()}
+    requester_filter = account_filter = ""
+    if account_ids is not None:
+        parameters["account_ids"] = list(account_ids)
+        requester_filter = "AND requester_id = ANY(:account_ids)"
+        account_filter = "AND counter.account_id = ANY(:account_ids)"
+    rows = session.execute(
+        text(DRIFT_STATEMENT.format(requester_filter=requester_filter, account_filter=account_filter)),
+        parameters,
+    )
+    return [Drift(row.account_id, row.recorded, row.actual) for row in rows]
+
+
+def reconcile(session: Session, batch_size: int = 1000) -> list[Drift]:
+    """
+    Repair counters against booking table: candidates are found without locks, then rows of each batch
+    are locked (which waits for transactions that changed them) and recounted before update,
+    so concurrent bookings are not lost. Commits per batch, returns repaired counters
+    """
+    session.execute(
+        text(
+            "INSERT INTO account_booking_usage (account_id, active_count, updated_at) "
+            "SELECT id, 0, now() FROM account ON CONFLICT (account_id) DO NOTHING"
+        )
+    )
+    session.commit()
+
+    candidates = [drift.account_id for drift in drifts(session)]
+    repaired = []
+    for offset in range(0, len(candidates), batch_size):
+        batch = candidates[offset:offset + batch_size]
+        session.execute(
+            text(
+                "SELECT account_id FROM account_booking_usage "
+                "WHERE account_id = ANY(:account_ids) ORDER BY account_id FOR UPDATE"
+            ),
+            {"account_ids": batch},
+        )
+        confirmed = drifts(session, batch)
+        if confirmed:
+            session.execute(
+                text(
+                    "UPDATE account_booking_usage AS counter "
+                    "SET active_count = actual.active_count, updated_at = now() "
+                    "FROM unnest(CAST(:account_ids AS integer[]), CAST(:counts AS integer[])) "
+                    "AS actual(account_id, active_count) "
+                    "WHERE counter.account_id = actual.account_id"
+                ),
+                {
+                    "account_ids": [drift.account_id for drift in confirmed],
+                    "counts": [drift.actual for drift in confirmed],
+                },
+            )
+        session.commit()
+        repaired.extend(confirmed)
+    return repaired
@@ -0,0 +1,112 @@
+"""
+Read models: immutable __slots__ dataclasses generated from mappings of eduhub.models.
+
+Listings select only columns (no identity map, instrumentation, or lazy-load state per row),
+and each row is converted to record with positional constructor. Records are cheap to keep
+in memory and to serialize with to_dict()/to_json(), for example:
+
+LaboratoryRecord = read_model(Laboratory, extra={"account_count": func.count(Account.id)})
+records = fetch(session, LaboratoryRecord, lambda statement: statement.outerjoin(Account).group_by(Laboratory.id))
+"""
+import dataclasses
+import datetime
+import enum
+import functools
+import json
+import operator
+from typing import Any, Callable, Iterable, Sequence
+
+from sqlalchemy import ColumnElement, Select, select
+from sqlalchemy.orm import Session
+
+
+def _python_type(column) -> Any:
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return Any
+    return python_type | None if column.nullable else python_type
+
+
+def _to_dict(self) -> dict[str, Any]:
+    return dict(zip(self._fields, self._getter(self)))
+
+
+@functools.cache
+def _read_model(model: type, columns: tuple[str, ...] | None, extra: tuple[tuple[str, ColumnElement], ...]) -> type:
+    mapper = model.__mapper__
+    properties = [
+        prop for prop in mapper.column_attrs
+        if columns is None or prop.key in columns
+    ]
+    fields = [(prop.key, _python_type(prop.columns[0])) for prop in properties]
+    fields += [(name, Any) for name, _ in extra]
+    record = dataclasses.make_dataclass(
+        f"{model.__name__}Record",
+        fields,
+        slots=True,
+        frozen=True,
+        namespace={"to_dict": _to_dict},
+    )
+    names = tuple(name for name, _ in fields)
+    # same conventions as namedtuple (_fields), getter returns tuple of values in field order
+    record._fields = names
+    record._getter = staticmethod(operator.attrgetter(*names) if len(names) > 1 else (lambda self: (getattr(self, names[0]),)))
+    record._model = model
+    record._columns = tuple(getattr(model, prop.key) for prop in properties) + tuple(
+        expression.label(name) for name, expression in extra
+    )
+    return record
+
+
+def read_model(model: type, columns: Iterable[str] | None = None, extra: dict[str, ColumnElement] | None = None) -> type:
+    """
+    Frozen slots dataclass with mapped columns of model (all or selected, inherited ones included)
+    and extra labeled expressions, generated once per arguments (extra expressions are compared
+    by identity, so read models are meant to be declared once at module level)
+    """
+    return _read_model(model, tuple(columns) if columns is not None else None, tuple((extra or {}).items()))
+
+
+def statement_for(record: type) -> Select:
+    """SELECT of record columns, FROM is ORM entity, so joined inheritance tables are joined"""
+    return select(*record._columns).select_from(record._model)
+
+
+def fetch(
+    session: Session,
+    record: type,
+    customize: Callable[[Select], Select] | None = None,
+    batch_size: int | None = None,
+) -> list:
+    """
+    Records from ORM-enabled column select (so global criteria like soft delete still apply),
+    customize adds joins, filters, ordering, or limit to statement
+    """
+    statement = statement_for(record)
+    if customize is not None:
+        statement = customize(statement)
+    if batch_size is not None:
+        statement = statement.execution_options(yield_per=batch_size)
+    return [record(*row) for row in session.execute(statement)]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def to_dicts(records: Sequence) -> list[dict[str, Any]]:
+    if not records:
+        return []
+    fields, getter = records[0]._fields, records[0]._getter
+    return [dict(zip(fields, getter(record))) for record in records]
+
+
+def to_json(records: Sequence) -> str:
+    return json.dumps(to_dicts(records), default=_json_default, ensure_ascii=False)
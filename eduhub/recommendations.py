@@ -0,0 +1,397 @@
+"""
+Interest-based recommendations of projects, partners, and collaborators for account.
+
+Accounts and projects are represented as TF-IDF weighted rows of sparse term matrices
+(terms are Profile.interest_areas, Publication.keywords, Dataset.tags, and laboratory),
+so recommendation is one sparse matrix-vector product followed by partial sort.
+"""
+import dataclasses
+import itertools
+import math
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Iterable, Self
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import Connection, delete, event, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from eduhub.models import (
+    Account,
+    Dataset,
+    Profile,
+    Project,
+    Publication,
+    RecommendationChange,
+    project_participant,
+    project_partner,
+    project_resource,
+)
+
+# account is also described by terms of projects it participates in, but with lower weight
+MEMBERSHIP_WEIGHT = 0.5
+
+
+def _term(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def _laboratory_term(laboratory_id: int) -> str:
+    return f"laboratory:{laboratory_id}"
+
+
+def load_project_terms(session: Session, project_ids: Iterable[int] | None = None) -> dict[int, Counter]:
+    project_filter = [] if project_ids is None else [Project.id.in_(list(project_ids))]
+    terms: dict[int, Counter] = {
+        project_id: Counter({_laboratory_term(laboratory_id): 1})
+        for project_id, laboratory_id in session.execute(
+            select(Project.id, Project.laboratory_id).where(*project_filter)
+        )
+    }
+    resource_filter = [] if project_ids is None else [project_resource.c.project_id.in_(list(terms))]
+    for model, column in ((Publication, Publication.keywords), (Dataset, Dataset.tags)):
+        # join with Project, so soft delete criteria skip links of deleted projects (same as terms above)
+        rows = session.execute(
+            select(project_resource.c.project_id, column)
+            .join(Project, Project.id == project_resource.c.project_id)
+            .join(model, model.id == project_resource.c.resource_id)
+            .where(*resource_filter)
+        )
+        for project_id, values in rows:
+            terms[project_id].update(_term(value) for value in values or [])
+    return terms
+
+
+def load_memberships(session: Session, account_ids: Iterable[int] | None = None) -> dict[int, set[int]]:
+    account_filter = [] if account_ids is None else [project_participant.c.account_id.in_(list(account_ids))]
+    memberships: dict[int, set[int]] = defaultdict(set)
+    rows = session.execute(
+        select(project_participant.c.account_id, project_participant.c.project_id).where(*account_filter)
+    )
+    for account_id, project_id in rows:
+        memberships[account_id].add(project_id)
+    return memberships
+
+
+def load_account_terms(
+    session: Session,
+    memberships: dict[int, set[int]],
+    project_terms: dict[int, Counter],
+    account_ids: Iterable[int] | None = None,
+) -> dict[int, Counter]:
+    account_filter = [] if account_ids is None else [Account.id.in_(list(account_ids))]
+    rows = session.execute(
+        select(Account.id, Account.laboratory_id, Profile.interest_areas)
+        .outerjoin(Profile, Profile.account_id == Account.id)
+        .where(*account_filter)
+    )
+    terms: dict[int, Counter] = {}
+    for account_id, laboratory_id, interest_areas in rows:
+        counter = Counter(_term(value) for value in interest_areas or [])
+        counter[_laboratory_term(laboratory_id)] += 1
+        for project_id in memberships.get(account_id, ()):
+            for term, count in project_terms.get(project_id, {}).items():
+                counter[term] += MEMBERSHIP_WEIGHT * count
+        terms[account_id] = counter
+    return terms
+
+
+def load_partnerships(session: Session) -> dict[int, set[int]]:
+    partnerships: dict[int, set[int]] = defaultdict(set)
+    for project_id, partner_id in session.execute(select(project_partner.c.project_id, project_partner.c.partner_id)):
+        partnerships[partner_id].add(project_id)
+    return partnerships
+
+
+def _normalize_rows(matrix: sp.csr_matrix) -> sp.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.csr_matrix(sp.diags(1 / norms) @ matrix)
+
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int, exclude: Iterable[int] = ()) -> list[tuple[int, float]]:
+    """Positions with highest scores via argpartition (O(n) instead of full sort)"""
+    scores = scores.copy()
+    scores[list(exclude)] = -np.inf
+    k = min(k, len(scores))
+    if k == 0:
+        return []
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    candidates = candidates[np.argsort(-scores[candidates])]
+    return [(int(ids[position]), float(scores[position])) for position in candidates if scores[position] > 0]
+
+
+@dataclasses.dataclass
+class RecommendationIndex:
+    vocabulary: dict[str, int]
+    idf: np.ndarray
+    account_ids: np.ndarray
+    accounts: sp.csr_matrix
+    project_ids: np.ndarray
+    projects: sp.csr_matrix
+    partner_ids: np.ndarray
+    partners: sp.csr_matrix
+    memberships: dict[int, set[int]]
+    partnerships: dict[int, set[int]]
+
+    def __post_init__(self):
+        self._account_positions = {int(id): position for position, id in enumerate(self.account_ids)}
+        self._project_positions = {int(id): position for position, id in enumerate(self.project_ids)}
+
+    @classmethod
+    def build(cls, session: Session) -> Self:
+        """Full rebuild from database (vocabulary and IDF are recomputed)"""
+        project_terms = load_project_terms(session)
+        memberships = load_memberships(session)
+        account_terms = load_account_terms(session, memberships, project_terms)
+
+        documents = itertools.chain(account_terms.values(), project_terms.values())
+        document_frequency = Counter(term for document in documents for term in document)
+        total = len(account_terms) + len(project_terms)
+        vocabulary = {term: index for index, term in enumerate(sorted(document_frequency))}
+        idf = np.array(
+            [math.log((1 + total) / (1 + document_frequency[term])) + 1 for term in vocabulary],
+            dtype=np.float64,
+        )
+        index = cls(
+            vocabulary=vocabulary,
+            idf=idf,
+            account_ids=np.fromiter(account_terms, dtype=np.int64, count=len(account_terms)),
+            accounts=sp.csr_matrix((0, len(vocabulary))),
+            project_ids=np.fromiter(project_terms, dtype=np.int64, count=len(project_terms)),
+            projects=sp.csr_matrix((0, len(vocabulary))),
+            partner_ids=np.empty(0, dtype=np.int64),
+            partners=sp.csr_matrix((0, len(vocabulary))),
+            memberships=memberships,
+            partnerships=load_partnerships(session),
+        )
+        index.accounts = index._vectorize(account_terms.values())
+        index.projects = index._vectorize(project_terms.values())
+        index._rebuild_partners()
+        return index
+
+    def _vectorize(self, documents: Iterable[Counter]) -> sp.csr_matrix:
+        """TF-IDF rows (L2 normalized), unknown terms are appended to vocabulary"""
+        data, indices, indptr = [], [], [0]
+        new_terms = []
+        for document in documents:
+            for term, count in document.items():
+                if term not in self.vocabulary:
+                    self.vocabulary[term] = len(self.vocabulary)
+                    new_terms.append(term)
+                indices.append(self.vocabulary[term])
+                data.append(count)
+            indptr.append(len(indices))
+        if new_terms:
+            total = len(self.account_ids) + len(self.project_ids)
+            self.idf = np.concatenate([self.idf, np.full(len(new_terms), math.log((1 + total) / 2) + 1)])
+            for matrix in (self.accounts, self.projects, self.partners):
+                matrix.resize((matrix.shape[0], len(self.vocabulary)))
+        matrix = sp.csr_matrix(
+            (np.asarray(data, dtype=np.float64), indices, indptr),
+            shape=(len(indptr) - 1, len(self.vocabulary)),
+        )
+        return _normalize_rows(sp.csr_matrix(matrix @ sp.diags(self.idf)))
+
+    def _rebuild_partners(self) -> None:
+        """Partner is represented as normalized sum of its projects"""
+        self.partner_ids = np.fromiter(self.partnerships, dtype=np.int64, count=len(self.partnerships))
+        rows, columns = [], []
+        for row, partner_id in enumerate(self.partner_ids):
+            for project_id in self.partnerships[int(partner_id)]:
+                if project_id in self._project_positions:
+                    rows.append(row)
+                    columns.append(self._project_positions[project_id])
+        incidence = sp.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)),
+            shape=(len(self.partner_ids), len(self.project_ids)),
+        )
+        self.partners = _normalize_rows(sp.csr_matrix(incidence @ self.projects))
+
+    @staticmethod
+    def _replace_rows(
+        matrix: sp.csr_matrix,
+        ids: np.ndarray,
+        replaced: Iterable[int],
+        new_ids: np.ndarray,
+        new_rows: sp.csr_matrix,
+    ) -> tuple[sp.csr_matrix, np.ndarray]:
+        keep = ~np.isin(ids, list(replaced))
+        return (
+            sp.csr_matrix(sp.vstack([matrix[keep], new_rows])),
+            np.concatenate([ids[keep], new_ids]),
+        )
+
+    def update_accounts(self, session: Session, account_ids: Iterable[int]) -> None:
+        """Recompute rows of changed accounts (deleted accounts are removed from index)"""
+        account_ids = set(account_ids)
+        if not account_ids:
+            return
+        memberships = load_memberships(session, account_ids)
+        for account_id in account_ids:
+            self.memberships.pop(account_id, None)
+        self.memberships.update(memberships)
+        member_projects = set(itertools.chain.from_iterable(memberships.values()))
+        project_terms = load_project_terms(session, member_projects)
+        account_terms = load_account_terms(session, memberships, project_terms, account_ids)
+        new_ids = np.fromiter(account_terms, dtype=np.int64, count=len(account_terms))
+        new_rows = self._vectorize(account_terms.values())
+        self.accounts, self.account_ids = self._replace_rows(
+            self.accounts, self.account_ids, account_ids, new_ids, new_rows
+        )
+        self._account_positions = {int(id): position for position, id in enumerate(self.account_ids)}
+
+    def update_projects(self, session: Session, project_ids: Iterable[int]) -> set[int]:
+        """
+        Recompute rows of changed projects, of their participants, and representation of all partners,
+        returns ids of refreshed accounts
+        """
+        project_ids = set(project_ids)
+        if not project_ids:
+            return set()
+        project_terms = load_project_terms(session, project_ids)
+        new_ids = np.fromiter(project_terms, dtype=np.int64, count=len(project_terms))
+        new_rows = self._vectorize(project_terms.values())
+        self.projects, self.project_ids = self._replace_rows(
+            self.projects, self.project_ids, project_ids, new_ids, new_rows
+        )
+        self._project_positions = {int(id): position for position, id in enumerate(self.project_ids)}
+        self.partnerships = load_partnerships(session)
+        self._rebuild_partners()
+        # rows of accounts include terms of their projects (current and former participants)
+        members = {account_id for account_id, projects in self.memberships.items() if projects & project_ids}
+        members.update(
+            session.scalars(
+                select(project_participant.c.account_id).where(project_participant.c.project_id.in_(list(project_ids)))
+            )
+        )
+        self.update_accounts(session, members)
+        return members
+
+    def apply_pending(self, session: Session) -> tuple[int, int]:
+        """
+        Apply changes recorded by after_flush listener since last update (caller saves index and
+        then commits, so ids are kept when update fails), returns amount of changed accounts and projects
+        """
+        account_ids, project_ids = drain_pending(session)
+        refreshed = self.update_projects(session, project_ids)
+        self.update_accounts(session, account_ids - refreshed)
+        return len(account_ids), len(project_ids)
+
+    def _account_vector(self, account_id: int) -> sp.csr_matrix:
+        return self.accounts[self._account_positions[account_id]]
+
+    def similar_projects(self, account_id: int, k: int = 10) -> list[tuple[int, float]]:
+        """Projects closest to interests of account, excluding projects it already participates in"""
+        scores = (self.projects @ self._account_vector(account_id).T).toarray().ravel()
+        exclude = [
+            self._project_positions[project_id]
+            for project_id in self.memberships.get(account_id, ())
+            if project_id in self._project_positions
+        ]
+        return _top_k(scores, self.project_ids, k, exclude)
+
+    def collaborators(self, account_id: int, k: int = 10) -> list[tuple[int, float]]:
+        """Accounts with similar interests and projects"""
+        scores = (self.accounts @ self._account_vector(account_id).T).toarray().ravel()
+        return _top_k(scores, self.account_ids, k, [self._account_positions[account_id]])
+
+    def partners_for(self, account_id: int, k: int = 10) -> list[tuple[int, float]]:
+        """Partners whose projects are closest to interests of account"""
+        scores = (self.partners @ self._account_vector(account_id).T).toarray().ravel()
+        return _top_k(scores, self.partner_ids, k)
+
+    def save(self, path: Path) -> None:
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        memberships = [(account, project) for account, projects in self.memberships.items() for project in projects]
+        partnerships = [(partner, project) for partner, projects in self.partnerships.items() for project in projects]
+        arrays = {
+            # unicode array instead of object array, so loading does not need pickle
+            "terms": np.array(terms, dtype=np.str_),
+            "idf": self.idf,
+            "account_ids": self.account_ids,
+            "project_ids": self.project_ids,
+            "memberships": np.array(memberships, dtype=np.int64).reshape(-1, 2),
+            "partnerships": np.array(partnerships, dtype=np.int64).reshape(-1, 2),
+        }
+        for name in ("accounts", "projects"):
+            matrix = getattr(self, name)
+            arrays[f"{name}_data"] = matrix.data
+            arrays[f"{name}_indices"] = matrix.indices
+            arrays[f"{name}_indptr"] = matrix.indptr
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        arrays = np.load(path)
+        terms = [str(term) for term in arrays["terms"]]
+        matrices = {
+            name: sp.csr_matrix(
+                (arrays[f"{name}_data"], arrays[f"{name}_indices"], arrays[f"{name}_indptr"]),
+                shape=(len(arrays[f"{name}_indptr"]) - 1, len(terms)),
+            )
+            for name in ("accounts", "projects")
+        }
+        memberships: dict[int, set[int]] = defaultdict(set)
+        for account_id, project_id in arrays["memberships"]:
+            memberships[int(account_id)].add(int(project_id))
+        partnerships: dict[int, set[int]] = defaultdict(set)
+        for partner_id, project_id in arrays["partnerships"]:
+            partnerships[int(partner_id)].add(int(project_id))
+        index = cls(
+            vocabulary={term: position for position, term in enumerate(terms)},
+            idf=arrays["idf"],
+            account_ids=arrays["account_ids"],
+            accounts=matrices["accounts"],
+            project_ids=arrays["project_ids"],
+            projects=matrices["projects"],
+            partner_ids=np.empty(0, dtype=np.int64),
+            partners=sp.csr_matrix((0, len(terms))),
+            memberships=memberships,
+            partnerships=partnerships,
+        )
+        index._rebuild_partners()
+        return index
+
+
+def add_pending(connection: Connection, account_ids: Iterable[int] = (), project_ids: Iterable[int] = ()) -> None:
+    """Mark index rows as outdated within transaction of change (ids already marked are skipped)"""
+    rows = [
+        {"kind": kind, "entity_id": entity_id}
+        for kind, ids in (("account", account_ids), ("project", project_ids))
+        for entity_id in set(ids)
+        if entity_id is not None
+    ]
+    if rows:
+        connection.execute(pg_insert(RecommendationChange.__table__).on_conflict_do_nothing(), rows)
+
+
+def drain_pending(session: Session) -> tuple[set[int], set[int]]:
+    """Take outdated account and project ids (rows are deleted when caller commits, after index is saved)"""
+    accounts, projects = set(), set()
+    rows = session.execute(delete(RecommendationChange).returning(RecommendationChange.kind, RecommendationChange.entity_id))
+    for kind, entity_id in rows:
+        (accounts if kind == "account" else projects).add(entity_id)
+    return accounts, projects
+
+
+@event.listens_for(Session, "after_flush")
+def recommendation_changes_event(session: Session, flush_context):
+    account_ids, project_ids = [], []
+    for target in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(target, Profile):
+            account_ids.append(target.account_id)
+        elif isinstance(target, Account):
+            account_ids.append(target.id)
+        elif isinstance(target, Project):
+            history = inspect(target).attrs.participants.history
+            account_ids.extend(account.id for account in itertools.chain(history.added, history.deleted))
+            project_ids.append(target.id)
+        elif isinstance(target, (Publication, Dataset)):
+            # history does not trigger lazy load of collection inside flush
+            history = inspect(target).attrs.projects.history
+            project_ids.extend(project.id for project in itertools.chain(*history))
+    # Core statement on session connection, so pending ids are committed together with change
+    add_pending(session.connection(), account_ids, project_ids)
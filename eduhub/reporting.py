@@ -0,0 +1,321 @@
+"""
+Incremental build of report tables: sections are named queries over eduhub.models that are
+rendered into reports/build as CSV and LaTeX table (\\input{build/sections} includes all of them).
+
+Result of section is cached in reports/build/cache with key of compiled query and watermarks
+of its source tables (sum of table_change rows, see TableChange), so section whose tables did not
+change since previous build is rendered from cache without querying database. Sections are
+queried concurrently, each in its own read-only REPEATABLE READ transaction that reads watermarks
+and rows from the same snapshot, so cached rows always match their key.
+
+Watermarks cost writers one table_change insert (heap row, index entry and WAL) per write
+statement on tracked tables, booking requests and counter flushes included, whatever amount of
+rows statement changes. Log is compacted by every build and, so that it stays bounded between
+builds, by scheduled job (python3 -m eduhub.scripts.compact_table_changes --interval 60).
+
+results = build(engine)
+for line in report(results):
+    print(line)
+"""
+import csv
+import dataclasses
+import datetime
+import decimal
+import enum
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Sequence
+
+from sqlalchemy import Connection, Engine, Select, Table, desc, func, select, text
+from sqlalchemy.sql.util import find_tables
+
+from eduhub.models import (
+    Account, Booking, Dataset, Equipment, Laboratory, Project, Resource, project_participant, project_resource,
+)
+
+BUILD_DIRECTORY = Path(__file__).resolve().parent.parent / "reports" / "build"
+
+WATERMARKS_STATEMENT = text("SELECT table_name, sum(changes) FROM table_change GROUP BY table_name")
+
+# rows of each table are replaced by one row with their sum (watermarks stay the same)
+COMPACT_STATEMENT = text(
+    """
+    WITH removed AS (DELETE FROM table_change RETURNING table_name, changes),
+    inserted AS (
+        INSERT INTO table_change (table_name, changes)
+        SELECT table_name, sum(changes) FROM removed GROUP BY table_name
+        RETURNING id
+    )
+    SELECT (SELECT count(*) FROM removed) - (SELECT count(*) FROM inserted)
+    """
+)
+
+_LATEX_SPECIAL = {
+    "\\": r"\textbackslash{}", "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#",
+    "_": r"\_", "{": r"\{", "}": r"\}", "~": r"\textasciitilde{}", "^": r"\textasciicircum{}",
+}
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Section:
+    name: str
+    title: str
+    statement: Select
+
+    @property
+    def sources(self) -> frozenset[str]:
+        """Tables read by statement (joined inheritance tables included)"""
+        return frozenset(table.name for table in find_tables(self.statement, check_columns=True) if isinstance(table, Table))
+
+    def cache_key(self, engine: Engine, watermarks: dict[str, int]) -> str | None:
+        """Hash of query and watermarks of its tables, None when some table is not tracked"""
+        if not self.sources <= watermarks.keys():
+            return None
+        compiled = self.statement.compile(dialect=engine.dialect)
+        content = json.dumps(
+            {
+                "sql": compiled.string,
+                "parameters": compiled.params,
+                "watermarks": {name: watermarks[name] for name in sorted(self.sources)},
+            },
+            default=str,
+            sort_keys=True,
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
+
+
+@dataclasses.dataclass(slots=True)
+class SectionResult:
+    name: str
+    status: str  # cached, rendered (from cache, output was missing), queried, untracked (queried, not cacheable)
+    rows: int
+    query_seconds: float
+    seconds: float
+
+
+SECTIONS: tuple[Section, ...] = (
+    Section(
+        "laboratories",
+        "Laboratories",
+        select(
+            Laboratory.title.label("laboratory"),
+            func.count(Equipment.id.distinct()).label("equipment"),
+            func.count(Account.id.distinct()).label("accounts"),
+        )
+        .outerjoin(Equipment, (Equipment.laboratory_id == Laboratory.id) & Equipment.deleted_at.is_(None))
+        .outerjoin(Account, Account.laboratory_id == Laboratory.id)
+        .group_by(Laboratory.id)
+        .order_by(Laboratory.title, Laboratory.id),
+    ),
+    Section(
+        "equipment_status",
+        "Equipment by status",
+        select(Equipment.status, func.count().label("equipment"))
+        .where(Equipment.deleted_at.is_(None))
+        .group_by(Equipment.status)
+        .order_by(Equipment.status),
+    ),
+    Section(
+        "bookings_by_month",
+        "Bookings by month and status",
+        select(
+            func.to_char(func.date_trunc("month", Booking.start_ts), "YYYY-MM").label("month"),
+            Booking.status,
+            func.count().label("bookings"),
+        )
+        .where(Booking.deleted_at.is_(None))
+        .group_by(text("1"), Booking.status)
+        .order_by(text("1"), Booking.status),
+    ),
+    Section(
+        "top_equipment",
+        "Most booked equipment",
+        select(
+            Equipment.id.label("equipment"),
+            Laboratory.title.label("laboratory"),
+            func.count(Booking.id).label("bookings"),
+        )
+        .join(Laboratory, Laboratory.id == Equipment.laboratory_id)
+        .join(Booking, (Booking.equipment_id == Equipment.id) & Booking.deleted_at.is_(None))
+        .where(Equipment.deleted_at.is_(None))
+        .group_by(Equipment.id, Laboratory.title)
+        .order_by(desc("bookings"), Equipment.id)
+        .limit(20),
+    ),
+    Section(
+        "resources_by_type",
+        "Resources by type",
+        select(Resource.type, func.count().label("resources"))
+        .where(Resource.deleted_at.is_(None))
+        .group_by(Resource.type)
+        .order_by(Resource.type),
+    ),
+    Section(
+        "datasets",
+        "Datasets",
+        select(
+            func.count(Dataset.id).label("datasets"),
+            func.coalesce(func.sum(Dataset.size), 0).label("bytes"),
+            func.coalesce(func.sum(Dataset.rows_amount), 0).label("rows"),
+            func.coalesce(func.sum(Dataset.columns_amount), 0).label("columns"),
+        )
+        .select_from(Dataset)
+        .where(Dataset.deleted_at.is_(None)),
+    ),
+    Section(
+        "projects",
+        "Projects by status",
+        select(
+            Project.status,
+            func.count(Project.id.distinct()).label("projects"),
+            func.count(project_participant.c.account_id.distinct()).label("participants"),
+            func.count(project_resource.c.resource_id.distinct()).label("resources"),
+        )
+        .outerjoin(project_participant, project_participant.c.project_id == Project.id)
+        .outerjoin(project_resource, project_resource.c.project_id == Project.id)
+        .where(Project.deleted_at.is_(None))
+        .group_by(Project.status)
+        .order_by(Project.status),
+    ),
+)
+
+
+def read_watermarks(connection: Connection) -> dict[str, int]:
+    return {name: int(changes) for name, changes in connection.execute(WATERMARKS_STATEMENT)}
+
+
+def compact_changes(connection: Connection) -> int:
+    """Replaces rows of each table by one row with their sum, returns amount of removed rows"""
+    return connection.execute(COMPACT_STATEMENT).scalar_one()
+
+
+def _plain(value: Any) -> Any:
+    """JSON value of cell (cached and fresh rows are rendered the same way)"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def _latex(value: Any) -> str:
+    if value is None:
+        return "--"
+    return "".join(_LATEX_SPECIAL.get(character, character) for character in str(value))
+
+
+def render_csv(path: Path, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+    with path.open("w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def render_latex(path: Path, section: Section, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+    # numeric columns are right-aligned
+    alignment = " ".join(
+        "r" if all(isinstance(row[index], (int, float)) for row in rows if row[index] is not None) and rows else "l"
+        for index in range(len(columns))
+    )
+    lines = [
+        f"% generated by eduhub.reporting (section {section.name}), do not edit",
+        r"\begin{table}[h]",
+        r"\centering",
+        rf"\caption{{{_latex(section.title)}}}",
+        rf"\label{{tab:{section.name}}}",
+        rf"\begin{{tabular}}{{{alignment}}}",
+        r"\hline",
+        " & ".join(_latex(column.replace("_", " ").capitalize()) for column in columns) + r" \\",
+        r"\hline",
+        *(" & ".join(_latex(value) for value in row) + r" \\" for row in rows),
+        r"\hline",
+        r"\end{tabular}",
+        r"\end{table}",
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _build_section(engine: Engine, section: Section, output: Path, watermarks: dict[str, int], force: bool) -> SectionResult:
+    started = time.perf_counter()
+    cache_path = output / "cache" / f"{section.name}.json"
+    outputs = (output / f"{section.name}.csv", output / f"{section.name}.tex")
+    key = section.cache_key(engine, watermarks)
+    cached = json.loads(cache_path.read_text(encoding="utf-8")) if cache_path.exists() else None
+
+    if not force and key is not None and cached is not None and cached["key"] == key:
+        status = "cached"
+        columns, rows = cached["columns"], cached["rows"]
+        query_seconds = 0.0
+        if all(path.exists() for path in outputs):
+            return SectionResult(section.name, status, len(rows), query_seconds, time.perf_counter() - started)
+        status = "rendered"
+    else:
+        with engine.connect() as connection:
+            connection = connection.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+            with connection.begin():
+                snapshot_watermarks = read_watermarks(connection)
+                query_started = time.perf_counter()
+                result = connection.execute(section.statement)
+                columns = list(result.keys())
+                rows = [[_plain(value) for value in row] for row in result]
+                query_seconds = time.perf_counter() - query_started
+        key = section.cache_key(engine, snapshot_watermarks)
+        status = "queried" if key is not None else "untracked"
+        cache_path.write_text(
+            json.dumps(
+                {
+                    "key": key,
+                    "columns": columns,
+                    "rows": rows,
+                    "built_at": datetime.datetime.now(tz=datetime.UTC).isoformat(),
+                },
+                default=str,
+            ),
+            encoding="utf-8",
+        )
+
+    render_csv(outputs[0], columns, rows)
+    render_latex(outputs[1], section, columns, rows)
+    return SectionResult(section.name, status, len(rows), query_seconds, time.perf_counter() - started)
+
+
+def build(
+    engine: Engine,
+    sections: Sequence[Section] = SECTIONS,
+    output: str | Path = BUILD_DIRECTORY,
+    workers: int = 4,
+    force: bool = False,
+) -> list[SectionResult]:
+    """Render sections into output, unchanged sections are rendered from cache (force queries all of them)"""
+    output = Path(output)
+    (output / "cache").mkdir(parents=True, exist_ok=True)
+    with engine.begin() as connection:
+        compact_changes(connection)
+        watermarks = read_watermarks(connection)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(lambda section: _build_section(engine, section, output, watermarks, force), sections)
+        )
+
+    (output / "sections.tex").write_text(
+        "".join(f"\\input{{build/{section.name}}}\n" for section in sections), encoding="utf-8"
+    )
+    return results
+
+
+def report(results: Sequence[SectionResult]) -> list[str]:
+    lines = [f"{'section':<24}{'status':>11}{'rows':>8}{'query':>11}{'total':>11}"]
+    for result in results:
+        lines.append(
+            f"{result.name:<24}{result.status:>11}{result.rows:>8}"
+            f"{result.query_seconds * 1000:>9.1f}ms{result.seconds * 1000:>9.1f}ms"
+        )
+    queried = sum(result.status in ("queried", "untracked") for result in results)
+    lines.append(f"{queried} of {len(results)} sections queried")
+    return lines
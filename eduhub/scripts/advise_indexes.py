@@ -0,0 +1,273 @@
+"""
+Index advisor: finds foreign keys without index in Base.metadata and combines them
+with workload statistics (pg_stat_user_tables, pg_stat_user_indexes, pg_stat_statements)
+
+python3 -m eduhub.scripts.advise_indexes
+python3 -m eduhub.scripts.advise_indexes --accept ix_booking_requester_id ix_booking_history_booking_id
+python3 -m eduhub.scripts.advise_indexes --accept all
+"""
+import argparse
+import dataclasses
+import datetime
+import uuid
+from pathlib import Path
+
+from alembic.config import Config as AlembicConfig
+from alembic.script import ScriptDirectory
+from sqlalchemy import Connection, MetaData, Table, UniqueConstraint, create_engine, text
+
+from eduhub import Base
+from eduhub.common.config import Config
+
+MIN_LIVE_ROWS = 1_000  # smaller tables are cheaper to scan than to index
+
+
+@dataclasses.dataclass
+class Candidate:
+    table: str
+    columns: tuple[str, ...]
+    reason: str
+    seq_scan: int = 0
+    seq_tup_read: int = 0
+    n_live_tup: int = 0
+    n_distinct: float = 0.0
+    related_calls: int = 0
+
+    @property
+    def name(self) -> str:
+        return f"ix_{self.table}_{'_'.join(self.columns)}"
+
+    @property
+    def estimated_benefit(self) -> float:
+        """Rows read by sequential scans that index lookup would skip (based on column selectivity)"""
+        if self.n_distinct == 0:
+            return 0.0
+        # n_distinct in pg_stats is negative when it is fraction of total rows
+        distinct = -self.n_distinct * self.n_live_tup if self.n_distinct < 0 else self.n_distinct
+        selectivity = 1 / max(distinct, 1)
+        return self.seq_tup_read * (1 - selectivity)
+
+
+def _is_covered(table: Table, columns: tuple[str, ...]) -> bool:
+    """
+    Check that columns are leading columns of primary key, unique constraint, or index
+    (partial indexes are skipped, foreign key checks of referenced deletes cannot use them)
+    """
+    prefixes = [tuple(column.name for column in table.primary_key.columns)]
+    prefixes += [
+        tuple(column.name for column in index.columns)
+        for index in table.indexes
+        if index.dialect_options["postgresql"]["where"] is None
+    ]
+    prefixes += [
+        tuple(column.name for column in constraint.columns)
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint)
+    ]
+    prefixes += [(column.name,) for column in table.columns if column.unique or column.index]
+    return any(prefix[:len(columns)] == columns for prefix in prefixes)
+
+
+def unindexed_foreign_keys(metadata: MetaData) -> list[Candidate]:
+    candidates = []
+    for table in metadata.sorted_tables:
+        if table.schema is not None:
+            # statistics below are read for public schema only
+            continue
+        for foreign_key in table.foreign_key_constraints:
+            columns = tuple(column.name for column in foreign_key.columns)
+            if not _is_covered(table, columns):
+                candidates.append(
+                    Candidate(
+                        table=table.name,
+                        columns=columns,
+                        reason=f"foreign key to {foreign_key.referred_table.name}",
+                    )
+                )
+    return candidates
+
+
+def has_pg_stat_statements(connection: Connection) -> bool:
+    return connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements')")
+    ).scalar_one()
+
+
+def collect_statistics(connection: Connection, candidates: list[Candidate]) -> None:
+    tables = {
+        row.relname: row
+        for row in connection.execute(
+            text("SELECT relname, seq_scan, seq_tup_read, n_live_tup FROM pg_stat_user_tables")
+        )
+    }
+    distinct = {
+        (row.tablename, row.attname): row.n_distinct
+        for row in connection.execute(
+            text("SELECT tablename, attname, n_distinct FROM pg_stats WHERE schemaname = 'public'")
+        )
+    }
+    statements = []
+    if has_pg_stat_statements(connection):
+        statements = connection.execute(text("SELECT query, calls FROM pg_stat_statements")).all()
+
+    for candidate in candidates:
+        stats = tables.get(candidate.table)
+        if stats is not None:
+            candidate.seq_scan = stats.seq_scan or 0
+            candidate.seq_tup_read = stats.seq_tup_read or 0
+            candidate.n_live_tup = stats.n_live_tup or 0
+        candidate.n_distinct = distinct.get((candidate.table, candidate.columns[0]), 0.0)
+        candidate.related_calls = sum(
+            calls
+            for query, calls in statements
+            if candidate.table in query and all(column in query for column in candidate.columns)
+        )
+
+
+def report_seq_scan_hotspots(connection: Connection, limit: int = 10) -> None:
+    rows = connection.execute(
+        text(
+            "SELECT relname, seq_scan, seq_tup_read, coalesce(idx_scan, 0) AS idx_scan, n_live_tup "
+            "FROM pg_stat_user_tables "
+            "WHERE seq_scan > coalesce(idx_scan, 0) AND n_live_tup >= :min_live_rows "
+            "ORDER BY seq_tup_read DESC LIMIT :limit"
+        ),
+        {"min_live_rows": MIN_LIVE_ROWS, "limit": limit},
+    ).all()
+    print("\nSequential scan hotspots:")
+    print(f"{'table':<24}{'seq_scan':>12}{'seq_tup_read':>16}{'idx_scan':>12}{'live rows':>12}")
+    for row in rows:
+        print(f"{row.relname:<24}{row.seq_scan:>12}{row.seq_tup_read:>16}{row.idx_scan:>12}{row.n_live_tup:>12}")
+
+
+def report_unused_indexes(connection: Connection) -> None:
+    rows = connection.execute(
+        text(
+            "SELECT s.relname, s.indexrelname, s.idx_scan, pg_relation_size(s.indexrelid) AS size "
+            "FROM pg_stat_user_indexes AS s "
+            "JOIN pg_index AS i ON i.indexrelid = s.indexrelid "
+            "WHERE s.idx_scan = 0 AND NOT i.indisunique AND NOT i.indisprimary "
+            "ORDER BY size DESC"
+        )
+    ).all()
+    print("\nUnused indexes (idx_scan = 0 since last statistics reset):")
+    for row in rows:
+        print(f"{row.relname:<24}{row.indexrelname:<48}{row.size:>12} bytes")
+
+
+def report_hot_statements(connection: Connection, limit: int = 10) -> None:
+    if not has_pg_stat_statements(connection):
+        print("\npg_stat_statements extension is not installed, hot statements are skipped")
+        return
+    rows = connection.execute(
+        text(
+            "SELECT calls, total_exec_time, mean_exec_time, query FROM pg_stat_statements "
+            "ORDER BY total_exec_time DESC LIMIT :limit"
+        ),
+        {"limit": limit},
+    ).all()
+    print("\nHot statements (by total execution time):")
+    for row in rows:
+        query = " ".join(row.query.split())[:100]
+        print(f"{row.calls:>10} calls {row.total_exec_time:>12.1f}ms total {row.mean_exec_time:>10.3f}ms mean  {query}")
+
+
+def report_candidates(candidates: list[Candidate]) -> None:
+    print("\nCandidate indexes (unindexed foreign keys):")
+    print(f"{'index':<44}{'reason':<32}{'seq_tup_read':>14}{'calls':>10}{'benefit':>14}")
+    for candidate in candidates:
+        print(
+            f"{candidate.name:<44}{candidate.reason:<32}{candidate.seq_tup_read:>14}"
+            f"{candidate.related_calls:>10}{candidate.estimated_benefit:>14.0f}"
+        )
+
+
+def emit_migration(candidates: list[Candidate], alembic_ini: str = "alembic.ini") -> Path:
+    """Write alembic revision creating accepted indexes concurrently"""
+    script_directory = ScriptDirectory.from_config(AlembicConfig(alembic_ini))
+    down_revision = script_directory.get_current_head()
+    revision = uuid.uuid4().hex[:12]
+    now = datetime.datetime.now()
+    slug = "advised_foreign_key_indexes"
+    path = Path(script_directory.versions) / f"{now:%Y_%m_%d_%H%M}-{revision}_{slug}.py"
+
+    upgrades = "\n    ".join(
+        f"create_index_concurrently({candidate.name!r}, {candidate.table!r}, {list(candidate.columns)!r})"
+        for candidate in candidates
+    )
+    downgrades = "\n    ".join(
+        f"drop_index_concurrently({candidate.name!r}, {candidate.table!r})"
+        for candidate in reversed(candidates)
+    )
+    path.write_text(
+        f'''"""advised foreign key indexes
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {now}
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from eduhub.common.migration import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = {revision!r}
+down_revision: Union[str, Sequence[str], None] = {down_revision!r}
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    {upgrades}
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    {downgrades}
+'''
+    )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Missing-index and hot-query advisor")
+    parser.add_argument(
+        "--accept",
+        nargs="+",
+        default=[],
+        help="names of candidate indexes (or 'all') to emit as alembic migration",
+    )
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    engine = create_engine(config.postgres_url())
+    candidates = unindexed_foreign_keys(Base.metadata)
+    with engine.connect() as connection:
+        collect_statistics(connection, candidates)
+        report_seq_scan_hotspots(connection)
+        report_unused_indexes(connection)
+        report_hot_statements(connection)
+    candidates.sort(key=lambda candidate: candidate.estimated_benefit, reverse=True)
+    report_candidates(candidates)
+
+    if args.accept:
+        accepted = [
+            candidate
+            for candidate in candidates
+            if "all" in args.accept or candidate.name in args.accept
+        ]
+        if not accepted:
+            print("\nNone of accepted names matches candidates, migration is not emitted")
+            return
+        path = emit_migration(accepted)
+        print(f"\nMigration written to {path}")
+        print("Declare the same indexes in eduhub.models (index=True or Index(...)) to keep autogenerate in sync")
+
+
+if __name__ == "__main__":
+    main()
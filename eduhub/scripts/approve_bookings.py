@@ -0,0 +1,39 @@
+import time
+
+from sqlalchemy import select
+
+from eduhub.approval import RuleTimings, bulk_approve
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.common.types import BookingStatus
+from eduhub.models import Booking
+
+
+def main():
+    config = Config.load_from_env()
+    timings = RuleTimings()
+    with get_session(config.postgres_url()) as session:
+        booking_ids = session.execute(
+            select(Booking.id).where(Booking.status == BookingStatus.REQUESTED)
+        ).scalars().all()
+        started = time.perf_counter()
+        decisions = bulk_approve(session, booking_ids, timings)
+        session.commit()
+        elapsed = time.perf_counter() - started
+
+    awaiting = sum(decision.pending_step is not None for decision in decisions)
+    approved = sum(decision.allowed for decision in decisions) - awaiting
+    print(
+        f"Evaluated {len(decisions)} bookings in {elapsed:.3f}s: {approved} approved, "
+        f"{awaiting} awaiting approval steps, {len(decisions) - approved - awaiting} rejected"
+    )
+    for decision in decisions:
+        if not decision.allowed:
+            print(f"booking {decision.booking_id} rejected: {', '.join(decision.violations)}")
+        elif decision.pending_step is not None:
+            print(f"booking {decision.booking_id} awaits approval step of {decision.pending_step.value}")
+    timings.report()
+
+
+if __name__ == "__main__":
+    main()
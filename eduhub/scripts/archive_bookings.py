@@ -0,0 +1,107 @@
+"""
+Move closed bookings older than cutoff into compressed archive, with hot table sizes and latency
+of active booking queries measured before and after:
+
+python3 -m eduhub.scripts.archive_bookings --older-than-days 365 --format jsonl
+python3 -m eduhub.scripts.archive_bookings --older-than-days 365 --vacuum-full  # rewrite hot tables to return space
+"""
+import argparse
+import datetime
+import random
+import statistics
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from eduhub.archive import ARCHIVE_DIRECTORY, archive
+from eduhub.booking import overlapping
+from eduhub.common.config import Config
+
+HOT_TABLES = ("booking", "booking_history", "booking_snapshot")
+
+SIZES_STATEMENT = text(
+    """
+    SELECT relname, pg_table_size(oid) AS heap, pg_indexes_size(oid) AS indexes
+    FROM pg_class WHERE relname = ANY(:tables) AND relnamespace = 'public'::regnamespace
+    """
+)
+
+SCHEDULE_STATEMENT = text(
+    "SELECT id FROM booking WHERE equipment_id = :equipment_id AND deleted_at IS NULL ORDER BY start_ts DESC LIMIT 20"
+)
+
+
+def sizes(engine) -> dict[str, tuple[int, int]]:
+    with engine.connect() as connection:
+        return {row.relname: (row.heap, row.indexes) for row in connection.execute(SIZES_STATEMENT, {"tables": list(HOT_TABLES)})}
+
+
+def latencies(engine, probes: int) -> dict[str, float]:
+    """Median latency of active booking path: overlap check of new request and recent schedule of equipment"""
+    with Session(engine) as session:
+        equipment_ids = session.execute(text("SELECT id FROM equipment WHERE deleted_at IS NULL")).scalars().all()
+        if not equipment_ids:
+            return {}
+        now = datetime.datetime.now(tz=datetime.UTC)
+        samples = {"overlap check": [], "equipment schedule": []}
+        for _ in range(probes):
+            equipment_id = random.choice(equipment_ids)
+            started = time.perf_counter()
+            overlapping(session, equipment_id, now, now + datetime.timedelta(hours=2))
+            samples["overlap check"].append(time.perf_counter() - started)
+            started = time.perf_counter()
+            session.execute(SCHEDULE_STATEMENT, {"equipment_id": equipment_id}).all()
+            samples["equipment schedule"].append(time.perf_counter() - started)
+        return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def vacuum(engine, full: bool) -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table in HOT_TABLES:
+            connection.execute(text(f"VACUUM ({'FULL, ' if full else ''}ANALYZE) {table}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed bookings into compressed segments")
+    parser.add_argument("--older-than-days", type=int, default=365)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--directory", default=str(ARCHIVE_DIRECTORY))
+    parser.add_argument("--probes", type=int, default=200, help="queries per latency measurement")
+    parser.add_argument("--pause", type=float, default=0.0)
+    parser.add_argument("--vacuum-full", action="store_true", help="VACUUM FULL hot tables after archiving (exclusive lock)")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    engine = create_engine(config.postgres_url())
+    vacuum(engine, full=False)
+    sizes_before, latency_before = sizes(engine), latencies(engine, args.probes)
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        stats = archive(session, datetime.timedelta(days=args.older_than_days), args.batch_size, Path(args.directory), args.format, args.pause)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Archived {stats.bookings} bookings with {stats.history_rows} history rows into {stats.segments} segments "
+        f"in {elapsed:.1f}s: {stats.raw_bytes / 2**20:.1f} MiB of JSON stored as {stats.stored_bytes / 2**20:.1f} MiB ({stats.ratio:.1f}x)"
+    )
+
+    # plain VACUUM makes space reusable for new rows, only VACUUM FULL (or pg_repack) returns it to disk
+    vacuum(engine, full=args.vacuum_full)
+    sizes_after, latency_after = sizes(engine), latencies(engine, args.probes)
+    for table in HOT_TABLES:
+        (heap_before, indexes_before), (heap_after, indexes_after) = sizes_before.get(table, (0, 0)), sizes_after.get(table, (0, 0))
+        print(
+            f"{table}: heap {heap_before / 2**20:.1f} -> {heap_after / 2**20:.1f} MiB, "
+            f"indexes {indexes_before / 2**20:.1f} -> {indexes_after / 2**20:.1f} MiB"
+        )
+    for name, before in latency_before.items():
+        after = latency_after[name]
+        print(f"{name}: median {before * 1000:.2f}ms -> {after * 1000:.2f}ms ({1 - after / before:.0%} less)")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Per-hit UPDATE of hot counter rows against write-behind counters (eduhub.counters):
+
+python3 -m eduhub.scripts.benchmark_counters --hits 20000 --workers 8 --rows 10
+"""
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+
+from eduhub.common.config import Config
+from eduhub.counters import WriteBehindCounters
+
+DIRECT_STATEMENT = text("UPDATE equipment SET view_count = view_count + 1 WHERE id = :id")
+
+
+def setup(engine, rows: int, posts: int) -> tuple[list[int], int, list[str]]:
+    """Equipment rows and profile with posts, all counters start from zero"""
+    slugs = [f"benchmark-counters-{index}" for index in range(posts)]
+    with engine.begin() as connection:
+        laboratory_id = connection.execute(
+            text("INSERT INTO laboratory (title) VALUES ('benchmark_counters') RETURNING id")
+        ).scalar_one()
+        equipment_ids = connection.execute(
+            text(
+                "INSERT INTO equipment (status, laboratory_id) "
+                "SELECT 'ACTIVE', :laboratory_id FROM generate_series(1, :amount) RETURNING id"
+            ),
+            {"laboratory_id": laboratory_id, "amount": rows},
+        ).scalars().all()
+        account_id = connection.execute(
+            text(
+                "INSERT INTO account (full_name, email, role, laboratory_id) "
+                "VALUES ('benchmark_counters', 'benchmark_counters_' || gen_random_uuid() || '@example.com', 'STAFF', :laboratory_id) "
+                "RETURNING id"
+            ),
+            {"laboratory_id": laboratory_id},
+        ).scalar_one()
+        profile_id = connection.execute(
+            text(
+                "INSERT INTO profile (interest_areas, posts, account_id) "
+                "VALUES ('{}', CAST(:posts AS jsonb), :account_id) RETURNING id"
+            ),
+            {"posts": json.dumps([{"slug": slug, "content": "", "tags": [], "views": 0} for slug in slugs]), "account_id": account_id},
+        ).scalar_one()
+    return sorted(equipment_ids), profile_id, slugs
+
+
+def skewed(ids: list, hits: int) -> list:
+    """Zipf-like traffic, first row is the hottest"""
+    return random.choices(ids, weights=[1 / (rank + 1) for rank in range(len(ids))], k=hits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-hit counter updates with write-behind aggregation")
+    parser.add_argument("--hits", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=10, help="hot equipment rows")
+    parser.add_argument("--posts", type=int, default=5)
+    parser.add_argument("--flush-interval", type=float, default=0.2)
+    parser.add_argument("--spill", default=None, help="spill file of write-behind counters")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    engine = create_engine(config.postgres_url(), pool_size=args.workers, max_overflow=2)
+    equipment_ids, profile_id, slugs = setup(engine, args.rows, args.posts)
+    traffic = skewed(equipment_ids, args.hits)
+
+    def direct(equipment_id: int) -> None:
+        with engine.begin() as connection:
+            connection.execute(DIRECT_STATEMENT, {"id": equipment_id})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(direct, traffic))
+    direct_elapsed = time.perf_counter() - started
+    print(f"per-hit UPDATE: {args.hits} hits in {direct_elapsed:.2f}s ({args.hits / direct_elapsed:.0f} hits/s, {args.hits} statements)")
+
+    counters = WriteBehindCounters(engine, flush_interval=args.flush_interval, spill_path=args.spill)
+    counters.recover()
+    counters.start()
+    post_traffic = skewed(slugs, args.hits)
+
+    def buffered(index: int) -> None:
+        counters.add("equipment_views", traffic[index])
+        counters.add("post_views", (profile_id, post_traffic[index]))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(buffered, range(args.hits)))
+    accepted = time.perf_counter() - started
+    counters.stop()
+    buffered_elapsed = time.perf_counter() - started
+    print(
+        f"write-behind: {args.hits} hits accepted in {accepted:.3f}s ({args.hits / accepted:.0f} hits/s), "
+        f"flushed in {buffered_elapsed:.2f}s ({counters.metrics.flushes} flushes)"
+    )
+    for line in counters.report():
+        print(line)
+
+    with engine.connect() as connection:
+        counts = dict(
+            connection.execute(
+                text("SELECT id, view_count FROM equipment WHERE id = ANY(:ids)"), {"ids": equipment_ids}
+            ).all()
+        )
+        views = dict(
+            connection.execute(
+                text(
+                    "SELECT post ->> 'slug', (post ->> 'views')::bigint "
+                    "FROM profile, jsonb_array_elements(posts) AS post WHERE profile.id = :id"
+                ),
+                {"id": profile_id},
+            ).all()
+        )
+    engine.dispose()
+    expected = {equipment_id: 2 * traffic.count(equipment_id) for equipment_id in equipment_ids}
+    if counts != expected or views != {slug: post_traffic.count(slug) for slug in slugs}:
+        raise AssertionError("write-behind counters lost or duplicated increments")
+    print("equipment and post view counts match hits")
+
+
+if __name__ == "__main__":
+    main()
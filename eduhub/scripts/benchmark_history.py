@@ -0,0 +1,122 @@
+import argparse
+import datetime
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.history import booking_as_of, equipment_bookings_as_of, take_snapshots_batch
+from eduhub.models import Booking
+
+
+def setup(session, bookings: int, changes: int, snapshot_every: int) -> tuple[int, list[int], datetime.datetime]:
+    """
+    Equipment with bookings whose comment was changed every minute (revision n at base + n minutes),
+    with snapshots taken by periodic job after every snapshot_every changes
+    """
+    laboratory_id = session.execute(text("INSERT INTO laboratory (title) VALUES ('benchmark_history') RETURNING id")).scalar_one()
+    account_id = session.execute(
+        text(
+            "INSERT INTO account (full_name, email, role, laboratory_id) "
+            "VALUES ('benchmark_history', 'benchmark_history_' || gen_random_uuid() || '@example.com', 'STAFF', :laboratory_id) "
+            "RETURNING id"
+        ),
+        {"laboratory_id": laboratory_id},
+    ).scalar_one()
+    equipment_id = session.execute(
+        text("INSERT INTO equipment (status, laboratory_id) VALUES ('ACTIVE', :laboratory_id) RETURNING id"),
+        {"laboratory_id": laboratory_id},
+    ).scalar_one()
+    base = session.execute(text("SELECT now() - make_interval(mins => :changes + 1)"), {"changes": changes}).scalar_one()
+
+    objects = [
+        Booking(
+            equipment_id=equipment_id,
+            requester_id=account_id,
+            approver_id=account_id,
+            start_ts=base + datetime.timedelta(days=index),
+            end_ts=base + datetime.timedelta(days=index, hours=1),
+            comment="revision 0",
+        )
+        for index in range(bookings)
+    ]
+    session.add_all(objects)
+    session.flush()
+    booking_ids = [booking.id for booking in objects]
+    # insert events are written with current time, move them to start of synthetic history
+    session.execute(text("UPDATE booking_history SET changed_at = :base WHERE booking_id = ANY(:ids)"), {"base": base, "ids": booking_ids})
+
+    for first in range(1, changes + 1, snapshot_every):
+        last = min(first + snapshot_every - 1, changes)
+        session.execute(
+            text(
+                "INSERT INTO booking_history (booking_id, changed_at, note, operation, changes) "
+                "SELECT booking_id, :base + make_interval(mins => n), 'Updated fields: comment', 'UPDATE', "
+                "jsonb_build_object('comment', jsonb_build_array('revision ' || (n - 1), 'revision ' || n)) "
+                "FROM unnest(CAST(:ids AS integer[])) AS booking_id, generate_series(:first, :last) AS n "
+                "ORDER BY n, booking_id"
+            ),
+            {"base": base, "ids": booking_ids, "first": first, "last": last},
+        )
+        session.execute(
+            text("UPDATE booking SET comment = 'revision ' || :last WHERE id = ANY(:ids)"), {"last": last, "ids": booking_ids}
+        )
+        while take_snapshots_batch(session, snapshot_every, len(booking_ids)):
+            pass
+    session.execute(text("ANALYZE booking_history, booking_snapshot"))
+    return equipment_id, booking_ids, base
+
+
+def measure(function, arguments: list) -> float:
+    timings = []
+    for argument in arguments:
+        started = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare as-of reads from snapshots plus deltas with full replay (changes are rolled back)")
+    parser.add_argument("--bookings", type=int, default=20)
+    parser.add_argument("--changes", type=int, default=5000, help="changes per booking")
+    parser.add_argument("--snapshot-every", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=50)
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    with get_session(config.postgres_url()) as session:
+        started = time.perf_counter()
+        equipment_id, booking_ids, base = setup(session, args.bookings, args.changes, args.snapshot_every)
+        print(f"Built {args.bookings} bookings with {args.changes} changes each in {time.perf_counter() - started:.2f}s")
+
+        revisions = [random.randint(0, args.changes) for _ in range(args.reads)]
+        points = [(revision, base + datetime.timedelta(minutes=revision, seconds=30)) for revision in revisions]
+        for revision, at in points[:10]:
+            expected = f"revision {revision}"
+            for use_snapshots in (True, False):
+                record = booking_as_of(session, booking_ids[0], at, use_snapshots)
+                if record is None or record.comment != expected:
+                    raise AssertionError(f"booking as of {at} (snapshots={use_snapshots}) is not {expected}")
+            schedule = equipment_bookings_as_of(session, [equipment_id], at)
+            if [record.comment for record in schedule] != [expected] * len(booking_ids):
+                raise AssertionError(f"schedule of equipment as of {at} is not {expected}")
+
+        for label, function in (
+            ("booking", lambda point, use_snapshots: booking_as_of(session, booking_ids[0], point[1], use_snapshots)),
+            ("equipment schedule", lambda point, use_snapshots: equipment_bookings_as_of(session, [equipment_id], point[1], use_snapshots=use_snapshots)),
+        ):
+            snapshots = measure(lambda point: function(point, True), points)
+            replay = measure(lambda point: function(point, False), points)
+            print(
+                f"  {label:<20} snapshots+deltas={snapshots * 1000:9.2f}ms full replay={replay * 1000:9.2f}ms "
+                f"speedup={replay / snapshots:6.1f}x"
+            )
+        session.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Per-call latency of hot lookups: plain select() built on every call (compile cache is used, but
+statement and its cache key are built again), lambda statements, and lambda statements prepared on server:
+
+python3 -m eduhub.scripts.benchmark_hot_queries --calls 2000 --prepare-threshold 0
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from eduhub.common.config import Config
+from eduhub.hotqueries import HotQueries, create_hot_engine
+from eduhub.models import Account, Booking, Equipment
+
+
+def sample(session: Session, limit: int) -> dict[str, list]:
+    """Existing keys of each lookup (calls cycle through them)"""
+    return {
+        "booking_by_id": session.execute(text("SELECT id FROM booking ORDER BY id LIMIT :limit"), {"limit": limit}).scalars().all(),
+        "equipment_by_laboratory": session.execute(text("SELECT id FROM laboratory ORDER BY id LIMIT :limit"), {"limit": limit}).scalars().all(),
+        "account_by_email": session.execute(text("SELECT email FROM account ORDER BY id LIMIT :limit"), {"limit": limit}).scalars().all(),
+    }
+
+
+PLAIN = {
+    "booking_by_id": lambda key: select(Booking).where(Booking.id == key, Booking.deleted_at.is_(None)),
+    "equipment_by_laboratory": lambda key: select(Equipment)
+    .where(Equipment.laboratory_id == key, Equipment.deleted_at.is_(None))
+    .order_by(Equipment.id),
+    "account_by_email": lambda key: select(Account).where(Account.email == key),
+}
+
+PARAMETER = {"booking_by_id": "booking_id", "equipment_by_laboratory": "laboratory_id", "account_by_email": "email"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure compile cache and prepared statement savings of hot lookups")
+    parser.add_argument("--calls", type=int, default=2000, help="calls per lookup and mode")
+    parser.add_argument("--keys", type=int, default=100, help="distinct keys per lookup")
+    parser.add_argument("--prepare-threshold", type=int, default=0)
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    modes = {
+        # every call builds select() and its cache key, server parses and plans it
+        "plain": create_hot_engine(config.postgres_url(), prepare_threshold=None, pool_size=1),
+        "compiled": create_hot_engine(config.postgres_url(), prepare_threshold=None, pool_size=1),
+        "prepared": create_hot_engine(config.postgres_url(), prepare_threshold=args.prepare_threshold, pool_size=1),
+    }
+    with Session(modes["compiled"]) as session:
+        keys = sample(session, args.keys)
+
+    medians: dict[tuple[str, str], float] = {}
+    for mode, engine in modes.items():
+        hot = HotQueries(engine)
+        with Session(engine) as session:
+            for name, values in keys.items():
+                if not values:
+                    print(f"{name}: no rows to look up, run insert_fake_data first")
+                    continue
+                for index in range(args.calls):
+                    key = values[index % len(values)]
+                    if mode == "plain":
+                        started = time.perf_counter()
+                        # same execution options as HotQueries, so only building of statement differs
+                        session.execute(PLAIN[name](key), execution_options={"include_deleted": True}).scalars().all()
+                        hot.metrics[name].latencies.append(time.perf_counter() - started)
+                        hot.metrics[name].calls += 1
+                    else:
+                        hot.execute(session, name, **{PARAMETER[name]: key})
+                    # identity map would turn repeated lookups into no-op object merges
+                    session.expunge_all()
+                medians[mode, name] = statistics.median(hot.metrics[name].latencies)
+            print(f"{mode}:")
+            for line in hot.report(session.connection()):
+                print(f"  {line}")
+        engine.dispose()
+
+    for name in keys:
+        if ("plain", name) in medians:
+            plain = medians["plain", name]
+            print(
+                f"{name}: median {plain * 1e6:.0f}us plain, "
+                f"{medians['compiled', name] * 1e6:.0f}us compiled ({1 - medians['compiled', name] / plain:.0%} less), "
+                f"{medians['prepared', name] * 1e6:.0f}us prepared ({1 - medians['prepared', name] / plain:.0%} less)"
+            )
+
+
+if __name__ == "__main__":
+    main()
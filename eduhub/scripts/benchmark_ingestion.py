@@ -0,0 +1,120 @@
+import argparse
+import contextlib
+import datetime
+import random
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from eduhub import recommendations, similarity  # flush listeners must be registered before any path is timed
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.ingestion import SUBTYPES, ingest_batch
+from eduhub.models import Project
+
+WORDS = "data model graph sensor signal network laboratory energy climate protein image speech robot".split()
+
+
+def _text(amount: int) -> str:
+    return " ".join(random.choices(WORDS, k=amount))
+
+
+def generate(amount: int, project_ids: list[int]) -> list[dict]:
+    """Mixed records of every resource subtype"""
+    now = datetime.datetime.now(tz=datetime.UTC)
+    specific = {
+        "presentation": lambda: {"duration": random.randint(1, 10**4), "subtitles": [{"language_code": "en", "content": _text(20)}]},
+        "report": lambda: {"start": now, "end": now + datetime.timedelta(days=7), "responsibility_zone": _text(10), "comments": _text(10)},
+        "publication": lambda: {"keywords": random.sample(WORDS, 3), "publisher": _text(2)},
+        "software_repository": lambda: {"license": "MIT", "lines_amount": random.randint(1, 10**5)},
+        "dataset": lambda: {"license": "CC-BY-4.0", "tags": random.sample(WORDS, 3), "size": random.randint(1, 10**9)},
+    }
+    records = []
+    for index in range(amount):
+        identity = random.choice(list(SUBTYPES))
+        records.append(
+            {
+                "type": identity,
+                "title": f"{_text(3)} {index}",
+                "description": _text(30),
+                "link": f"https://example.com/resources/{index}",
+                "project_ids": random.sample(project_ids, min(2, len(project_ids))),
+                **specific[identity](),
+            }
+        )
+    return records
+
+
+@contextlib.contextmanager
+def _index_listeners(enabled: bool):
+    """ORM path without flush listeners of similarity and recommendation indexes (same as bulk paths with index=False)"""
+    listeners = (similarity.similarity_index_event, recommendations.recommendation_changes_event)
+    if not enabled:
+        for listener in listeners:
+            event.remove(Session, "after_flush", listener)
+    try:
+        yield
+    finally:
+        if not enabled:
+            for listener in listeners:
+                event.listen(Session, "after_flush", listener)
+
+
+def orm_path(session, records: list[dict], batch_size: int, index: bool) -> None:
+    with _index_listeners(index):
+        _orm_batches(session, records, batch_size)
+
+
+def _orm_batches(session, records: list[dict], batch_size: int) -> None:
+    projects = {project.id: project for project in session.scalars(select(Project))}
+    for offset in range(0, len(records), batch_size):
+        session.add_all(
+            SUBTYPES[record["type"]](
+                **{key: value for key, value in record.items() if key not in ("type", "project_ids")},
+                projects=[projects[project_id] for project_id in record["project_ids"]],
+            )
+            for record in records[offset:offset + batch_size]
+        )
+        session.flush()
+        session.expunge_all()
+        projects = {project.id: project for project in session.scalars(select(Project))}
+
+
+def bulk_path(session, records: list[dict], batch_size: int, method: str, index: bool) -> None:
+    for offset in range(0, len(records), batch_size):
+        ingest_batch(session, records[offset:offset + batch_size], method, index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ORM and bulk ingestion of mixed resources (changes are rolled back)")
+    parser.add_argument("--amount", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--no-index", action="store_true", help="skip similarity and recommendation index updates in every path")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    with get_session(config.postgres_url()) as session:
+        project_ids = session.scalars(select(Project.id).limit(20)).all()
+        records = generate(args.amount, project_ids)
+        session.rollback()
+
+        paths = {
+            "orm": lambda: orm_path(session, records, args.batch_size, not args.no_index),
+            "insertmanyvalues": lambda: bulk_path(session, records, args.batch_size, "values", not args.no_index),
+            "copy": lambda: bulk_path(session, records, args.batch_size, "copy", not args.no_index),
+        }
+        timings = {}
+        for name, path in paths.items():
+            started = time.perf_counter()
+            path()
+            timings[name] = time.perf_counter() - started
+            session.rollback()
+            print(
+                f"{name:<18} {timings[name]:8.2f}s {args.amount / timings[name]:10.0f} resources/s "
+                f"speedup={timings['orm'] / timings[name]:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
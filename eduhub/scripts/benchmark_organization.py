@@ -0,0 +1,135 @@
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.common.types import OrganizationUnitKind
+from eduhub.models import OrganizationUnit
+from eduhub.organization import ancestors, rollup, rollup_recursive, subtree
+
+
+def deep_tree(session, depth: int) -> tuple[OrganizationUnit, list[OrganizationUnit]]:
+    """Chain of units (worst case for recursive walk)"""
+    root = OrganizationUnit(title="Deep university", kind=OrganizationUnitKind.UNIVERSITY)
+    units = [root]
+    for level in range(1, depth):
+        units.append(OrganizationUnit(title=f"Unit {level}", kind=OrganizationUnitKind.DEPARTMENT, parent=units[-1]))
+    session.add_all(units)
+    session.flush()
+    return root, units
+
+
+def wide_tree(session, faculties: int, departments: int) -> tuple[OrganizationUnit, list[OrganizationUnit]]:
+    """University with many faculties and departments (typical shape, many leaves)"""
+    root = OrganizationUnit(title="Wide university", kind=OrganizationUnitKind.UNIVERSITY)
+    units = [root]
+    for faculty_index in range(faculties):
+        faculty = OrganizationUnit(title=f"Faculty {faculty_index}", kind=OrganizationUnitKind.FACULTY, parent=root)
+        units.append(faculty)
+        units.extend(
+            OrganizationUnit(title=f"Department {faculty_index}.{index}", kind=OrganizationUnitKind.DEPARTMENT, parent=faculty)
+            for index in range(departments)
+        )
+    session.add_all(units)
+    session.flush()
+    return root, units
+
+
+def populate(session, unit_ids: list[int], per_unit: int) -> None:
+    """One laboratory per unit with per_unit equipment, accounts, and projects"""
+    session.execute(
+        text(
+            "INSERT INTO laboratory (title, organization_unit_id) "
+            "SELECT 'Laboratory ' || unit_id, unit_id FROM unnest(CAST(:unit_ids AS integer[])) AS unit_id"
+        ),
+        {"unit_ids": unit_ids},
+    )
+    laboratory_ids = "SELECT id FROM laboratory WHERE organization_unit_id = ANY(:unit_ids)"
+    for statement in (
+        "INSERT INTO equipment (status, laboratory_id) "
+        f"SELECT 'ACTIVE', laboratory.id FROM ({laboratory_ids}) AS laboratory, generate_series(1, :amount)",
+        "INSERT INTO account (full_name, email, role, laboratory_id) "
+        "SELECT 'Benchmark person', 'benchmark_' || laboratory.id || '_' || n || '@example.com', 'STUDENT', laboratory.id "
+        f"FROM ({laboratory_ids}) AS laboratory, generate_series(1, :amount) AS n",
+        "INSERT INTO project (title, type, status, laboratory_id) "
+        "SELECT 'Project ' || n, 'RESEARCH', 'ACTIVE', laboratory.id "
+        f"FROM ({laboratory_ids}) AS laboratory, generate_series(1, :amount) AS n",
+    ):
+        session.execute(text(statement), {"unit_ids": unit_ids, "amount": per_unit})
+    session.execute(text("ANALYZE organization_unit, organization_closure, laboratory, equipment, account, project"))
+
+
+def measure(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def compare(session, name: str, root: OrganizationUnit, units: list[OrganizationUnit], repeat: int) -> None:
+    leaf = units[-1]
+    checks = {
+        "root rollup": ([root.id],),
+        "leaf rollup": ([leaf.id],),
+        "all units rollup": (None,),
+    }
+    print(f"{name}: {len(units)} units")
+    for label, arguments in checks.items():
+        closure_result = rollup(session, *arguments)
+        recursive_result = rollup_recursive(session, *arguments)
+        if closure_result != recursive_result:
+            raise AssertionError(f"{name} {label}: closure rollup differs from recursive rollup")
+        closure_time = measure(lambda: rollup(session, *arguments), repeat)
+        recursive_time = measure(lambda: rollup_recursive(session, *arguments), repeat)
+        print(
+            f"  {label:<18} closure={closure_time * 1000:9.2f}ms recursive={recursive_time * 1000:9.2f}ms "
+            f"speedup={recursive_time / closure_time:6.1f}x"
+        )
+    print(f"  subtree of root    {measure(lambda: subtree(session, root.id), repeat) * 1000:9.2f}ms")
+    print(f"  ancestors of leaf  {measure(lambda: ancestors(session, leaf.id), repeat) * 1000:9.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare closure-table rollups with recursive CTE (changes are rolled back)")
+    parser.add_argument("--depth", type=int, default=200)
+    parser.add_argument("--faculties", type=int, default=50)
+    parser.add_argument("--departments", type=int, default=40)
+    parser.add_argument("--per-unit", type=int, default=5, help="equipment, accounts, and projects per laboratory")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    with get_session(config.postgres_url()) as session:
+        trees = {}
+        for name, build in (
+            ("deep", lambda: deep_tree(session, args.depth)),
+            ("wide", lambda: wide_tree(session, args.faculties, args.departments)),
+        ):
+            started = time.perf_counter()
+            trees[name] = build()
+            print(f"Built {name} tree with closure maintenance in {time.perf_counter() - started:.2f}s")
+        for root, units in trees.values():
+            populate(session, [unit.id for unit in units], args.per_unit)
+
+        for name, (root, units) in trees.items():
+            compare(session, name, root, units, args.repeat)
+
+        # moving subtree rewrites only closure rows of moved units
+        deep_root, deep_units = trees["deep"]
+        wide_root, _ = trees["wide"]
+        started = time.perf_counter()
+        deep_units[len(deep_units) // 2].parent = wide_root
+        session.flush()
+        print(f"Moved half of deep tree under wide university in {(time.perf_counter() - started) * 1000:.2f}ms")
+        if rollup(session, [wide_root.id]) != rollup_recursive(session, [wide_root.id]):
+            raise AssertionError("closure table is inconsistent after move")
+        session.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import select
+
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.models import Booking, Dataset, Equipment
+from eduhub.readmodels import fetch, read_model, statement_for, to_dicts
+
+MODELS = (Booking, Equipment, Dataset)
+
+
+def orm_entities(session, model, limit):
+    return session.scalars(select(model).limit(limit)).all()
+
+
+def orm_entity_dicts(session, model, limit):
+    keys = [prop.key for prop in model.__mapper__.column_attrs]
+    return [{key: getattr(entity, key) for key in keys} for entity in orm_entities(session, model, limit)]
+
+
+def column_rows(session, model, limit):
+    return session.execute(statement_for(read_model(model)).limit(limit)).all()
+
+
+def records(session, model, limit):
+    return fetch(session, read_model(model), lambda statement: statement.limit(limit))
+
+
+def record_dicts(session, model, limit):
+    return to_dicts(records(session, model, limit))
+
+
+METHODS = {
+    "orm entities": orm_entities,
+    "column rows": column_rows,
+    "records": records,
+    "orm -> dict": orm_entity_dicts,
+    "records -> dict": record_dicts,
+}
+
+
+def measure(session, method, model, limit, repeat) -> tuple[int, float, float]:
+    timings = []
+    for _ in range(repeat):
+        session.expunge_all()  # identity map from previous run would skip hydration
+        started = time.perf_counter()
+        result = method(session, model, limit)
+        timings.append(time.perf_counter() - started)
+    session.expunge_all()
+    tracemalloc.start()
+    result = method(session, model, limit)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(result), statistics.median(timings), retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row cost of ORM entities compared with read-model records")
+    parser.add_argument("--limit", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    with get_session(config.postgres_url()) as session:
+        for model in MODELS:
+            print(f"{model.__name__}:")
+            baseline = None
+            for name, method in METHODS.items():
+                rows, elapsed, retained = measure(session, method, model, args.limit, args.repeat)
+                if not rows:
+                    print(f"  no rows in {model.__tablename__}")
+                    break
+                per_row = elapsed / rows * 1e6
+                baseline = baseline or per_row
+                print(
+                    f"  {name:<16} rows={rows:<8} {per_row:8.2f}us/row {retained / rows:8.0f}B/row "
+                    f"({baseline / per_row:4.1f}x vs orm entities)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import random
+import time
+from pathlib import Path
+
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.recommendations import RecommendationIndex, drain_pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build recommendation index and measure query latency")
+    parser.add_argument("--path", type=Path, default=Path("recommendations.npz"))
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--update", action="store_true", help="apply recorded changes to saved index instead of full rebuild")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    with get_session(config.postgres_url()) as session:
+        started = time.perf_counter()
+        if args.update and args.path.exists():
+            index = RecommendationIndex.load(args.path)
+            accounts, projects = index.apply_pending(session)
+            print(f"Updated index in {time.perf_counter() - started:.2f}s: {accounts} accounts, {projects} projects changed")
+        else:
+            # changes recorded before rebuild are included in it
+            drain_pending(session)
+            index = RecommendationIndex.build(session)
+            print(
+                f"Built index in {time.perf_counter() - started:.2f}s: "
+                f"{index.accounts.shape[0]} accounts, {index.projects.shape[0]} projects, "
+                f"{index.partners.shape[0]} partners, {len(index.vocabulary)} terms"
+            )
+        index.save(args.path)
+        # recorded changes are released only after index with them is saved
+        session.commit()
+    print(f"Saved index to {args.path}")
+
+    if len(index.account_ids) == 0:
+        return
+    account_ids = [int(random.choice(index.account_ids)) for _ in range(args.queries)]
+    for method in (index.similar_projects, index.collaborators, index.partners_for):
+        started = time.perf_counter()
+        for account_id in account_ids:
+            method(account_id, k=10)
+        elapsed = (time.perf_counter() - started) / len(account_ids)
+        print(f"{method.__name__:<20} {elapsed * 1000:.3f}ms per query")
+
+    account_id = account_ids[0]
+    print(f"Recommendations for account {account_id}:")
+    print("projects:", index.similar_projects(account_id, k=5))
+    print("collaborators:", index.collaborators(account_id, k=5))
+    print("partners:", index.partners_for(account_id, k=5))
+
+
+if __name__ == "__main__":
+    main()
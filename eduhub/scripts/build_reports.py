@@ -0,0 +1,32 @@
+"""
+Render report tables (CSV and LaTeX) into reports/build, unchanged sections come from cache:
+
+python3 -m eduhub.scripts.build_reports --workers 4
+"""
+import argparse
+
+from sqlalchemy import create_engine
+
+from eduhub.common.config import Config
+from eduhub.reporting import BUILD_DIRECTORY, SECTIONS, build, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build report tables from live queries with incremental cache")
+    parser.add_argument("--output", default=str(BUILD_DIRECTORY))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--section", action="append", choices=[section.name for section in SECTIONS], help="only these sections")
+    parser.add_argument("--force", action="store_true", help="query every section again")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    engine = create_engine(config.postgres_url(), pool_size=args.workers)
+    sections = [section for section in SECTIONS if args.section is None or section.name in args.section]
+    results = build(engine, sections, args.output, args.workers, args.force)
+    for line in report(results):
+        print(line)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Concurrent booking requests for same equipment through TransactionRunner:
+
+python3 -m eduhub.scripts.check_contention --workers 16 --requests 400 --slots 20
+python3 -m eduhub.scripts.check_contention --isolation "READ COMMITTED"  # baseline, double bookings appear
+"""
+import argparse
+import datetime
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+
+from eduhub.booking import BookingConflict, request_booking
+from eduhub.common.config import Config
+from eduhub.common.transaction import RetryBudget, TransactionRunner
+
+DOUBLE_BOOKINGS_STATEMENT = text(
+    """
+    SELECT count(*)
+    FROM booking AS first
+    JOIN booking AS second ON second.equipment_id = first.equipment_id AND second.id > first.id
+        AND second.start_ts < first.end_ts AND second.end_ts > first.start_ts
+        AND second.deleted_at IS NULL AND second.status IN ('REQUESTED', 'APPROVED')
+    WHERE first.equipment_id = :equipment_id AND first.deleted_at IS NULL AND first.status IN ('REQUESTED', 'APPROVED')
+    """
+)
+
+
+def setup(engine, requesters: int) -> tuple[int, list[int]]:
+    """Equipment and requester accounts of new laboratory (committed, so every worker sees them)"""
+    with engine.begin() as connection:
+        laboratory_id = connection.execute(
+            text("INSERT INTO laboratory (title) VALUES ('check_contention') RETURNING id")
+        ).scalar_one()
+        account_ids = connection.execute(
+            text(
+                "INSERT INTO account (full_name, email, role, laboratory_id) "
+                "SELECT 'check_contention', 'check_contention_' || gen_random_uuid() || '@example.com', 'STAFF', :laboratory_id "
+                "FROM generate_series(1, :amount) "
+                "RETURNING id"
+            ),
+            {"laboratory_id": laboratory_id, "amount": requesters},
+        ).scalars().all()
+        equipment_id = connection.execute(
+            text("INSERT INTO equipment (status, laboratory_id) VALUES ('ACTIVE', :laboratory_id) RETURNING id"),
+            {"laboratory_id": laboratory_id},
+        ).scalar_one()
+    return equipment_id, account_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive TransactionRunner with concurrent bookings of one equipment")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--slots", type=int, default=20, help="distinct one-hour slots, fewer slots means more contention")
+    parser.add_argument("--isolation", default="SERIALIZABLE", choices=["SERIALIZABLE", "REPEATABLE READ", "READ COMMITTED"])
+    parser.add_argument("--max-attempts", type=int, default=10)
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    engine = create_engine(config.postgres_url(), pool_size=args.workers, max_overflow=0)
+    equipment_id, account_ids = setup(engine, args.workers)
+    runner = TransactionRunner(engine, max_attempts=args.max_attempts, budget=RetryBudget(ratio=1.0, min_retries=args.requests))
+    start = datetime.datetime.now(tz=datetime.UTC).replace(minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
+
+    outcomes = {"booked": 0, "conflict": 0, "exhausted": 0}
+    lock = threading.Lock()
+
+    def request(index: int) -> None:
+        slot = random.randrange(args.slots)
+        # half-hour shift makes neighbouring requests overlap too
+        slot_start = start + datetime.timedelta(minutes=30 * slot)
+        try:
+            runner.run(
+                lambda session: request_booking(
+                    session,
+                    equipment_id,
+                    requester_id=account_ids[index % len(account_ids)],
+                    approver_id=account_ids[0],
+                    start_ts=slot_start,
+                    end_ts=slot_start + datetime.timedelta(hours=1),
+                    comment="check_contention",
+                ),
+                isolation_level=args.isolation,
+                name="request_booking",
+            )
+            outcome = "booked"
+        except BookingConflict:
+            outcome = "conflict"
+        except DBAPIError:
+            outcome = "exhausted"
+        with lock:
+            outcomes[outcome] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(request, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    with engine.connect() as connection:
+        double_bookings = connection.execute(DOUBLE_BOOKINGS_STATEMENT, {"equipment_id": equipment_id}).scalar_one()
+    print(
+        f"{args.requests} requests by {args.workers} workers ({args.isolation}) in {elapsed:.2f}s: "
+        f"{outcomes['booked']} booked, {outcomes['conflict']} rejected as overlapping, {outcomes['exhausted']} gave up"
+    )
+    print(f"Overlapping active bookings of equipment {equipment_id}: {double_bookings}")
+    for line in runner.report():
+        print(line)
+    engine.dispose()
+    if args.isolation == "SERIALIZABLE" and double_bookings:
+        raise AssertionError("SERIALIZABLE runner let overlapping bookings through")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import threading
+import time
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from sqlalchemy import Engine, create_engine, text
+
+from eduhub.common.config import Config
+
+BASE_REVISION = "3dec07985743"  # initial migration
+WATCHED_TABLES = ("booking", "booking_history")
+# lock modes that conflict with RowExclusiveLock, i.e. block INSERT/UPDATE/DELETE
+WRITE_BLOCKING_MODES = ("ShareLock", "ShareRowExclusiveLock", "ExclusiveLock", "AccessExclusiveLock")
+MAX_WRITE_BLOCKING_SECONDS = 1.0
+
+
+def seed(engine: Engine, num_bookings: int, num_equipment: int = 100) -> None:
+    """Fill booking/booking_history up to num_bookings rows with generate_series (no round trips per row)"""
+    with engine.begin() as connection:
+        existing = connection.execute(text("SELECT count(*) FROM booking")).scalar_one()
+        if existing >= num_bookings:
+            print(f"[seed] booking already has {existing} rows")
+            return
+        laboratory_id = connection.execute(
+            text("INSERT INTO laboratory (title) VALUES ('check_migrations') RETURNING id")
+        ).scalar_one()
+        account_id = connection.execute(
+            text(
+                "INSERT INTO account (full_name, email, role, laboratory_id) "
+                "VALUES ('check_migrations', 'check_migrations_' || gen_random_uuid() || '@example.com', 'STAFF', :laboratory_id) "
+                "RETURNING id"
+            ),
+            {"laboratory_id": laboratory_id},
+        ).scalar_one()
+        connection.execute(
+            text(
+                "INSERT INTO equipment (status, laboratory_id) "
+                "SELECT 'ACTIVE', :laboratory_id FROM generate_series(1, :amount)"
+            ),
+            {"laboratory_id": laboratory_id, "amount": num_equipment},
+        )
+        last_booking_id = connection.execute(text("SELECT coalesce(max(id), 0) FROM booking")).scalar_one()
+        connection.execute(
+            text(
+                "WITH equipment_ids AS ("
+                "  SELECT array_agg(id) AS ids FROM equipment WHERE laboratory_id = :laboratory_id"
+                ") "
+                "INSERT INTO booking (equipment_id, requester_id, approver_id, start_ts, end_ts, status) "
+                "SELECT "
+                "  ids[1 + n % array_length(ids, 1)], :account_id, :account_id, "
+                "  now() - n * interval '1 hour', now() - n * interval '1 hour' + interval '30 minutes', "
+                "  (ARRAY['REQUESTED', 'APPROVED', 'REJECTED', 'CANCELLED', 'COMPLETED'])[1 + n % 5]::bookingstatus "
+                "FROM equipment_ids, generate_series(1, :amount) AS n"
+            ),
+            {"laboratory_id": laboratory_id, "account_id": account_id, "amount": num_bookings - existing},
+        )
+        connection.execute(
+            text(
+                "INSERT INTO booking_history (note, changed_at, booking_id) "
+                "SELECT 'Booking changed', start_ts, id FROM booking WHERE id > :last_booking_id"
+            ),
+            {"last_booking_id": last_booking_id},
+        )
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"VACUUM ANALYZE {', '.join(WATCHED_TABLES)}"))
+    print(f"[seed] inserted {num_bookings - existing} bookings")
+
+
+class LockSampler(threading.Thread):
+    """Polls pg_locks and accumulates how long each (table, lock mode) was held by other backends"""
+
+    def __init__(self, engine: Engine, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.durations: dict[tuple[str, str], float] = {}
+
+    def run(self) -> None:
+        query = text(
+            "SELECT DISTINCT c.relname, l.mode FROM pg_locks AS l "
+            "JOIN pg_class AS c ON c.oid = l.relation "
+            "WHERE l.granted AND l.pid <> pg_backend_pid() AND c.relname = ANY(:tables)"
+        ).bindparams(tables=list(WATCHED_TABLES))
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            previous = time.perf_counter()
+            while not self.stopped.is_set():
+                held = connection.execute(query).all()
+                now = time.perf_counter()
+                for relname, mode in held:
+                    key = (relname, mode)
+                    self.durations[key] = self.durations.get(key, 0.0) + (now - previous)
+                previous = now
+                time.sleep(self.interval)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+
+class WriteProbe(threading.Thread):
+    """Issues tiny UPDATE on booking in a loop to measure latency of regular traffic during migration"""
+
+    def __init__(self, engine: Engine, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.latencies: list[float] = []
+
+    def run(self) -> None:
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            booking_id = connection.execute(text("SELECT min(id) FROM booking")).scalar_one()
+            while not self.stopped.is_set():
+                started = time.perf_counter()
+                connection.execute(text("UPDATE booking SET comment = comment WHERE id = :id"), {"id": booking_id})
+                self.latencies.append(time.perf_counter() - started)
+                time.sleep(self.interval)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+
+def main():
+    config = Config.load_from_env()
+    alembic_config = AlembicConfig("alembic.ini")
+    engine = create_engine(config.postgres_url(), pool_size=5)
+
+    NUM_BOOKINGS = 1_000_000
+
+    command.upgrade(alembic_config, "head")
+    seed(engine, NUM_BOOKINGS)
+    command.downgrade(alembic_config, BASE_REVISION)
+
+    sampler = LockSampler(engine)
+    probe = WriteProbe(engine)
+    sampler.start()
+    probe.start()
+    started = time.perf_counter()
+    command.upgrade(alembic_config, "head")
+    elapsed = time.perf_counter() - started
+    probe.stop()
+    sampler.stop()
+
+    print(f"Replayed migrations {BASE_REVISION}..head on {NUM_BOOKINGS} bookings in {elapsed:.2f}s")
+    violations = []
+    for (relname, mode), duration in sorted(sampler.durations.items()):
+        blocks_writes = mode in WRITE_BLOCKING_MODES
+        print(f"{relname:<20} {mode:<28} {duration:8.3f}s {'(blocks writes)' if blocks_writes else ''}")
+        if blocks_writes and duration > MAX_WRITE_BLOCKING_SECONDS:
+            violations.append((relname, mode, duration))
+    if probe.latencies:
+        latencies = sorted(probe.latencies)
+        print(
+            f"Write probe: {len(latencies)} updates, "
+            f"p50={latencies[len(latencies) // 2] * 1000:.1f}ms, max={latencies[-1] * 1000:.1f}ms"
+        )
+
+    if violations:
+        for relname, mode, duration in violations:
+            print(f"FAIL: {mode} on {relname} held for {duration:.3f}s (> {MAX_WRITE_BLOCKING_SECONDS}s)")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from eduhub.common.config import Config
+from eduhub.models import FingerprintedDocument
+from eduhub.plagiarism import ingest, overlapping_documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprint changed resource texts and report near-duplicates")
+    parser.add_argument("--workers", type=int, default=None, help="size of process pool (default is CPU count)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--min-share", type=float, default=0.3, help="minimal share of shared fingerprints")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    engine = create_engine(config.postgres_url())
+    processed = ingest(engine, workers=args.workers, batch_size=args.batch_size)
+    print(f"Fingerprinted {processed} changed documents")
+
+    with Session(engine) as session:
+        resource_ids = session.execute(
+            select(FingerprintedDocument.resource_id).where(FingerprintedDocument.fingerprint_count > 0)
+        ).scalars().all()
+        for resource_id in resource_ids:
+            for other_id, share in overlapping_documents(session, resource_id, args.min_share):
+                print(f"resource {resource_id} shares {share:.0%} of fingerprints with resource {other_id}")
+
+
+if __name__ == "__main__":
+    main()
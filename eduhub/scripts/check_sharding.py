@@ -0,0 +1,158 @@
+import argparse
+import dataclasses
+import random
+import statistics
+import time
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from sqlalchemy import create_engine, text
+
+from eduhub.common.config import Config
+from eduhub.common.types import AccountRole, EquipmentStatus
+from eduhub.models import Account, Equipment, EquipmentType, Laboratory, Partner
+from eduhub.sharding import (
+    ShardRouter,
+    count_per_shard,
+    top_laboratories_by_accounts,
+    top_laboratories_by_equipment,
+)
+
+EXTENSIONS = ("btree_gist",)
+
+GROUND_TRUTH = {
+    "equipment": (
+        "SELECT laboratory.id, count(equipment.id) FROM laboratory "
+        "JOIN equipment ON equipment.laboratory_id = laboratory.id AND equipment.deleted_at IS NULL "
+        "GROUP BY laboratory.id"
+    ),
+    "accounts": (
+        "SELECT laboratory.id, count(account.id) FROM laboratory "
+        "JOIN account ON account.laboratory_id = laboratory.id GROUP BY laboratory.id"
+    ),
+}
+
+
+def create_databases(config: Config, shard_configs: list[Config]) -> None:
+    """Create missing shard databases on server of POSTGRES_DB and migrate directory and shards to head"""
+    maintenance = create_engine(config.postgres_url(), isolation_level="AUTOCOMMIT")
+    with maintenance.connect() as connection:
+        existing = set(connection.execute(text("SELECT datname FROM pg_database")).scalars())
+        for shard in shard_configs:
+            if shard.POSTGRES_DB not in existing:
+                connection.execute(text(f"CREATE DATABASE {shard.POSTGRES_DB}"))
+                print(f"[shards] created database {shard.POSTGRES_DB}")
+    maintenance.dispose()
+
+    for database in (config, *shard_configs):
+        engine = create_engine(database.postgres_url())
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for extension in EXTENSIONS:
+                connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+        with engine.connect() as connection:
+            alembic_config = AlembicConfig("alembic.ini")
+            alembic_config.attributes["connection"] = connection
+            command.upgrade(alembic_config, "head")
+            connection.commit()
+        engine.dispose()
+
+
+def seed(router: ShardRouter, laboratories: int, max_equipment: int, max_accounts: int) -> None:
+    """Reference rows in directory, then laboratories with random amount of equipment and accounts"""
+    with router.directory_session() as session:
+        equipment_type = EquipmentType(title="Sharding check microscope")
+        session.add_all([equipment_type, Partner(title="Sharding check partner")])
+        session.commit()
+        equipment_type_id = equipment_type.id
+    print(f"[shards] replicated reference rows {router.replicate_reference_tables()}")
+
+    for index in range(laboratories):
+        laboratory = router.create_laboratory(f"Sharding check laboratory {index}")
+        with router.session(laboratory.id) as session:
+            session.add_all(
+                Equipment(status=EquipmentStatus.ACTIVE, laboratory_id=laboratory.id, equipment_type_id=equipment_type_id)
+                for _ in range(random.randint(0, max_equipment))
+            )
+            session.add_all(
+                Account(
+                    full_name=f"Person {n}",
+                    email=f"sharding_{laboratory.id}_{n}@example.com",
+                    role=AccountRole.STUDENT,
+                    laboratory_id=laboratory.id,
+                )
+                for n in range(random.randint(0, max_accounts))
+            )
+            session.commit()
+
+
+def expected_top(router: ShardRouter, metric: str, n: int) -> list[tuple[int, int]]:
+    """Top n computed independently: all groups of all shards sorted in Python"""
+    rows = [
+        (laboratory_id, amount)
+        for shard_rows in router.fan_out(lambda session: session.execute(text(GROUND_TRUTH[metric])).all(), parallel=False)
+        for laboratory_id, amount in shard_rows
+    ]
+    return sorted(rows, key=lambda row: (-row[1], row[0]))[:n]
+
+
+def check_unique_ids(router: ShardRouter) -> None:
+    shard_ids = router.fan_out(lambda session: set(session.execute(text("SELECT id FROM equipment")).scalars()))
+    total = sum(len(ids) for ids in shard_ids)
+    if len(set().union(*shard_ids)) != total:
+        raise AssertionError("equipment ids collide across shards")
+    print(f"[shards] {total} equipment ids are unique across {len(shard_ids)} shards")
+
+
+def measure(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create local shard databases, seed laboratories, and check fan-out reports")
+    parser.add_argument("--shards", type=int, default=3, help="used when POSTGRES_SHARDS is not set")
+    parser.add_argument("--laboratories", type=int, default=30)
+    parser.add_argument("--max-equipment", type=int, default=200)
+    parser.add_argument("--max-accounts", type=int, default=50)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    if not config.POSTGRES_SHARDS:
+        config = dataclasses.replace(
+            config, POSTGRES_SHARDS=",".join(f"{config.POSTGRES_DB}_shard_{index}" for index in range(args.shards))
+        )
+    shard_configs = config.shard_configs()
+    create_databases(config, shard_configs)
+
+    router = ShardRouter.from_config(config)
+    try:
+        router.prepare_sequences()
+        seed(router, args.laboratories, args.max_equipment, args.max_accounts)
+        print(f"[shards] laboratories per shard {count_per_shard(router, Laboratory)}")
+        check_unique_ids(router)
+
+        for metric, report in (("equipment", top_laboratories_by_equipment), ("accounts", top_laboratories_by_accounts)):
+            records = report(router, args.top)
+            if [(record.id, record.amount) for record in records] != expected_top(router, metric, args.top):
+                raise AssertionError(f"merged top {args.top} by {metric} differs from ground truth")
+            parallel = measure(lambda: report(router, args.top), args.repeat)
+            sequential = measure(lambda: report(router, args.top, parallel=False), args.repeat)
+            print(f"Top {args.top} laboratories by {metric}:")
+            for record in records:
+                print(f"  {record.id:>8} {record.title:<40} {record.amount}")
+            print(
+                f"  fan-out parallel={parallel * 1000:8.2f}ms sequential={sequential * 1000:8.2f}ms "
+                f"speedup={sequential / parallel:5.2f}x"
+            )
+    finally:
+        router.close()
+
+
+if __name__ == "__main__":
+    main()
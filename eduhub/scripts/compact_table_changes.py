@@ -0,0 +1,41 @@
+"""
+Compact table_change log between report builds (one row per table is left), for example every minute:
+
+python3 -m eduhub.scripts.compact_table_changes --interval 60
+python3 -m eduhub.scripts.compact_table_changes --count 1
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine
+
+from eduhub.common.config import Config
+from eduhub.reporting import compact_changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact table_change rows of every table into one row with their sum")
+    parser.add_argument("--interval", type=float, default=60.0, help="seconds between compactions")
+    parser.add_argument("--count", type=int, default=0, help="amount of compactions (0 runs until interrupted)")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    engine = create_engine(config.postgres_url(), pool_size=1)
+    iteration = 0
+    try:
+        while not args.count or iteration < args.count:
+            if iteration:
+                time.sleep(args.interval)
+            iteration += 1
+            started = time.perf_counter()
+            with engine.begin() as connection:
+                removed = compact_changes(connection)
+            print(f"[compact_table_changes] {removed} rows removed, {time.perf_counter() - started:.2f}s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
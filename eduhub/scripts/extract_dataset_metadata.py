@@ -0,0 +1,30 @@
+"""
+Size, rows, columns and column types of local dataset files (links relative to --root):
+
+python3 -m eduhub.scripts.extract_dataset_metadata --root datasets --workers 4
+"""
+import argparse
+
+from sqlalchemy import create_engine
+
+from eduhub.common.config import Config
+from eduhub.datasets import extract
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan dataset files and update their metadata")
+    parser.add_argument("--root", default=".", help="directory of dataset links that are relative paths")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--force", action="store_true", help="rescan files that did not change")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    engine = create_engine(config.postgres_url())
+    updated = extract(engine, args.root, args.workers, args.force, args.batch_size)
+    print(f"Metadata of {updated} datasets updated")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Database health history, for example around seeding:
+
+python3 -m eduhub.scripts.health_snapshot collect --label "before seeding"
+python3 -m eduhub.scripts.insert_fake_data
+python3 -m eduhub.scripts.health_snapshot collect --label "after seeding"
+python3 -m eduhub.scripts.health_snapshot diff
+
+python3 -m eduhub.scripts.health_snapshot collect --interval 60 --count 30
+python3 -m eduhub.scripts.health_snapshot list
+python3 -m eduhub.scripts.health_snapshot diff 3 7
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine
+
+from eduhub.common.config import Config
+from eduhub.health import HealthStore, collect, diff, report
+
+DEFAULT_STORE = "health_history.sqlite3"
+
+
+def run_collect(store: HealthStore, args: argparse.Namespace) -> None:
+    config = Config.load_from_env()
+    engine = create_engine(config.postgres_url(), isolation_level="AUTOCOMMIT", pool_size=1)
+    try:
+        for iteration in range(args.count):
+            if iteration:
+                time.sleep(args.interval)
+            with engine.connect() as connection:
+                snapshot = collect(connection, args.top_statements)
+            snapshot_id = store.save(snapshot, args.label)
+            database = snapshot["database"]
+            print(
+                f"[health] snapshot {snapshot_id} of {database['name']}: cache hit "
+                f"{(database['cache_hit_ratio'] or 0):.1%}, {len(snapshot['tables'])} tables, "
+                f"{sum(snapshot['connections'].values())} connections, {len(snapshot['statements'])} statements"
+            )
+    finally:
+        engine.dispose()
+
+
+def run_list(store: HealthStore, args: argparse.Namespace) -> None:
+    for snapshot_id, taken_at, database, label in store.listing(args.limit):
+        print(f"{snapshot_id:>6}  {taken_at}  {database:<20} {label or ''}")
+
+
+def run_diff(store: HealthStore, args: argparse.Namespace) -> None:
+    if args.snapshots:
+        before_id, after_id = args.snapshots
+    else:
+        latest = store.latest_ids(2)
+        if len(latest) < 2:
+            raise SystemExit("at least two snapshots are needed, run collect first")
+        before_id, after_id = latest
+    print(f"Snapshot {before_id} -> {after_id}")
+    for line in report(diff(store.load(before_id), store.load(after_id)), args.limit):
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect database health snapshots into local history and compare them")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="SQLite file with snapshot history")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    collect_parser = commands.add_parser("collect", help="take snapshot (periodically with --count)")
+    collect_parser.add_argument("--label")
+    collect_parser.add_argument("--interval", type=float, default=60.0, help="seconds between snapshots")
+    collect_parser.add_argument("--count", type=int, default=1)
+    collect_parser.add_argument("--top-statements", type=int, default=50)
+    collect_parser.set_defaults(run=run_collect)
+
+    list_parser = commands.add_parser("list", help="show latest snapshots")
+    list_parser.add_argument("--limit", type=int, default=20)
+    list_parser.set_defaults(run=run_list)
+
+    diff_parser = commands.add_parser("diff", help="report changes between two snapshots (latest two by default)")
+    diff_parser.add_argument("snapshots", nargs="*", type=int, metavar="ID")
+    diff_parser.add_argument("--limit", type=int, default=10, help="rows per section")
+    diff_parser.set_defaults(run=run_diff)
+
+    args = parser.parse_args()
+    if args.command == "diff" and args.snapshots and len(args.snapshots) != 2:
+        parser.error("diff expects two snapshot ids (before and after)")
+    store = HealthStore(args.store)
+    try:
+        args.run(store, args)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -134,7 +134,7 @@ def main():
             status=fake.enum(EquipmentStatus),
             description=fake.text(max_nb_chars=200),
             media_link=fake.image_url(),
-            approval_requirements={"minimal_role": "assistant"}, # @TODO: enum and other rule-fields
+            approval_requirements={"minimal_role": AccountRole.STAFF, "same_laboratory": True},
             laboratory=laboratory,
         )
         for laboratory in laboratories
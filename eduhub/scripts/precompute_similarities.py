@@ -0,0 +1,29 @@
+import argparse
+import time
+
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.similarity import precompute_similarities, rebuild_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute top-k similar software repositories and datasets")
+    parser.add_argument("--rebuild", action="store_true", help="recompute MinHash signatures of all resources")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.3)
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    with get_session(config.postgres_url()) as session:
+        if args.rebuild:
+            started = time.perf_counter()
+            indexed = rebuild_index(session)
+            print(f"Indexed {indexed} resources in {time.perf_counter() - started:.2f}s")
+        started = time.perf_counter()
+        written = precompute_similarities(session, k=args.k, threshold=args.threshold)
+        session.commit()
+        print(f"Written {written} similarity rows in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
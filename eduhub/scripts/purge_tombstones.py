@@ -0,0 +1,24 @@
+import argparse
+import datetime
+
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.purge import purge
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive and physically delete old soft-deleted rows")
+    parser.add_argument("--days", type=int, default=90, help="purge tombstones deleted more than days ago")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    with get_session(config.postgres_url()) as session:
+        purged = purge(session, datetime.timedelta(days=args.days), args.batch_size, args.pause)
+    for table, amount in purged.items():
+        print(f"{table}: {amount} tombstones purged")
+
+
+if __name__ == "__main__":
+    main()
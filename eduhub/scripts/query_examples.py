@@ -5,6 +5,7 @@ from sqlalchemy.orm import selectin_polymorphic
 
 from eduhub.common.database import get_session
 from eduhub.common.config import Config
+from eduhub.readmodels import fetch, read_model, to_json
 from eduhub.models import (
     Laboratory,
     Profile,
@@ -23,6 +24,10 @@ from eduhub.models import (
     Resource
 )
 
+LaboratoryAccounts = read_model(Laboratory, extra={"account_count": func.count(Account.id)})
+LaboratoryEquipment = read_model(Laboratory, extra={"equipment_count": func.count(Equipment.id)})
+ResourceRecords = [read_model(model) for model in (Dataset, SoftwareRepository, Presentation, Report, Publication)]
+
 
 def main():
     config = Config.load_from_env()
@@ -36,6 +41,19 @@ def main():
         )
         result_first = session.execute(accounts_per_laboratories).scalar_one_or_none()
         print(result_first.__dict__)
+
+        # same listing as records (only columns are selected, no ORM instances are created)
+        result_first_records = fetch(
+            session,
+            LaboratoryAccounts,
+            lambda statement: (
+                statement.outerjoin(Account)
+                .group_by(Laboratory.id)
+                .order_by(func.count(Account.id).asc())
+                .limit(1)
+            ),
+        )
+        print(result_first_records)
         
         top_5_laboratories_by_equipment_amount = (
             select(
@@ -51,6 +69,18 @@ def main():
         for result in result_second:
             print(result.__dict__)
 
+        result_second_records = fetch(
+            session,
+            LaboratoryEquipment,
+            lambda statement: (
+                statement.join(Laboratory.equipment_list)
+                .group_by(Laboratory.id)
+                .order_by(desc("equipment_count"))
+                .limit(5)
+            ),
+        )
+        print(to_json(result_second_records))
+
         unique_interests_from_profiles = (
             select(Profile.interest_areas)
         )
@@ -65,5 +95,8 @@ def main():
         for result in result_fourth:
             print(result.__dict__)
 
+        for record in ResourceRecords:
+            print(to_json(fetch(session, record, lambda statement: statement.order_by(Resource.id))))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,22 @@
+import argparse
+
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.quota import reconcile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repair account_booking_usage counters against booking table")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    with get_session(config.postgres_url()) as session:
+        repaired = reconcile(session, args.batch_size)
+    for drift in repaired:
+        print(f"account {drift.account_id}: counter {drift.recorded} -> {drift.actual}")
+    print(f"Repaired {len(repaired)} counters")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import argparse
+import datetime
+
+from eduhub.analytics import cached_utilization, refresh_rollup
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.common.types import BucketSize, UtilizationDimension
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute utilization_rollup for recent buckets")
+    parser.add_argument("--bucket", type=BucketSize, choices=list(BucketSize), default=BucketSize.DAY)
+    parser.add_argument("--days", type=int, default=7, help="how many days back to recompute")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    end = datetime.datetime.now(tz=datetime.UTC)
+    start = end - datetime.timedelta(days=args.days)
+    with get_session(config.postgres_url()) as session:
+        written = refresh_rollup(session, args.bucket, start, end)
+        session.commit()
+        print(f"Written {written} rollup rows for {args.bucket} buckets since {start}")
+
+        for row in cached_utilization(session, UtilizationDimension.LABORATORY, args.bucket, start, end):
+            print(
+                f"laboratory={row.key} bucket={row.bucket_start:%Y-%m-%d %H:%M} "
+                f"occupancy={row.occupancy:.1%} peak={row.peak_concurrency} bookings={row.booking_count}"
+            )
+
+
+if __name__ == "__main__":
+    main()
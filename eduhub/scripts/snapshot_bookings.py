@@ -0,0 +1,22 @@
+import argparse
+
+from eduhub.common.config import Config
+from eduhub.common.database import get_session
+from eduhub.history import take_snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store full snapshots of bookings with long history since last snapshot")
+    parser.add_argument("--min-changes", type=int, default=50, help="changes since last snapshot that trigger new one")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    with get_session(config.postgres_url()) as session:
+        taken = take_snapshots(session, args.min_changes, args.batch_size, args.pause)
+    print(f"{taken} booking snapshots taken")
+
+
+if __name__ == "__main__":
+    main()
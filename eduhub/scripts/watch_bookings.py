@@ -0,0 +1,28 @@
+import argparse
+
+from eduhub.changefeed import ChangeEvent, ChangeFeedConsumer
+from eduhub.common.config import Config
+
+
+def print_changes(events: list[ChangeEvent]) -> None:
+    for change in events:
+        columns = f" ({', '.join(change.changed_columns)})" if change.changed_columns else ""
+        print(f"booking {change.booking_id} {change.operation} -> {change.status}{columns}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consume booking change feed (LISTEN/NOTIFY with outbox)")
+    parser.add_argument("--name", default="watch_bookings", help="consumer name, its offset is resumed after restart")
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run (forever by default)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--quiet", action="store_true", help="print only delivery metrics")
+    args = parser.parse_args()
+
+    config = Config.load_from_env()
+    handler = (lambda events: None) if args.quiet else print_changes
+    consumer = ChangeFeedConsumer(config.postgres_url(), args.name, handler, batch_size=args.batch_size)
+    consumer.run(duration=args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Laboratory-based sharding across several Postgres databases.
+
+Laboratory with everything attached to it (equipment, rooms, accounts, projects, bookings, ...)
+lives in one shard database, directory database (POSTGRES_DB) keeps laboratory_shard table
+and allocates laboratory ids, so ids of laboratories are unique across shards. Other serial ids
+are interleaved between shards (shard i of n gets ids i + 1, i + 1 + n, ...) by prepare_sequences().
+Small reference tables (equipment types, partners, organization units) are written to directory
+and replicated into every shard, so foreign keys of shard stay local.
+
+Queries of one laboratory are routed by laboratory_id to its shard, reports over all laboratories
+run on every shard in parallel and are merged, for example:
+
+router = ShardRouter.from_config(Config.load_from_env())
+with router.session(laboratory_id) as session:
+    ...
+top = top_laboratories_by_equipment(router, 10)
+
+Bookings, projects, and memberships are expected to stay within laboratory of equipment
+(same as default approval and quota rules), relations across shards are not supported.
+"""
+import contextlib
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Self, Sequence, TypeVar
+
+from sqlalchemy import Engine, Table, create_engine, desc, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from eduhub.common.config import Config
+from eduhub.common.database import Base
+from eduhub.models import (
+    Account,
+    Equipment,
+    EquipmentType,
+    Laboratory,
+    LaboratoryShard,
+    OrganizationUnit,
+    Partner,
+)
+from eduhub.organization import rebuild_closure
+from eduhub.readmodels import fetch, read_model
+
+T = TypeVar("T")
+
+# written only to directory, replicated to shards in this order (parents before children)
+REFERENCE_TABLES: tuple[Table, ...] = (EquipmentType.__table__, Partner.__table__, OrganizationUnit.__table__)
+
+# ids of these tables are not taken from shard sequences
+UNSHARDED_TABLES = {
+    Laboratory.__table__.name,
+    LaboratoryShard.__table__.name,
+    *(table.name for table in REFERENCE_TABLES),
+    "organization_closure",
+}
+
+
+class ShardRouter:
+    """Engines of directory and shard databases with routing of laboratories to shards"""
+
+    def __init__(self, directory_url: str, shard_urls: Sequence[str], max_workers: int | None = None):
+        if not shard_urls:
+            raise ValueError("at least one shard database is required (POSTGRES_SHARDS)")
+        self.directory = create_engine(directory_url)
+        self.shards: list[Engine] = [create_engine(url) for url in shard_urls]
+        self._locations: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(self.shards), thread_name_prefix="shard")
+
+    @classmethod
+    def from_config(cls, config: Config, max_workers: int | None = None) -> Self:
+        return cls(config.postgres_url(), [shard.postgres_url() for shard in config.shard_configs()], max_workers)
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        for engine in (self.directory, *self.shards):
+            engine.dispose()
+
+    def shard_for(self, laboratory_id: int) -> int:
+        """Position of shard with laboratory (directory lookups are cached, laboratories do not move)"""
+        with self._lock:
+            shard = self._locations.get(laboratory_id)
+        if shard is not None:
+            return shard
+        with Session(self.directory) as session:
+            shard = session.scalar(select(LaboratoryShard.shard).where(LaboratoryShard.laboratory_id == laboratory_id))
+        if shard is None:
+            raise LookupError(f"laboratory {laboratory_id} is not assigned to any shard")
+        with self._lock:
+            self._locations[laboratory_id] = shard
+        return shard
+
+    @contextlib.contextmanager
+    def session(self, laboratory_id: int) -> Iterator[Session]:
+        """Session of shard with laboratory (caller commits)"""
+        with Session(self.shards[self.shard_for(laboratory_id)]) as session:
+            yield session
+
+    @contextlib.contextmanager
+    def directory_session(self) -> Iterator[Session]:
+        with Session(self.directory) as session:
+            yield session
+
+    def _least_loaded(self, session: Session) -> int:
+        amounts = dict.fromkeys(range(len(self.shards)), 0)
+        amounts.update(session.execute(select(LaboratoryShard.shard, func.count()).group_by(LaboratoryShard.shard)).all())
+        return min(amounts, key=lambda shard: (amounts[shard], shard))
+
+    def create_laboratory(self, title: str, shard: int | None = None, **attributes: Any) -> Laboratory:
+        """Allocate id of laboratory in directory and insert laboratory into shard (least loaded by default)"""
+        with Session(self.directory) as directory:
+            if shard is None:
+                shard = self._least_loaded(directory)
+            location = LaboratoryShard(shard=shard)
+            directory.add(location)
+            directory.commit()
+            laboratory_id = location.laboratory_id
+        try:
+            with Session(self.shards[shard], expire_on_commit=False) as session:
+                laboratory = Laboratory(id=laboratory_id, title=title, **attributes)
+                session.add(laboratory)
+                session.commit()
+        except Exception:
+            with Session(self.directory) as directory:
+                directory.execute(LaboratoryShard.__table__.delete().where(LaboratoryShard.laboratory_id == laboratory_id))
+                directory.commit()
+            raise
+        with self._lock:
+            self._locations[laboratory_id] = shard
+        return laboratory
+
+    def _run(self, shard: int, function: Callable[[Session], T]) -> T:
+        with Session(self.shards[shard]) as session:
+            return function(session)
+
+    def fan_out(self, function: Callable[[Session], T], parallel: bool = True) -> list[T]:
+        """Result of function per shard (in order of shards), each shard is queried in its own thread and session"""
+        positions = range(len(self.shards))
+        if not parallel:
+            return [self._run(shard, function) for shard in positions]
+        return list(self._executor.map(lambda shard: self._run(shard, function), positions))
+
+    def top_n(
+        self,
+        function: Callable[[Session], Sequence[T]],
+        n: int,
+        key: Callable[[T], Any],
+        parallel: bool = True,
+    ) -> list[T]:
+        """Merge of per-shard top n (function must return at least top n of shard by same key)"""
+        return heapq.nlargest(n, itertools.chain.from_iterable(self.fan_out(function, parallel)), key=key)
+
+    def prepare_sequences(self) -> dict[str, int]:
+        """
+        Interleave serial ids of sharded tables (shard i of n generates i + 1 modulo n), so rows
+        keep unique ids across shards, returns next id per sequence of last shard (for reporting)
+        """
+        amount = len(self.shards)
+        prepared = {}
+        for position, engine in enumerate(self.shards):
+            with engine.begin() as connection:
+                for table in Base.metadata.sorted_tables:
+                    # fullname is qualified by schema (archive.booking is not public booking)
+                    if table.fullname in UNSHARDED_TABLES or "id" not in table.c:
+                        continue
+                    sequence = connection.execute(
+                        text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table.fullname}
+                    ).scalar_one()
+                    if sequence is None:
+                        continue
+                    current = connection.execute(
+                        text(f"SELECT greatest((SELECT coalesce(max(id), 0) FROM {table.fullname}), (SELECT last_value FROM {sequence}))")
+                    ).scalar_one()
+                    following = _interleaved_next(current, position, amount)
+                    connection.execute(text(f"ALTER SEQUENCE {sequence} INCREMENT BY {amount}"))
+                    connection.execute(text("SELECT setval(:sequence, :value, false)"), {"sequence": sequence, "value": following})
+                    prepared[table.fullname] = following
+        return prepared
+
+    def replicate_reference_tables(self, batch_size: int = 1000) -> dict[str, int]:
+        """Upsert reference tables from directory into every shard (rows deleted in directory are kept)"""
+        with self.directory.connect() as connection:
+            rows = {
+                table.name: [row._asdict() for row in connection.execute(select(table).order_by(*table.primary_key.columns))]
+                for table in REFERENCE_TABLES
+            }
+        # parent_id of organization units is checked at end of every statement, so parents go first
+        rows[OrganizationUnit.__table__.name] = _parents_first(rows[OrganizationUnit.__table__.name])
+
+        def replicate(session: Session) -> None:
+            connection = session.connection()
+            for table in REFERENCE_TABLES:
+                key = [column.name for column in table.primary_key.columns]
+                for start in range(0, len(rows[table.name]), batch_size):
+                    statement = insert(table)
+                    statement = statement.on_conflict_do_update(
+                        index_elements=key,
+                        set_={column.name: statement.excluded[column.name] for column in table.columns if column.name not in key},
+                    )
+                    connection.execute(statement, rows[table.name][start:start + batch_size])
+            rebuild_closure(session)
+            session.commit()
+
+        self.fan_out(replicate)
+        return {table: len(table_rows) for table, table_rows in rows.items()}
+
+
+def _interleaved_next(current: int, position: int, amount: int) -> int:
+    """Smallest id above current that belongs to shard position of amount (id % amount == (position + 1) % amount)"""
+    return current + 1 + (position + 1 - (current + 1)) % amount
+
+
+def _parents_first(rows: list[dict]) -> list[dict]:
+    parents = {row["id"]: row["parent_id"] for row in rows}
+    depths: dict[int | None, int] = {None: -1}
+
+    def depth(unit_id: int) -> int:
+        path = []
+        while unit_id not in depths:
+            path.append(unit_id)
+            unit_id = parents.get(unit_id)
+        for unit_id in reversed(path):
+            depths[unit_id] = depths[parents.get(unit_id)] + 1
+        return depths[path[0]] if path else depths[unit_id]
+
+    return sorted(rows, key=lambda row: depth(row["id"]))
+
+
+def _amount_key(record) -> tuple[int, int]:
+    # same order as per-shard query: amount descending, then id ascending
+    return record.amount, -record.id
+
+
+LaboratoryEquipment = read_model(Laboratory, ["id", "title"], extra={"amount": func.count(Equipment.id)})
+LaboratoryAccounts = read_model(Laboratory, ["id", "title"], extra={"amount": func.count(Account.id)})
+
+
+def top_laboratories_by_equipment(router: ShardRouter, n: int = 10, parallel: bool = True) -> list:
+    """Laboratories with most live equipment over all shards"""
+    return router.top_n(
+        lambda session: fetch(
+            session,
+            LaboratoryEquipment,
+            lambda statement: statement.join(Laboratory.equipment_list)
+            .group_by(Laboratory.id)
+            .order_by(desc("amount"), Laboratory.id)
+            .limit(n),
+        ),
+        n,
+        _amount_key,
+        parallel,
+    )
+
+
+def top_laboratories_by_accounts(router: ShardRouter, n: int = 10, parallel: bool = True) -> list:
+    """Laboratories with most accounts over all shards"""
+    return router.top_n(
+        lambda session: fetch(
+            session,
+            LaboratoryAccounts,
+            lambda statement: statement.join(Laboratory.accounts)
+            .group_by(Laboratory.id)
+            .order_by(desc("amount"), Laboratory.id)
+            .limit(n),
+        ),
+        n,
+        _amount_key,
+        parallel,
+    )
+
+
+def count_per_shard(router: ShardRouter, model: type, parallel: bool = True) -> list[int]:
+    """Amount of live rows of model in every shard"""
+    return router.fan_out(lambda session: session.scalar(select(func.count()).select_from(model)), parallel)
+
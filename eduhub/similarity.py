@@ -0,0 +1,257 @@
+"""
+MinHash signatures with banded locality-sensitive hashing for software repositories and datasets.
+
+Similar resources are found by lookup of resources sharing at least one LSH band
+(index scan on resource_lsh_band) instead of pairwise comparison of all resources,
+and Jaccard similarity is estimated as share of equal MinHash values.
+"""
+import datetime
+import hashlib
+import itertools
+import re
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import delete, event, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from eduhub.models import (
+    Dataset,
+    Resource,
+    ResourceLshBand,
+    ResourceMinhash,
+    ResourceSimilarity,
+    SoftwareRepository,
+)
+
+NUM_PERMUTATIONS = 128
+NUM_BANDS = 32  # 4 rows per band, candidates start from Jaccard similarity ~0.42
+ROWS_PER_BAND = NUM_PERMUTATIONS // NUM_BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+SEED = 42
+
+_generator = np.random.default_rng(SEED)
+# a, b, and hashes are below 2^32, so (a * x + b) fits into uint64 without overflow
+_A = _generator.integers(1, MAX_HASH, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _generator.integers(0, MAX_HASH, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+SIMILAR_MODELS = (SoftwareRepository, Dataset)
+
+_WORD = re.compile(r"\w+")
+
+
+def shingles(resource: SoftwareRepository | Dataset) -> set[str]:
+    """Words and word bigrams of title and description, plus prefixed license, tags, and attribute names"""
+    words = _WORD.findall(f"{resource.title} {resource.description or ''}".lower())
+    result = set(words)
+    result.update(f"{first} {second}" for first, second in itertools.pairwise(words))
+    if resource.license:
+        result.add(f"license:{resource.license.lower()}")
+    for tag in getattr(resource, "tags", None) or []:
+        result.add(f"tag:{tag.lower()}")
+    for name in (getattr(resource, "attributes", None) or {}).keys():
+        result.add(f"attribute:{name.lower()}")
+    return result
+
+
+def _hash32(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=4).digest(), "little")
+
+
+def minhash(tokens: Iterable[str]) -> np.ndarray:
+    """Signature of NUM_PERMUTATIONS minimums of universal hash functions over token hashes"""
+    hashes = np.fromiter((_hash32(token) for token in tokens), dtype=np.uint64)
+    if len(hashes) == 0:
+        return np.full(NUM_PERMUTATIONS, MAX_HASH, dtype=np.uint64)
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % MERSENNE_PRIME & MAX_HASH
+    return permuted.min(axis=1)
+
+
+def band_hashes(signature: np.ndarray) -> list[int]:
+    """Signed 64-bit hash per band (fits into BIGINT)"""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "little", signed=True
+        )
+        for band in signature.astype(np.uint64).reshape(NUM_BANDS, ROWS_PER_BAND)
+    ]
+
+
+def estimated_jaccard(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Share of equal MinHash values between signature and each row of others"""
+    return (others == signature[None, :]).mean(axis=1)
+
+
+def remove_resources(session: Session, resource_ids: Iterable[int]) -> None:
+    """Drop signatures, LSH bands, and cached similarities of resources"""
+    resource_ids = list(resource_ids)
+    if not resource_ids:
+        return
+    connection = session.connection()
+    connection.execute(delete(ResourceLshBand.__table__).where(ResourceLshBand.resource_id.in_(resource_ids)))
+    connection.execute(delete(ResourceMinhash.__table__).where(ResourceMinhash.resource_id.in_(resource_ids)))
+    connection.execute(
+        delete(ResourceSimilarity.__table__).where(
+            ResourceSimilarity.resource_id.in_(resource_ids) | ResourceSimilarity.similar_id.in_(resource_ids)
+        )
+    )
+
+
+def index_resources(session: Session, resources: Iterable[SoftwareRepository | Dataset]) -> int:
+    """
+    Upsert signatures and replace LSH bands of resources (called on insert/update), soft-deleted
+    resources and resources without tokens are removed from index (their signatures would be
+    equal to each other and score 1.0)
+    """
+    now = datetime.datetime.now(tz=datetime.UTC)
+    signatures, bands, removed = [], [], []
+    for resource in resources:
+        tokens = shingles(resource)
+        if not tokens or getattr(resource, "deleted_at", None) is not None:
+            removed.append(resource.id)
+            continue
+        signature = minhash(tokens)
+        signatures.append({"resource_id": resource.id, "signature": signature.tolist(), "updated_at": now})
+        bands.extend(
+            {"band": band, "band_hash": band_hash, "resource_id": resource.id}
+            for band, band_hash in enumerate(band_hashes(signature))
+        )
+    remove_resources(session, removed)
+    if not signatures:
+        return 0
+    # Core statements on session connection, so it is also safe to call inside flush events
+    connection = session.connection()
+    minhash_table, band_table = ResourceMinhash.__table__, ResourceLshBand.__table__
+    resource_ids = [row["resource_id"] for row in signatures]
+    statement = pg_insert(minhash_table)
+    connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=[minhash_table.c.resource_id],
+            set_={"signature": statement.excluded.signature, "updated_at": statement.excluded.updated_at},
+        ),
+        signatures,
+    )
+    connection.execute(delete(band_table).where(band_table.c.resource_id.in_(resource_ids)))
+    connection.execute(insert(band_table), bands)
+    return len(signatures)
+
+
+def rebuild_index(session: Session, batch_size: int = 1000) -> int:
+    """
+    Index all live repositories and datasets, signatures of resources that were soft-deleted
+    without flush listener (raw SQL, bulk UPDATE) are removed
+    """
+    stale = (
+        select(ResourceMinhash.resource_id)
+        .join(Resource, Resource.id == ResourceMinhash.resource_id)
+        .where(Resource.deleted_at.is_not(None))
+        .execution_options(include_deleted=True)
+    )
+    remove_resources(session, session.scalars(stale).all())
+    indexed = 0
+    for model in SIMILAR_MODELS:
+        # tombstones are hidden by soft delete criteria
+        result = session.execute(select(model).execution_options(yield_per=batch_size))
+        for partition in result.scalars().partitions():
+            indexed += index_resources(session, partition)
+    return indexed
+
+
+def _signatures(session: Session, resource_ids: Iterable[int]) -> tuple[np.ndarray, np.ndarray]:
+    rows = session.execute(
+        select(ResourceMinhash.resource_id, ResourceMinhash.signature)
+        .where(ResourceMinhash.resource_id.in_(list(resource_ids)))
+        .order_by(ResourceMinhash.resource_id)
+    ).all()
+    ids = np.array([row.resource_id for row in rows], dtype=np.int64)
+    signatures = np.array([row.signature for row in rows], dtype=np.uint64).reshape(len(rows), NUM_PERMUTATIONS)
+    return ids, signatures
+
+
+def similar_resources(
+    session: Session,
+    resource_id: int,
+    k: int = 10,
+    threshold: float = 0.0,
+) -> list[tuple[int, float]]:
+    """Top-k resources with estimated Jaccard similarity (only LSH candidates are compared)"""
+    candidate_ids = session.execute(
+        text(
+            "SELECT DISTINCT candidate.resource_id "
+            "FROM resource_lsh_band AS query "
+            "JOIN resource_lsh_band AS candidate "
+            "ON candidate.band = query.band AND candidate.band_hash = query.band_hash "
+            "WHERE query.resource_id = :resource_id AND candidate.resource_id <> :resource_id"
+        ),
+        {"resource_id": resource_id},
+    ).scalars().all()
+    if not candidate_ids:
+        return []
+    _, query_signature = _signatures(session, [resource_id])
+    ids, signatures = _signatures(session, candidate_ids)
+    scores = estimated_jaccard(query_signature[0], signatures)
+    order = np.argsort(-scores)[:k]
+    return [(int(ids[position]), float(scores[position])) for position in order if scores[position] >= threshold]
+
+
+def cached_similar_resources(session: Session, resource_id: int, k: int = 10) -> list[tuple[int, float]]:
+    rows = session.execute(
+        select(ResourceSimilarity.similar_id, ResourceSimilarity.score)
+        .where(ResourceSimilarity.resource_id == resource_id)
+        .order_by(ResourceSimilarity.score.desc())
+        .limit(k)
+    )
+    return [(row.similar_id, row.score) for row in rows]
+
+
+def precompute_similarities(session: Session, k: int = 10, threshold: float = 0.0) -> int:
+    """Batch job: candidate pairs from one self-join over bands, scored with NumPy, top-k stored in cache table"""
+    pairs = np.array(
+        session.execute(
+            text(
+                "SELECT DISTINCT a.resource_id, b.resource_id "
+                "FROM resource_lsh_band AS a "
+                "JOIN resource_lsh_band AS b "
+                "ON b.band = a.band AND b.band_hash = a.band_hash AND b.resource_id <> a.resource_id"
+            )
+        ).all(),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    session.execute(delete(ResourceSimilarity))
+    if len(pairs) == 0:
+        return 0
+
+    ids, signatures = _signatures(session, np.unique(pairs).tolist())
+    positions = np.searchsorted(ids, pairs)  # ids are sorted, because np.unique returns sorted array
+    scores = (signatures[positions[:, 0]] == signatures[positions[:, 1]]).mean(axis=1)
+
+    # sort by resource, then by descending score, and keep first k rows of each resource
+    order = np.lexsort((-scores, pairs[:, 0]))
+    pairs, scores = pairs[order], scores[order]
+    starts = np.searchsorted(pairs[:, 0], pairs[:, 0], side="left")
+    rank = np.arange(len(pairs)) - starts
+    keep = (rank < k) & (scores >= threshold)
+
+    now = datetime.datetime.now(tz=datetime.UTC)
+    rows = [
+        {"resource_id": int(resource_id), "similar_id": int(similar_id), "score": float(score), "computed_at": now}
+        for (resource_id, similar_id), score in zip(pairs[keep], scores[keep])
+    ]
+    if rows:
+        session.execute(insert(ResourceSimilarity), rows)
+    return len(rows)
+
+
+@event.listens_for(Session, "after_flush")
+def similarity_index_event(session: Session, flush_context):
+    """Keep signatures of inserted/updated repositories and datasets up to date within same transaction"""
+    changed = [target for target in session.new if isinstance(target, SIMILAR_MODELS)]
+    changed += [
+        target
+        for target in session.dirty
+        if isinstance(target, SIMILAR_MODELS) and session.is_modified(target, include_collections=False)
+    ]
+    if changed:
+        index_resources(session, changed)
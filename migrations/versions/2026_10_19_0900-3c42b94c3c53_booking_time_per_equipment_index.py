@@ -0,0 +1,29 @@
+"""booking time per equipment index
+
+Revision ID: 3c42b94c3c53
+Revises: 3dec07985743
+Create Date: 2026-10-19 09:00:12.417305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from eduhub.common.migration import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = '3c42b94c3c53'
+down_revision: Union[str, Sequence[str], None] = '3dec07985743'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently('ix_booking_equipment_id_start_ts', 'booking', ['equipment_id', 'start_ts'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_booking_equipment_id_start_ts', 'booking')
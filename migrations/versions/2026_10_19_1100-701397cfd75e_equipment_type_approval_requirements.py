@@ -0,0 +1,30 @@
+"""equipment type approval requirements
+
+Revision ID: 701397cfd75e
+Revises: 1e0b3bb648eb
+Create Date: 2026-10-19 11:00:48.730215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from eduhub.common.migration import guarded
+
+# revision identifiers, used by Alembic.
+revision: str = '701397cfd75e'
+down_revision: Union[str, Sequence[str], None] = '1e0b3bb648eb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    guarded(lambda: op.add_column('equipment_type', sa.Column('approval_requirements', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='default approval rules for equipment of this type (overridden by equipment)')))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    guarded(lambda: op.drop_column('equipment_type', 'approval_requirements'))
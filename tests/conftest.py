@@ -0,0 +1,165 @@
+"""
+Transactional test harness:
+    1. schema (alembic migrations with extensions) is built once into template database
+    2. every pytest-xdist worker clones template via CREATE DATABASE ... TEMPLATE
+    3. every test runs inside SAVEPOINT of outer transaction that is rolled back afterwards
+    4. tests that commit or need several databases (shards) clone template with clone_database
+
+python3 -m pytest -n auto tests
+"""
+import dataclasses
+import zlib
+from typing import Callable, Iterator
+
+import pytest
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from alembic.script import ScriptDirectory
+from sqlalchemy import Connection, Engine, create_engine, text
+from sqlalchemy.orm import Session
+
+from eduhub.common.config import Config
+from tests import factories
+
+TEMPLATE_DATABASE = "eduhub_template"
+EXTENSIONS = ("btree_gist",)
+# pg_advisory_lock key, so only one xdist worker builds or clones template at a time
+TEMPLATE_LOCK_KEY = zlib.crc32(TEMPLATE_DATABASE.encode())
+
+
+def _database_config(config: Config, database: str) -> Config:
+    return dataclasses.replace(config, POSTGRES_DB=database)
+
+
+def _alembic_head() -> str:
+    return ScriptDirectory.from_config(AlembicConfig("alembic.ini")).get_current_head()
+
+
+def _build_template(maintenance: Connection, config: Config, head: str) -> None:
+    maintenance.execute(text(f"DROP DATABASE IF EXISTS {TEMPLATE_DATABASE}"))
+    maintenance.execute(text(f"CREATE DATABASE {TEMPLATE_DATABASE}"))
+
+    engine = create_engine(_database_config(config, TEMPLATE_DATABASE).postgres_url())
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for extension in EXTENSIONS:
+            connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+    with engine.connect() as connection:
+        alembic_config = AlembicConfig("alembic.ini")
+        alembic_config.attributes["connection"] = connection
+        command.upgrade(alembic_config, "head")
+        connection.commit()
+    engine.dispose()
+
+    # alembic head is stored in comment to rebuild template only when migrations change
+    maintenance.execute(text(f"COMMENT ON DATABASE {TEMPLATE_DATABASE} IS '{head}'"))
+    maintenance.execute(text(f"ALTER DATABASE {TEMPLATE_DATABASE} WITH IS_TEMPLATE true"))
+
+
+@pytest.fixture(scope="session")
+def config() -> Config:
+    return Config.load_from_env()
+
+
+@pytest.fixture(scope="session")
+def maintenance_engine(config: Config) -> Iterator[Engine]:
+    engine = create_engine(config.postgres_url(), isolation_level="AUTOCOMMIT")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def template_database(config: Config, maintenance_engine: Engine) -> str:
+    head = _alembic_head()
+    with maintenance_engine.connect() as maintenance:
+        maintenance.execute(text("SELECT pg_advisory_lock(:key)"), {"key": TEMPLATE_LOCK_KEY})
+        try:
+            current = maintenance.execute(
+                text("SELECT shobj_description(oid, 'pg_database') FROM pg_database WHERE datname = :name"),
+                {"name": TEMPLATE_DATABASE},
+            ).scalar_one_or_none()
+            if current != head:
+                if current is not None:
+                    maintenance.execute(text(f"ALTER DATABASE {TEMPLATE_DATABASE} WITH IS_TEMPLATE false"))
+                _build_template(maintenance, config, head)
+        finally:
+            maintenance.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": TEMPLATE_LOCK_KEY})
+    return TEMPLATE_DATABASE
+
+
+def _clone_database(maintenance_engine: Engine, template_database: str, name: str) -> None:
+    with maintenance_engine.connect() as maintenance:
+        maintenance.execute(text(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)"))
+        maintenance.execute(text("SELECT pg_advisory_lock(:key)"), {"key": TEMPLATE_LOCK_KEY})
+        try:
+            maintenance.execute(text(f"CREATE DATABASE {name} TEMPLATE {template_database}"))
+        finally:
+            maintenance.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": TEMPLATE_LOCK_KEY})
+
+
+def _drop_database(maintenance_engine: Engine, name: str) -> None:
+    with maintenance_engine.connect() as maintenance:
+        maintenance.execute(text(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)"))
+
+
+@pytest.fixture(scope="session")
+def worker_database(
+    config: Config,
+    maintenance_engine: Engine,
+    template_database: str,
+    worker_id: str,
+) -> Iterator[str]:
+    """Database cloned from template for current xdist worker ("master" without xdist)"""
+    name = f"eduhub_test_{worker_id}"
+    _clone_database(maintenance_engine, template_database, name)
+    yield name
+    _drop_database(maintenance_engine, name)
+
+
+@pytest.fixture
+def clone_database(
+    config: Config,
+    maintenance_engine: Engine,
+    template_database: str,
+    worker_id: str,
+) -> Iterator[Callable[[str], str]]:
+    """
+    Creates extra databases cloned from template (e.g., shards), returns URL of database by suffix,
+    databases are dropped after test (changes are committed, so savepoint isolation does not apply)
+    """
+    names = []
+
+    def clone(suffix: str) -> str:
+        name = f"eduhub_test_{worker_id}_{suffix}"
+        _clone_database(maintenance_engine, template_database, name)
+        names.append(name)
+        return _database_config(config, name).postgres_url()
+
+    yield clone
+    for name in names:
+        _drop_database(maintenance_engine, name)
+
+
+@pytest.fixture(scope="session")
+def engine(config: Config, worker_database: str) -> Iterator[Engine]:
+    engine = create_engine(_database_config(config, worker_database).postgres_url())
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def connection(engine: Engine) -> Iterator[Connection]:
+    """Connection with outer transaction that is never committed"""
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        yield connection
+        transaction.rollback()
+
+
+@pytest.fixture
+def session(connection: Connection) -> Iterator[Session]:
+    """ORM session where session.commit() only releases SAVEPOINT of outer transaction"""
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    factories.bind(session)
+    yield session
+    factories.bind(None)
+    session.close()
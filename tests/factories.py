@@ -0,0 +1,476 @@
+"""Factories for every model in eduhub.models (session is bound per test by conftest.session fixture)"""
+import datetime
+
+import factory
+from factory.alchemy import SQLAlchemyModelFactory
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import (
+    AccountRole,
+    BookingStatus,
+    BucketSize,
+    ChangeOperation,
+    EquipmentStatus,
+    OrganizationUnitKind,
+    PartnerType,
+    PresentationVisibility,
+    ProjectStatus,
+    ProjectType,
+    ReportStatus,
+    UtilizationDimension,
+)
+from eduhub.similarity import NUM_BANDS, NUM_PERMUTATIONS
+from eduhub.models import (
+    Account,
+    AccountBookingUsage,
+    ArchiveSegment,
+    ArchivedBooking,
+    Booking,
+    BookingApproval,
+    BookingHistory,
+    BookingOutbox,
+    BookingQuota,
+    BookingSnapshot,
+    ChangeFeedOffset,
+    Dataset,
+    DatasetFile,
+    Equipment,
+    EquipmentType,
+    FingerprintedDocument,
+    Laboratory,
+    LaboratoryShard,
+    OrganizationClosure,
+    OrganizationUnit,
+    Partner,
+    Presentation,
+    Profile,
+    Project,
+    Publication,
+    RecommendationChange,
+    Report,
+    ResourceFingerprint,
+    ResourceLshBand,
+    ResourceMinhash,
+    ResourceSimilarity,
+    Room,
+    SoftwareRepository,
+    TableChange,
+    TombstoneArchive,
+    UtilizationRollup,
+)
+
+
+class BaseFactory(SQLAlchemyModelFactory):
+    class Meta:
+        abstract = True
+        sqlalchemy_session = None
+        sqlalchemy_session_persistence = "flush"
+
+
+def bind(session: Session | None) -> None:
+    """Attach session to all factories (None detaches it after test)"""
+    for subclass in _all_factories(BaseFactory):
+        subclass._meta.sqlalchemy_session = session
+
+
+def _all_factories(cls: type) -> list[type]:
+    return [
+        descendant
+        for subclass in cls.__subclasses__()
+        for descendant in [subclass, *_all_factories(subclass)]
+    ]
+
+
+class OrganizationUnitFactory(BaseFactory):
+    class Meta:
+        model = OrganizationUnit
+
+    title = factory.Faker("company")
+    kind = OrganizationUnitKind.UNIVERSITY
+    parent = None
+
+
+class OrganizationClosureFactory(BaseFactory):
+    class Meta:
+        model = OrganizationClosure
+
+    class Params:
+        ancestor = factory.SubFactory(OrganizationUnitFactory)
+        descendant = factory.SubFactory(OrganizationUnitFactory, kind=OrganizationUnitKind.FACULTY)
+
+    ancestor_id = factory.SelfAttribute("ancestor.id")
+    descendant_id = factory.SelfAttribute("descendant.id")
+    depth = 1
+
+
+class LaboratoryFactory(BaseFactory):
+    class Meta:
+        model = Laboratory
+
+    title = factory.Faker("company")
+    description = factory.Faker("catch_phrase")
+
+
+class LaboratoryShardFactory(BaseFactory):
+    class Meta:
+        model = LaboratoryShard
+
+    laboratory_id = factory.LazyFunction(lambda: LaboratoryFactory().id)
+    shard = 0
+
+
+class AccountFactory(BaseFactory):
+    class Meta:
+        model = Account
+
+    full_name = factory.Faker("name")
+    email = factory.Sequence(lambda n: f"account_{n}@example.com")
+    role = AccountRole.STUDENT
+    laboratory = factory.SubFactory(LaboratoryFactory)
+
+
+class ProfileFactory(BaseFactory):
+    class Meta:
+        model = Profile
+
+    photo_link = factory.Faker("image_url")
+    description = factory.Faker("text", max_nb_chars=100)
+    affiliation = factory.Faker("company")
+    interest_areas = factory.List([factory.Faker("job") for index in range(3)])
+    posts = None
+    account = factory.SubFactory(AccountFactory)
+
+
+class RoomFactory(BaseFactory):
+    class Meta:
+        model = Room
+
+    label = factory.Sequence(lambda n: f"C1.1.{n:03d}")
+    description = factory.Faker("text", max_nb_chars=100)
+    laboratory = factory.SubFactory(LaboratoryFactory)
+
+
+class EquipmentTypeFactory(BaseFactory):
+    class Meta:
+        model = EquipmentType
+
+    title = factory.Faker("catch_phrase")
+    description = factory.Faker("text", max_nb_chars=200)
+    characteristics = factory.Dict({"brand": factory.Faker("company")})
+
+
+class EquipmentFactory(BaseFactory):
+    class Meta:
+        model = Equipment
+
+    status = EquipmentStatus.ACTIVE
+    description = factory.Faker("text", max_nb_chars=200)
+    media_link = factory.Faker("image_url")
+    approval_requirements = None
+    laboratory = factory.SubFactory(LaboratoryFactory)
+    equipment_type_id = factory.LazyFunction(lambda: EquipmentTypeFactory().id)
+
+
+class PartnerFactory(BaseFactory):
+    class Meta:
+        model = Partner
+
+    title = factory.Faker("company")
+    type = PartnerType.LOCAL
+
+
+class ProjectFactory(BaseFactory):
+    class Meta:
+        model = Project
+
+    title = factory.Faker("text", max_nb_chars=20)
+    description = factory.Faker("text", max_nb_chars=200)
+    type = ProjectType.RESEARCH
+    status = ProjectStatus.ACTIVE
+    laboratory = factory.SubFactory(LaboratoryFactory)
+
+
+class ResourceFactory(BaseFactory):
+    class Meta:
+        abstract = True
+
+    title = factory.Faker("text", max_nb_chars=20)
+    description = factory.Faker("text", max_nb_chars=200)
+    link = factory.Faker("url")
+
+
+class PresentationFactory(ResourceFactory):
+    class Meta:
+        model = Presentation
+
+    duration = factory.Faker("pyint", min_value=1, max_value=10**4)
+    subtitles = None
+    visibility = PresentationVisibility.PRIVATE_INTERNAL
+
+
+class ReportFactory(ResourceFactory):
+    class Meta:
+        model = Report
+
+    start = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+    end = factory.LazyAttribute(lambda report: report.start + datetime.timedelta(days=7))
+    responsibility_zone = factory.Faker("text", max_nb_chars=200)
+    comments = factory.Faker("text", max_nb_chars=200)
+    status = ReportStatus.DRAFT
+
+
+class PublicationFactory(ResourceFactory):
+    class Meta:
+        model = Publication
+
+    keywords = factory.Faker("words", nb=5)
+    publisher = factory.Faker("company")
+
+
+class SoftwareRepositoryFactory(ResourceFactory):
+    class Meta:
+        model = SoftwareRepository
+
+    license = "MIT"
+    lines_amount = factory.Faker("pyint", min_value=1, max_value=10**4)
+
+
+class DatasetFactory(ResourceFactory):
+    class Meta:
+        model = Dataset
+
+    license = "CC-BY-4.0"
+    tags = factory.Faker("words", nb=5)
+    size = factory.Faker("pyint", min_value=1, max_value=10**4)
+    attributes = None
+
+
+class ResourceMinhashFactory(BaseFactory):
+    class Meta:
+        model = ResourceMinhash
+
+    # presentations are not indexed by flush listener of eduhub.similarity, so signature is not overwritten
+    resource_id = factory.LazyFunction(lambda: PresentationFactory().id)
+    signature = factory.LazyFunction(lambda: list(range(NUM_PERMUTATIONS)))
+    updated_at = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+
+
+class ResourceLshBandFactory(BaseFactory):
+    class Meta:
+        model = ResourceLshBand
+
+    band = factory.Sequence(lambda n: n % NUM_BANDS)
+    band_hash = factory.Faker("pyint", min_value=-(2**63), max_value=2**63 - 1)
+    resource_id = factory.LazyFunction(lambda: PresentationFactory().id)
+
+
+class ResourceSimilarityFactory(BaseFactory):
+    class Meta:
+        model = ResourceSimilarity
+
+    resource_id = factory.LazyFunction(lambda: PresentationFactory().id)
+    similar_id = factory.LazyFunction(lambda: PresentationFactory().id)
+    score = factory.Faker("pyfloat", min_value=0, max_value=1)
+    computed_at = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+
+
+class BookingFactory(BaseFactory):
+    class Meta:
+        model = Booking
+
+    equipment_id = factory.LazyFunction(lambda: EquipmentFactory().id)
+    requester_id = factory.LazyFunction(lambda: AccountFactory().id)
+    approver_id = factory.LazyFunction(lambda: AccountFactory(role=AccountRole.STAFF).id)
+    start_ts = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+    end_ts = factory.LazyAttribute(lambda booking: booking.start_ts + datetime.timedelta(hours=2))
+    status = BookingStatus.REQUESTED
+    comment = None
+
+
+class BookingHistoryFactory(BaseFactory):
+    class Meta:
+        model = BookingHistory
+
+    note = "Booking changed"
+    changed_at = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+    booking = factory.SubFactory(BookingFactory)
+
+
+class BookingSnapshotFactory(BaseFactory):
+    class Meta:
+        model = BookingSnapshot
+
+    class Params:
+        booking = factory.SubFactory(BookingFactory)
+
+    booking_id = factory.SelfAttribute("booking.id")
+    history_id = 0
+    changed_at = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+    data = factory.LazyAttribute(
+        lambda snapshot: {
+            "id": snapshot.booking.id,
+            "equipment_id": snapshot.booking.equipment_id,
+            "requester_id": snapshot.booking.requester_id,
+            "approver_id": snapshot.booking.approver_id,
+            "start_ts": snapshot.booking.start_ts.isoformat(),
+            "end_ts": snapshot.booking.end_ts.isoformat(),
+            "status": snapshot.booking.status.name,
+            "comment": snapshot.booking.comment,
+            "deleted_at": None,
+        }
+    )
+
+
+class UtilizationRollupFactory(BaseFactory):
+    class Meta:
+        model = UtilizationRollup
+
+    dimension = UtilizationDimension.EQUIPMENT
+    key = factory.Sequence(lambda n: n + 1)
+    bucket_size = BucketSize.DAY
+    bucket_start = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+    booking_count = 1
+    occupied_seconds = 3600.0
+    capacity_seconds = 86400.0
+    peak_concurrency = 1
+    computed_at = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+
+
+class BookingQuotaFactory(BaseFactory):
+    class Meta:
+        model = BookingQuota
+
+    role = AccountRole.STUDENT
+    laboratory_id = None
+    max_active = 5
+
+
+class RecommendationChangeFactory(BaseFactory):
+    class Meta:
+        model = RecommendationChange
+
+    kind = "project"
+    entity_id = factory.LazyFunction(lambda: ProjectFactory().id)
+
+
+class BookingApprovalFactory(BaseFactory):
+    class Meta:
+        model = BookingApproval
+
+    booking_id = factory.LazyFunction(lambda: BookingFactory().id)
+    step = 0
+    role = AccountRole.STAFF
+    approver_id = None
+    approved_at = None
+
+
+class AccountBookingUsageFactory(BaseFactory):
+    class Meta:
+        model = AccountBookingUsage
+
+    account_id = factory.LazyFunction(lambda: AccountFactory().id)
+    active_count = 0
+    updated_at = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+
+
+class FingerprintedDocumentFactory(BaseFactory):
+    class Meta:
+        model = FingerprintedDocument
+
+    resource_id = factory.LazyFunction(lambda: PresentationFactory().id)
+    content_hash = factory.Faker("md5")
+    fingerprint_count = 0
+    fingerprinted_at = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+
+
+class ResourceFingerprintFactory(BaseFactory):
+    class Meta:
+        model = ResourceFingerprint
+
+    fingerprint = factory.Sequence(lambda n: n + 1)
+    resource_id = factory.LazyFunction(lambda: PresentationFactory().id)
+
+
+class DatasetFileFactory(BaseFactory):
+    class Meta:
+        model = DatasetFile
+
+    dataset_id = factory.LazyFunction(lambda: DatasetFactory().id)
+    path = factory.Faker("file_path", extension="csv")
+    size = factory.Faker("pyint", min_value=1, max_value=10**4)
+    mtime_ns = factory.Faker("pyint", min_value=1, max_value=10**9)
+    content_hash = factory.Faker("md5")
+    format = "csv"
+    scanned_at = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+
+
+class BookingOutboxFactory(BaseFactory):
+    class Meta:
+        model = BookingOutbox
+
+    booking_id = factory.Sequence(lambda n: n + 1)
+    operation = ChangeOperation.INSERT
+    status = BookingStatus.REQUESTED
+    changed_columns = factory.LazyFunction(list)
+
+
+class ArchiveSegmentFactory(BaseFactory):
+    class Meta:
+        model = ArchiveSegment
+
+    path = factory.Sequence(lambda n: f"bookings-{n}.jsonl.zst")
+    format = "jsonl"
+    bookings = 1
+    history_rows = 1
+    raw_bytes = 1000
+    stored_bytes = 100
+    sha256 = factory.Faker("sha256")
+
+
+class ArchivedBookingFactory(BaseFactory):
+    class Meta:
+        model = ArchivedBooking
+
+    class Params:
+        segment = factory.SubFactory(ArchiveSegmentFactory)
+
+    # archived ids were allocated by hot booking table, high range keeps them apart from bookings of test
+    id = factory.Sequence(lambda n: 10**9 + n)
+    equipment_id = factory.Sequence(lambda n: n + 1)
+    requester_id = factory.Sequence(lambda n: n + 1)
+    approver_id = factory.Sequence(lambda n: n + 1)
+    start_ts = datetime.datetime(2025, 1, 1, 9, tzinfo=datetime.UTC)
+    end_ts = factory.LazyAttribute(lambda booking: booking.start_ts + datetime.timedelta(hours=2))
+    status = BookingStatus.COMPLETED
+    comment = None
+    deleted_at = None
+    segment_id = factory.SelfAttribute("segment.id")
+
+
+class ChangeFeedOffsetFactory(BaseFactory):
+    class Meta:
+        model = ChangeFeedOffset
+
+    consumer = factory.Sequence(lambda n: f"consumer-{n}")
+    transaction_id = 0
+    outbox_id = 0
+    updated_at = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+
+
+class TombstoneArchiveFactory(BaseFactory):
+    class Meta:
+        model = TombstoneArchive
+
+    table_name = "booking"
+    row_id = factory.Sequence(lambda n: n + 1)
+    deleted_at = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+    archived_at = factory.LazyFunction(lambda: datetime.datetime.now(tz=datetime.UTC))
+    data = factory.LazyFunction(lambda: {"dependents": {}})
+
+
+class TableChangeFactory(BaseFactory):
+    class Meta:
+        model = TableChange
+
+    table_name = "booking"
+    changes = 1
@@ -0,0 +1,11 @@
+from eduhub import Base
+from eduhub.scripts.advise_indexes import unindexed_foreign_keys
+
+
+def test_partial_indexes_do_not_cover_foreign_keys():
+    candidates = {(candidate.table, candidate.columns) for candidate in unindexed_foreign_keys(Base.metadata)}
+    # leading columns of partial indexes only (WHERE deleted_at IS NULL ...)
+    assert ("booking", ("requester_id",)) in candidates
+    assert ("project", ("laboratory_id",)) in candidates
+    # full index
+    assert ("booking_history", ("booking_id",)) not in candidates
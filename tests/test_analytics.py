@@ -0,0 +1,55 @@
+import datetime
+
+from sqlalchemy.orm import Session
+
+from eduhub.analytics import Utilization, bucket_edges, utilization, utilization_frame
+from eduhub.common.types import BookingStatus, BucketSize, UtilizationDimension
+from tests.factories import BookingFactory, EquipmentFactory
+
+
+def _at(hour: int, minute: int = 0) -> datetime.datetime:
+    return datetime.datetime(2026, 1, 5, hour, minute, tzinfo=datetime.UTC)
+
+
+# key 1: long booking overlapped by short one, third one starts exactly when second ends
+WINDOWS = [
+    (1, _at(9), _at(10, 30)),
+    (1, _at(9, 30), _at(10)),
+    (1, _at(10), _at(10, 15)),
+    (2, _at(11, 15), _at(11, 45)),
+]
+
+
+def test_bucket_edges_are_aligned_like_date_trunc():
+    assert bucket_edges(BucketSize.HOUR, _at(9, 40), _at(11)) == [_at(9), _at(10), _at(11)]
+    wednesday = datetime.datetime(2026, 1, 7, 15, tzinfo=datetime.UTC)
+    assert bucket_edges(BucketSize.WEEK, wednesday, wednesday)[0] == datetime.datetime(2026, 1, 5, tzinfo=datetime.UTC)
+
+
+def test_utilization_frame_sweeps_overlapping_bookings():
+    keys, starts, ends = zip(*WINDOWS)
+
+    result = utilization_frame(keys, starts, ends, BucketSize.HOUR, _at(9), _at(12), equipment_count={1: 2})
+
+    assert result == [
+        Utilization(1, _at(9), booking_count=2, occupied_seconds=5400.0, capacity_seconds=7200.0, peak_concurrency=2),
+        Utilization(1, _at(10), booking_count=2, occupied_seconds=2700.0, capacity_seconds=7200.0, peak_concurrency=2),
+        Utilization(2, _at(11), booking_count=1, occupied_seconds=1800.0, capacity_seconds=3600.0, peak_concurrency=1),
+    ]
+    assert result[0].occupancy == 0.75 and result[1].idle_seconds == 4500.0
+
+
+def test_utilization_frame_matches_database(session: Session):
+    equipment = {key: EquipmentFactory() for key in (1, 2)}
+    for key, start_ts, end_ts in WINDOWS:
+        BookingFactory(equipment_id=equipment[key].id, status=BookingStatus.APPROVED, start_ts=start_ts, end_ts=end_ts)
+    # requested bookings do not occupy equipment
+    BookingFactory(equipment_id=equipment[2].id, status=BookingStatus.REQUESTED, start_ts=_at(9), end_ts=_at(12))
+    session.flush()
+
+    ids = {item.id for item in equipment.values()}
+    computed = [
+        row for row in utilization(session, UtilizationDimension.EQUIPMENT, BucketSize.HOUR, _at(9), _at(12)) if row.key in ids
+    ]
+    keys, starts, ends = zip(*((equipment[key].id, start_ts, end_ts) for key, start_ts, end_ts in WINDOWS))
+    assert computed == utilization_frame(keys, starts, ends, BucketSize.HOUR, _at(9), _at(12))
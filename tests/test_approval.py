@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from eduhub.approval import StepError, bulk_approve, sign_off
+from eduhub.common.types import AccountRole, BookingStatus
+from eduhub.models import Booking
+from tests.factories import AccountFactory, BookingFactory, EquipmentFactory
+
+
+def _status(session: Session, booking_id: int) -> BookingStatus:
+    return session.scalar(select(Booking.status).where(Booking.id == booking_id))
+
+
+def test_booking_with_approval_steps_stays_requested_until_signed(session: Session):
+    equipment = EquipmentFactory(approval_requirements={"approval_steps": ["staff", "moderator"]})
+    booking = BookingFactory(equipment_id=equipment.id)
+    staff, moderator = AccountFactory(role=AccountRole.STAFF), AccountFactory(role=AccountRole.MODERATOR)
+
+    [decision] = bulk_approve(session, [booking.id])
+    assert decision.allowed and decision.pending_step == AccountRole.STAFF
+    assert _status(session, booking.id) == BookingStatus.REQUESTED
+
+    with pytest.raises(StepError):
+        sign_off(session, booking.id, AccountFactory(role=AccountRole.STUDENT).id)
+    assert sign_off(session, booking.id, staff.id) == AccountRole.MODERATOR
+    [decision] = bulk_approve(session, [booking.id])
+    assert decision.pending_step == AccountRole.MODERATOR
+    assert _status(session, booking.id) == BookingStatus.REQUESTED
+
+    assert sign_off(session, booking.id, moderator.id) is None
+    [decision] = bulk_approve(session, [booking.id])
+    assert decision.pending_step is None
+    assert _status(session, booking.id) == BookingStatus.APPROVED
+
+
+def test_booking_without_approval_steps_is_approved(session: Session):
+    booking = BookingFactory(equipment_id=EquipmentFactory(approval_requirements={"minimal_role": "student"}).id)
+    [decision] = bulk_approve(session, [booking.id])
+    assert decision.allowed and decision.pending_step is None
+    assert _status(session, booking.id) == BookingStatus.APPROVED
@@ -0,0 +1,79 @@
+import datetime
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from eduhub.archive import archive_batch, booking_history, bookings, bookings_as_of, equipment_bookings, read_segment, write_segment
+from eduhub.common.types import BookingStatus
+from eduhub.history import take_snapshots_batch
+from eduhub.models import ArchivedBooking, Booking, BookingHistory, BookingSnapshot
+from tests.factories import ArchivedBookingFactory, BookingFactory
+
+
+def test_segment_round_trip(tmp_path: Path):
+    entries = [
+        {"id": booking_id, "booking": {"id": booking_id, "status": "COMPLETED"}, "history": [{"id": booking_id}], "snapshots": []}
+        for booking_id in (3, 5)
+    ]
+    segment = write_segment(tmp_path, entries)
+
+    assert (segment["bookings"], segment["history_rows"]) == (2, 2)
+    assert segment["stored_bytes"] == (tmp_path / segment["path"]).stat().st_size
+    assert read_segment(tmp_path / segment["path"], "jsonl") == {3: entries[0], 5: entries[1]}
+
+
+def test_bookings_are_read_from_hot_and_archived_tables(session: Session):
+    booking = BookingFactory(status=BookingStatus.APPROVED, start_ts=datetime.datetime(2026, 1, 1, 9, tzinfo=datetime.UTC))
+    archived = ArchivedBookingFactory(equipment_id=booking.equipment_id)
+    ArchivedBookingFactory(equipment_id=booking.equipment_id, deleted_at=datetime.datetime.now(tz=datetime.UTC))
+
+    records = equipment_bookings(
+        session,
+        booking.equipment_id,
+        datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC),
+        datetime.datetime(2027, 1, 1, tzinfo=datetime.UTC),
+    )
+    assert [record.id for record in records] == [archived.id, booking.id]
+    assert bookings(session, [booking.id, archived.id])[archived.id].status == BookingStatus.COMPLETED
+
+
+def test_archive_batch_moves_closed_bookings_into_segment(session: Session, tmp_path: Path):
+    start_ts = datetime.datetime(2025, 1, 1, 9, tzinfo=datetime.UTC)
+    closed = BookingFactory(status=BookingStatus.REQUESTED, start_ts=start_ts)
+    requested_at = datetime.datetime.now(tz=datetime.UTC)
+    closed.status = BookingStatus.COMPLETED
+    session.flush()
+    assert take_snapshots_batch(session, min_changes=1) >= 1
+    approved = BookingFactory(status=BookingStatus.APPROVED, start_ts=start_ts)
+    recent = BookingFactory(status=BookingStatus.COMPLETED, start_ts=datetime.datetime(2025, 12, 1, tzinfo=datetime.UTC))
+    closed_id = closed.id
+    session.expunge(closed)
+
+    segment = archive_batch(session, datetime.datetime(2025, 6, 1, tzinfo=datetime.UTC), directory=tmp_path)
+
+    assert (segment["bookings"], segment["history_rows"]) == (1, 2)
+    assert (tmp_path / segment["path"]).exists()
+    for model, column in ((Booking, Booking.id), (BookingHistory, BookingHistory.booking_id), (BookingSnapshot, BookingSnapshot.booking_id)):
+        statement = select(func.count()).select_from(model).where(column == closed_id).execution_options(include_deleted=True)
+        assert session.scalar(statement) == 0
+    archived = session.get(ArchivedBooking, closed_id)
+    assert archived.status == BookingStatus.COMPLETED
+    assert session.scalar(select(func.count()).select_from(ArchivedBooking).where(ArchivedBooking.id.in_([approved.id, recent.id]))) == 0
+
+    assert [row["operation"] for row in booking_history(session, closed_id, tmp_path)] == ["INSERT", "UPDATE"]
+    assert bookings_as_of(session, [closed_id], requested_at, tmp_path)[closed_id].status == BookingStatus.REQUESTED
+    now = datetime.datetime.now(tz=datetime.UTC)
+    assert bookings_as_of(session, [closed_id], now, tmp_path)[closed_id].status == BookingStatus.COMPLETED
+    assert set(bookings(session, [closed_id, approved.id])) == {closed_id, approved.id}
+
+
+def test_bookings_include_soft_deleted_hot_and_archived(session: Session):
+    deleted_at = datetime.datetime.now(tz=datetime.UTC)
+    booking = BookingFactory(deleted_at=deleted_at)
+    archived = ArchivedBookingFactory(deleted_at=deleted_at)
+
+    records = bookings(session, [booking.id, archived.id])
+    assert {booking_id: record.deleted_at for booking_id, record in records.items()} == {
+        booking.id: deleted_at, archived.id: deleted_at,
+    }
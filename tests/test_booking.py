@@ -0,0 +1,88 @@
+import datetime
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+import pytest
+from sqlalchemy import Engine, text
+
+from eduhub.booking import BookingConflict, request_booking
+from eduhub.common.transaction import RetryBudget, TransactionRunner
+
+WORKERS = 8
+REQUESTS = 64
+SLOTS = 4
+
+CLEANUP_STATEMENTS = (
+    "DELETE FROM booking_outbox WHERE booking_id IN (SELECT id FROM booking WHERE equipment_id = :equipment_id)",
+    "DELETE FROM booking_history WHERE booking_id IN (SELECT id FROM booking WHERE equipment_id = :equipment_id)",
+    "DELETE FROM booking WHERE equipment_id = :equipment_id",
+    "DELETE FROM equipment WHERE id = :equipment_id",
+    "DELETE FROM account WHERE laboratory_id = :laboratory_id",
+    "DELETE FROM laboratory WHERE id = :laboratory_id",
+)
+
+
+@pytest.fixture
+def contended_equipment(engine: Engine) -> Iterator[tuple[int, list[int]]]:
+    """Equipment and requesters committed outside of test transaction (concurrent sessions must see them)"""
+    with engine.begin() as connection:
+        laboratory_id = connection.execute(
+            text("INSERT INTO laboratory (title) VALUES ('test_contention') RETURNING id")
+        ).scalar_one()
+        account_ids = connection.execute(
+            text(
+                "INSERT INTO account (full_name, email, role, laboratory_id) "
+                "SELECT 'test_contention', 'test_contention_' || gen_random_uuid() || '@example.com', 'STAFF', :laboratory_id "
+                "FROM generate_series(1, :amount) RETURNING id"
+            ),
+            {"laboratory_id": laboratory_id, "amount": WORKERS},
+        ).scalars().all()
+        equipment_id = connection.execute(
+            text("INSERT INTO equipment (status, laboratory_id) VALUES ('ACTIVE', :laboratory_id) RETURNING id"),
+            {"laboratory_id": laboratory_id},
+        ).scalar_one()
+    yield equipment_id, account_ids
+    with engine.begin() as connection:
+        for statement in CLEANUP_STATEMENTS:
+            connection.execute(text(statement), {"equipment_id": equipment_id, "laboratory_id": laboratory_id})
+
+
+def test_concurrent_requests_do_not_overlap(engine: Engine, contended_equipment: tuple[int, list[int]]):
+    equipment_id, account_ids = contended_equipment
+    runner = TransactionRunner(engine, max_attempts=50, budget=RetryBudget(ratio=1.0, min_retries=REQUESTS * 10))
+    start = datetime.datetime(2030, 1, 1, 9, tzinfo=datetime.UTC)
+
+    def request(index: int) -> str:
+        # half-hour shift makes neighbouring slots overlap too
+        slot_start = start + datetime.timedelta(minutes=30 * (index % SLOTS))
+        try:
+            runner.run(
+                lambda session: request_booking(
+                    session,
+                    equipment_id,
+                    requester_id=account_ids[index % len(account_ids)],
+                    approver_id=account_ids[0],
+                    start_ts=slot_start,
+                    end_ts=slot_start + datetime.timedelta(hours=1),
+                ),
+                name="request_booking",
+            )
+            return "booked"
+        except BookingConflict:
+            return "conflict"
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        outcomes = list(executor.map(request, range(REQUESTS)))
+
+    with engine.connect() as connection:
+        bookings = connection.execute(
+            text(
+                "SELECT start_ts, end_ts FROM booking "
+                "WHERE equipment_id = :equipment_id AND status IN ('REQUESTED', 'APPROVED') ORDER BY start_ts"
+            ),
+            {"equipment_id": equipment_id},
+        ).all()
+    assert outcomes.count("booked") == len(bookings) > 0
+    for first, second in itertools.pairwise(bookings):
+        assert first.end_ts <= second.start_ts
@@ -0,0 +1,52 @@
+import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from eduhub.changefeed import purge
+from eduhub.common.types import BookingStatus, ChangeOperation
+from eduhub.models import Booking, BookingOutbox
+from eduhub.purge import purge_batch
+from tests.factories import BookingFactory, BookingOutboxFactory, ChangeFeedOffsetFactory
+
+
+def test_booking_changes_are_written_to_outbox(session: Session):
+    booking = BookingFactory(status=BookingStatus.REQUESTED)
+    booking.status = BookingStatus.APPROVED
+    session.flush()
+
+    rows = session.execute(
+        select(BookingOutbox.operation, BookingOutbox.status, BookingOutbox.changed_columns)
+        .where(BookingOutbox.booking_id == booking.id)
+        .order_by(BookingOutbox.id)
+    ).all()
+    assert rows == [
+        (ChangeOperation.INSERT, BookingStatus.REQUESTED, []),
+        (ChangeOperation.UPDATE, BookingStatus.APPROVED, ["status"]),
+    ]
+
+
+def test_soft_deletion_is_published_and_purge_is_not(session: Session):
+    booking = BookingFactory()
+    booking.deleted_at = datetime.datetime.now(tz=datetime.UTC) - datetime.timedelta(days=30)
+    session.flush()
+    booking_id = booking.id
+    session.expunge(booking)
+
+    assert purge_batch(session, Booking, datetime.datetime.now(tz=datetime.UTC) - datetime.timedelta(days=7), 100) == 1
+    rows = session.execute(
+        select(BookingOutbox.operation, BookingOutbox.changed_columns)
+        .where(BookingOutbox.booking_id == booking_id)
+        .order_by(BookingOutbox.id)
+    ).all()
+    assert rows == [(ChangeOperation.INSERT, []), (ChangeOperation.DELETE, ["deleted_at"])]
+
+
+def test_purge_keeps_rows_not_processed_by_every_consumer(session: Session):
+    created_at = datetime.datetime.now(tz=datetime.UTC) - datetime.timedelta(days=2)
+    processed = BookingOutboxFactory(created_at=created_at)
+    pending = BookingOutboxFactory(created_at=created_at)
+    ChangeFeedOffsetFactory(transaction_id=processed.transaction_id, outbox_id=processed.id)
+
+    assert purge(session, datetime.timedelta(days=1)) == 1
+    assert session.scalars(select(BookingOutbox.id).where(BookingOutbox.id.in_([processed.id, pending.id]))).all() == [pending.id]
@@ -0,0 +1,51 @@
+import collections
+import json
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from eduhub.counters import WriteBehindCounters, write_increments
+from tests.factories import EquipmentFactory, PresentationFactory, ProfileFactory
+
+
+def test_repeated_recover_does_not_count_twice(tmp_path: Path):
+    spill_path = tmp_path / "counters.spill"
+    spill_path.write_text(json.dumps({"counter": "equipment_views", "key": 1, "amount": 5}) + "\n")
+    (tmp_path / "counters.spill.flushing").write_text(
+        json.dumps({"counter": "post_views", "key": [1, "intro"], "amount": 2}) + '\n{"counter": "equip'
+    )
+
+    for _ in range(3):
+        # restart without flush
+        counters = WriteBehindCounters(engine=None, spill_path=spill_path)
+        assert counters.recover() == 2
+        assert counters.spill() == 0
+        assert counters.buffer.drain() == {("equipment_views", 1): 5, ("post_views", (1, "intro")): 2}
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["counters.spill"]
+
+
+def test_write_increments_updates_columns_and_posts(session: Session):
+    equipment, other_equipment = EquipmentFactory.create_batch(2)
+    presentation = PresentationFactory()
+    profile = ProfileFactory(posts=[{"slug": "intro", "views": 2}, {"slug": "news"}, {"slug": "quiet"}])
+    empty_profile = ProfileFactory(posts=[])
+    session.flush()
+    batch = collections.Counter({
+        ("equipment_views", equipment.id): 3,
+        ("resource_views", presentation.id): 4,
+        ("resource_downloads", presentation.id): 1,
+        ("post_views", (profile.id, "intro")): 5,
+        ("post_views", (profile.id, "news")): 1,
+        ("post_views", (empty_profile.id, "missing")): 7,
+    })
+
+    rows = write_increments(session.connection(), batch)
+
+    assert rows == {"equipment": 1, "resource": 1, "profile": 2}
+    session.expire_all()
+    assert (equipment.view_count, other_equipment.view_count) == (3, 0)
+    assert (presentation.view_count, presentation.download_count) == (4, 1)
+    assert profile.posts == [{"slug": "intro", "views": 7}, {"slug": "news", "views": 1}, {"slug": "quiet"}]
+    # aggregate over no elements is NULL, posts stay an empty array
+    assert empty_profile.posts == []
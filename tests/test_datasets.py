@@ -0,0 +1,43 @@
+import os
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from eduhub.datasets import pending_files, scan
+from tests.factories import DatasetFactory, DatasetFileFactory
+
+CSV = "id,score,label,created\n1,0.5,a,2026-01-01\n2,,b,2026-01-02\n3,1,c,2026-01-03\n"
+
+
+def test_scan_infers_rows_and_columns(tmp_path: Path):
+    path = tmp_path / "scores.csv"
+    path.write_text(CSV, encoding="utf-8")
+
+    metadata = scan(1, str(path))
+    assert metadata.rows_amount == 3
+    assert metadata.columns == {
+        "id": {"type": "int64", "nullable": False},
+        "score": {"type": "float64", "nullable": True},
+        "label": {"type": "string", "nullable": False},
+        "created": {"type": "timestamp", "nullable": False},
+    }
+    # same content is not parsed again
+    assert scan(1, str(path), metadata.content_hash).rows_amount is None
+
+
+def test_pending_files_skips_unchanged_files(session: Session, tmp_path: Path):
+    unchanged_path, changed_path = tmp_path / "unchanged.csv", tmp_path / "changed.csv"
+    for path in (unchanged_path, changed_path):
+        path.write_text(CSV, encoding="utf-8")
+    unchanged = DatasetFactory(link=unchanged_path.name)
+    changed = DatasetFactory(link=changed_path.name)
+    for dataset, path in ((unchanged, unchanged_path), (changed, changed_path)):
+        status = path.stat()
+        DatasetFileFactory(dataset_id=dataset.id, path=str(path), size=status.st_size, mtime_ns=status.st_mtime_ns, content_hash="known")
+    # touched file with same content
+    os.utime(changed_path, ns=(status.st_atime_ns, status.st_mtime_ns + 10**9))
+    remote = DatasetFactory(link="https://example.com/remote.csv")
+
+    pending = {dataset_id: known_hash for dataset_id, _, known_hash in pending_files(session, tmp_path)}
+    assert changed.id in pending and pending[changed.id] == "known"
+    assert unchanged.id not in pending and remote.id not in pending
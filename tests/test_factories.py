@@ -0,0 +1,9 @@
+from eduhub.common.database import Base
+from tests import factories
+
+
+def test_every_model_has_factory():
+    covered = {factory._meta.model for factory in factories._all_factories(factories.BaseFactory) if not factory._meta.abstract}
+    # models of polymorphic base are created through factories of their subclasses
+    models = {mapper.class_ for mapper in Base.registry.mappers if len(mapper.self_and_descendants) == 1}
+    assert models - covered == set()
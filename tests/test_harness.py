@@ -0,0 +1,59 @@
+from sqlalchemy import Connection, Engine, func, select, text
+from sqlalchemy.orm import Session
+
+from eduhub.models import Laboratory
+from tests.conftest import TEMPLATE_DATABASE, _alembic_head
+from tests.factories import LaboratoryFactory
+
+
+def _laboratories(session_or_connection, title: str) -> int:
+    return session_or_connection.execute(select(func.count()).where(Laboratory.title == title)).scalar_one()
+
+
+def test_template_is_built_at_alembic_head(maintenance_engine: Engine, template_database: str):
+    assert template_database == TEMPLATE_DATABASE
+    with maintenance_engine.connect() as maintenance:
+        row = maintenance.execute(
+            text("SELECT datistemplate, shobj_description(oid, 'pg_database') AS head FROM pg_database WHERE datname = :name"),
+            {"name": template_database},
+        ).one()
+    assert row.datistemplate
+    assert row.head == _alembic_head()
+
+
+def test_worker_database_is_cloned_from_template(connection: Connection, worker_database: str, worker_id: str):
+    assert worker_database == f"eduhub_test_{worker_id}"
+    assert connection.execute(text("SELECT current_database()")).scalar_one() == worker_database
+    assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar_one() == _alembic_head()
+    assert connection.execute(text("SELECT count(*) FROM pg_extension WHERE extname = 'btree_gist'")).scalar_one() == 1
+
+
+def test_commit_only_releases_savepoint(session: Session, engine: Engine):
+    LaboratoryFactory(title="test_commit_only_releases_savepoint")
+    session.commit()
+    assert _laboratories(session, "test_commit_only_releases_savepoint") == 1
+
+    # outer transaction of test is never committed, so other connections do not see the row
+    with engine.connect() as other:
+        assert _laboratories(other, "test_commit_only_releases_savepoint") == 0
+
+
+def test_rollback_returns_to_last_commit(session: Session):
+    LaboratoryFactory(title="test_rollback_returns_to_last_commit")
+    session.commit()
+    LaboratoryFactory(title="test_rollback_returns_to_last_commit")
+    session.rollback()
+    assert _laboratories(session, "test_rollback_returns_to_last_commit") == 1
+
+
+def test_outer_transaction_is_rolled_back(engine: Engine):
+    # same steps as connection and session fixtures, checked from outside after rollback
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        session = Session(bind=connection, join_transaction_mode="create_savepoint")
+        session.add(Laboratory(title="test_outer_transaction_is_rolled_back"))
+        session.commit()
+        session.close()
+        transaction.rollback()
+    with engine.connect() as other:
+        assert _laboratories(other, "test_outer_transaction_is_rolled_back") == 0
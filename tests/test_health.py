@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+
+from eduhub.health import (
+    DATABASE_COUNTERS, INDEX_COUNTERS, TABLE_COUNTERS, HealthStore, _bloat_ratio, _increase, diff, report,
+)
+
+
+def _snapshot(taken_at: str, scale: int, **database) -> dict:
+    """Synthetic snapshot where counters of booking grow with scale and equipment stays the same"""
+    booking = {counter: 10 * scale for counter in TABLE_COUNTERS}
+    booking.update(n_live_tup=100 * scale, n_dead_tup=scale, table_bytes=8192 * scale, index_bytes=8192, bloat_ratio=0.1 * scale, autovacuum_lag=0.5)
+    equipment = {counter: 3 for counter in TABLE_COUNTERS}
+    equipment.update(n_live_tup=5, n_dead_tup=0, table_bytes=8192, index_bytes=8192, bloat_ratio=None, autovacuum_lag=0.0)
+    return {
+        "taken_at": taken_at,
+        "database": {
+            "name": "eduhub", "bytes": 10**6 * scale,
+            **{counter: 0 for counter in DATABASE_COUNTERS}, **database,
+        },
+        "tables": {"booking": booking, "equipment": equipment},
+        "indexes": {"booking_pkey": {**{counter: 1 for counter in INDEX_COUNTERS}, "bytes": 8192, "bloat_ratio": None}},
+        "connections": {"active": scale},
+        "activity": {"connections": scale, "blocked": 0},
+        "locks": [],
+        "statements": {},
+    }
+
+
+def test_increase_treats_counter_reset_as_start_from_zero():
+    assert _increase(10, 15) == 5
+    assert _increase(100, 7) == 7
+    assert _increase(None, 3) == 3
+    assert _increase(4, None) == 0
+
+
+def test_bloat_ratio_compares_expected_pages_with_actual():
+    # 100 tuples of 80 bytes fit into one page
+    assert _bloat_ratio(10, 100, 52, 28, 8168) == pytest.approx(0.9)
+    assert _bloat_ratio(1, 1000, 52, 28, 8168) == 0.0
+    assert _bloat_ratio(10, 100, None, 28, 8168) is None
+    assert _bloat_ratio(0, 0, 52, 28, 8168) is None
+
+
+def test_diff_reports_increase_of_counters_and_gauges():
+    before = _snapshot("2026-01-05T09:00:00+00:00", 1, blks_hit=100, blks_read=10, deadlocks=5)
+    after = _snapshot("2026-01-05T09:01:00+00:00", 2, blks_hit=190, blks_read=20, deadlocks=1)
+    before["statements"] = {"1": {"calls": 10, "total_exec_time": 100.0, "rows": 10, "shared_blks_hit": 0, "shared_blks_read": 0, "query": "SELECT 1"}}
+    after["statements"] = {
+        "1": {"calls": 14, "total_exec_time": 140.0, "rows": 14, "shared_blks_hit": 0, "shared_blks_read": 0, "query": "SELECT 1"},
+        "2": {"calls": 2, "total_exec_time": 500.0, "rows": 2, "shared_blks_hit": 0, "shared_blks_read": 0, "query": "SELECT 2"},
+    }
+    after["connections"]["idle"] = 3
+
+    change = diff(before, after)
+
+    assert change["interval_seconds"] == 60
+    assert (change["database"]["blks_hit"], change["database"]["blks_read"]) == (90, 10)
+    assert change["database"]["cache_hit_ratio"] == pytest.approx(0.9)
+    # deadlocks counter was reset in between
+    assert change["database"]["deadlocks"] == 1
+    assert change["database"]["bytes"] == (10**6, 2 * 10**6)
+    assert list(change["tables"]) == ["booking"]
+    booking = change["tables"]["booking"]
+    assert (booking["n_tup_ins"], booking["n_dead_tup"], booking["autovacuum_lag"]) == (10, (1, 2), (0.5, 0.5))
+    assert change["indexes"] == {}
+    assert [(queryid, statement["new"]) for queryid, statement in change["statements"].items()] == [("2", True), ("1", False)]
+    assert change["statements"]["1"]["mean_exec_time"] == 10.0
+    assert change["connections"] == {"active": (1, 2), "idle": (0, 3)}
+
+    lines = report(change)
+    assert lines[0] == "Interval: 60s"
+    assert "1 deadlocks" in lines[1] and "cache hit 90.0%" in lines[1]
+    assert any(line.startswith("booking") for line in lines)
+    assert not any(line.startswith("equipment") for line in lines)
+    assert any(line.endswith("* SELECT 2") for line in lines)
+
+
+def test_store_keeps_snapshots_in_order(tmp_path: Path):
+    store = HealthStore(tmp_path / "health.sqlite")
+    try:
+        first = store.save(_snapshot("2026-01-05T09:00:00+00:00", 1), label="before seed")
+        second = store.save(_snapshot("2026-01-05T10:00:00+00:00", 2))
+
+        assert store.load(first) == _snapshot("2026-01-05T09:00:00+00:00", 1)
+        assert store.listing() == [
+            (second, "2026-01-05T10:00:00+00:00", "eduhub", None),
+            (first, "2026-01-05T09:00:00+00:00", "eduhub", "before seed"),
+        ]
+        assert store.latest_ids(2) == [first, second]
+        with pytest.raises(LookupError):
+            store.load(second + 1)
+    finally:
+        store.close()
@@ -0,0 +1,25 @@
+import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import BookingStatus, ChangeOperation
+from eduhub.history import booking_as_of
+from eduhub.models import BookingHistory
+from tests.factories import BookingFactory
+
+
+def test_booking_as_of_replays_changes(session: Session):
+    booking = BookingFactory(status=BookingStatus.REQUESTED)
+    requested_at = datetime.datetime.now(tz=datetime.UTC)
+    booking.status = BookingStatus.APPROVED
+    session.flush()
+
+    assert booking_as_of(session, booking.id, requested_at).status == BookingStatus.REQUESTED
+    assert booking_as_of(session, booking.id, datetime.datetime.now(tz=datetime.UTC)).status == BookingStatus.APPROVED
+    assert booking_as_of(session, booking.id, requested_at - datetime.timedelta(hours=1)) is None
+
+    operations = session.scalars(
+        select(BookingHistory.operation).where(BookingHistory.booking_id == booking.id).order_by(BookingHistory.id)
+    ).all()
+    assert operations == [ChangeOperation.INSERT, ChangeOperation.UPDATE]
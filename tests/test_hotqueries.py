@@ -0,0 +1,38 @@
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from eduhub.hotqueries import HotQueries, _server_sql, create_hot_engine
+from tests.factories import BookingFactory
+
+
+def test_server_sql_numbers_placeholders_in_order_of_first_use():
+    statement = "SELECT * FROM booking WHERE id = %(id_1)s AND (requester_id = %(id_2)s OR approver_id = %(id_2)s) AND note LIKE '5%%'"
+    assert _server_sql(statement) == (
+        "SELECT * FROM booking WHERE id = $1 AND (requester_id = $2 OR approver_id = $2) AND note LIKE '5%'"
+    )
+
+
+def test_repeated_lookups_hit_compile_cache(engine: Engine):
+    hot_engine = create_hot_engine(engine.url.render_as_string(hide_password=False), prepare_threshold=None)
+    hot = HotQueries(hot_engine)
+    try:
+        with Session(hot_engine) as session:
+            for _ in range(3):
+                assert hot.booking_by_id(session, 0) is None
+    finally:
+        hot_engine.dispose()
+
+    metrics = hot.metrics["booking_by_id"]
+    assert (metrics.calls, metrics.compile_misses, metrics.compile_hits) == (3, 1, 2)
+    # tombstone filter comes from lambda only, soft delete criteria did not rebuild statement
+    assert hot.statements["booking_by_id"].count("deleted_at IS NULL") == 1
+
+
+def test_lookup_skips_tombstones(session: Session):
+    booking = BookingFactory()
+    hot = HotQueries(session.get_bind())
+    assert hot.booking_by_id(session, booking.id) is booking
+
+    booking.soft_delete()
+    session.flush()
+    assert hot.booking_by_id(session, booking.id) is None
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import PresentationVisibility
+from eduhub.ingestion import ingest_batch
+from eduhub.models import Dataset, Presentation, Publication, RecommendationChange, Resource, ResourceMinhash, SoftwareRepository, project_resource
+from tests.factories import ProjectFactory
+
+
+@pytest.mark.parametrize("method", ["copy", "values"])
+def test_ingest_batch_writes_mixed_resources(session: Session, method: str):
+    project, other_project = ProjectFactory.create_batch(2)
+    session.execute(delete(RecommendationChange))
+    records = [
+        {"type": "dataset", "title": "air quality survey", "link": "https://data.example/air", "tags": ["air"],
+         "project_ids": [project.id, project.id]},
+        {"type": "software_repository", "title": "air quality survey tools", "link": "https://git.example/air", "license": "MIT"},
+        {"type": "presentation", "title": "lab intro", "link": "https://slides.example/intro", "duration": 60,
+         "project_ids": [project.id]},
+        {"type": "publication", "title": "air study", "link": "https://doi.example/1", "keywords": ["air"],
+         "project_ids": [other_project.id]},
+    ]
+
+    ids = ingest_batch(session, records, method)
+
+    assert len(set(ids)) == 4
+    resources = {resource.id: resource for resource in session.scalars(select(Resource).where(Resource.id.in_(ids)))}
+    assert [type(resources[resource_id]) for resource_id in ids] == [Dataset, SoftwareRepository, Presentation, Publication]
+    dataset, repository, presentation, publication = (resources[resource_id] for resource_id in ids)
+    assert (dataset.tags, dataset.size, dataset.view_count) == (["air"], 0, 0)
+    assert (repository.license, repository.lines_amount) == ("MIT", 0)
+    assert (presentation.duration, presentation.visibility) == (60, PresentationVisibility.PRIVATE_INTERNAL)
+    assert publication.keywords == ["air"]
+
+    links = session.execute(select(project_resource).where(project_resource.c.resource_id.in_(ids))).all()
+    assert set(links) == {(project.id, dataset.id), (project.id, presentation.id), (other_project.id, publication.id)}
+    # only repositories and datasets are indexed for similarity
+    indexed = session.scalars(select(ResourceMinhash.resource_id).where(ResourceMinhash.resource_id.in_(ids))).all()
+    assert set(indexed) == {dataset.id, repository.id}
+    # links of publications and datasets change project recommendations
+    changes = session.execute(select(RecommendationChange.kind, RecommendationChange.entity_id)).all()
+    assert set(changes) == {("project", project.id), ("project", other_project.id)}
@@ -0,0 +1,103 @@
+import threading
+import time
+from typing import Callable, Iterator
+
+import pytest
+from alembic import op
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import Connection, create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from eduhub.common.migration import LOCK_NOT_AVAILABLE, batched_backfill, batched_insert, guarded
+
+
+@pytest.fixture
+def migration_url(clone_database: Callable[[str], str]) -> str:
+    return clone_database("migration")
+
+
+@pytest.fixture
+def migration(migration_url: str) -> Iterator[Connection]:
+    """Connection with alembic operations context, like inside upgrade() of migration (batches are committed)"""
+    engine = create_engine(migration_url)
+    try:
+        with engine.connect() as connection:
+            context = MigrationContext.configure(connection)
+            with Operations.context(context), context.begin_transaction():
+                op.execute("CREATE TABLE probe (id integer PRIMARY KEY, value integer)")
+                op.execute("CREATE TABLE probe_copy (id integer PRIMARY KEY, value integer)")
+                op.execute("INSERT INTO probe (id, value) SELECT n, n FROM generate_series(1, 25) AS n")
+                yield connection
+    finally:
+        engine.dispose()
+
+
+def test_batched_backfill_commits_every_key_range(migration: Connection, migration_url: str):
+    assert batched_backfill("probe", "value = id * 2", "id % 5 <> 0", batch_size=10, pause=0) == 20
+
+    # batches are committed, so other sessions already see them
+    engine = create_engine(migration_url)
+    try:
+        with engine.connect() as other:
+            rows = other.execute(text("SELECT id, value FROM probe ORDER BY id")).all()
+    finally:
+        engine.dispose()
+    assert rows == [(n, n if n % 5 == 0 else n * 2) for n in range(1, 26)]
+
+
+def test_batched_insert_skips_copied_rows(migration: Connection):
+    op.execute("INSERT INTO probe_copy (id, value) VALUES (3, 6)")
+    arguments = ("probe_copy", ["id", "value"], ["id", "value * 2"], "probe")
+    skip_copied = "NOT EXISTS (SELECT FROM probe_copy AS copy WHERE copy.id = probe.id)"
+
+    assert batched_insert(*arguments, skip_copied, batch_size=10, pause=0) == 24
+    # repeated (e.g. interrupted) migration copies nothing twice
+    assert batched_insert(*arguments, skip_copied, batch_size=10, pause=0) == 0
+    assert op.get_bind().execute(text("SELECT count(*), sum(value) FROM probe_copy")).one() == (25, 650)
+    op.execute("DELETE FROM probe")
+    assert batched_insert(*arguments, batch_size=10, pause=0) == 0
+
+
+def _hold_booking_lock(migration_url: str) -> Callable[[], None]:
+    """Hold ACCESS SHARE lock on booking in other connection (like long report query), returns function releasing it"""
+    engine = create_engine(migration_url)
+    blocker = engine.connect()
+    blocker.execute(text("LOCK TABLE booking IN ACCESS SHARE MODE"))
+
+    def release() -> None:
+        blocker.rollback()
+        blocker.close()
+        engine.dispose()
+
+    return release
+
+
+def test_guarded_fails_fast_when_lock_is_not_available(migration: Connection, migration_url: str):
+    bind = op.get_bind()
+    lock_timeout = bind.execute(text("SHOW lock_timeout")).scalar_one()
+    release = _hold_booking_lock(migration_url)
+    try:
+        started = time.perf_counter()
+        with pytest.raises(OperationalError) as error:
+            guarded(lambda: op.execute("ALTER TABLE booking ADD COLUMN probe integer"), lock_timeout="100ms", attempts=2, backoff=0)
+        assert error.value.orig.sqlstate == LOCK_NOT_AVAILABLE
+        assert time.perf_counter() - started < 5
+    finally:
+        release()
+    # savepoint of failed attempt is rolled back, migration transaction goes on with default timeouts
+    assert bind.execute(text("SHOW lock_timeout")).scalar_one() == lock_timeout
+
+
+def test_guarded_retries_until_lock_is_released(migration: Connection, migration_url: str):
+    release = _hold_booking_lock(migration_url)
+    timer = threading.Timer(0.25, release)
+    timer.start()
+    try:
+        guarded(lambda: op.execute("ALTER TABLE booking ADD COLUMN probe integer"), lock_timeout="100ms", attempts=5, backoff=0.2)
+    finally:
+        timer.join()
+    columns = op.get_bind().execute(
+        text("SELECT column_name FROM information_schema.columns WHERE table_name = 'booking' AND column_name = 'probe'")
+    ).scalars().all()
+    assert columns == ["probe"]
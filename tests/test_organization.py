@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import OrganizationUnitKind
+from eduhub.models import OrganizationClosure
+from eduhub.organization import OrganizationError, ancestors, rebuild_closure, subtree
+from tests.factories import OrganizationClosureFactory, OrganizationUnitFactory
+
+
+def test_closure_follows_moves(session: Session):
+    university = OrganizationUnitFactory()
+    faculty = OrganizationUnitFactory(parent=university, kind=OrganizationUnitKind.FACULTY)
+    other = OrganizationUnitFactory(parent=university, kind=OrganizationUnitKind.FACULTY)
+    department = OrganizationUnitFactory(parent=faculty, kind=OrganizationUnitKind.DEPARTMENT)
+
+    assert subtree(session, university.id) == [university, faculty, other, department]
+    assert subtree(session, university.id, max_depth=1) == [university, faculty, other]
+
+    department.parent_id = other.id
+    session.flush()
+    assert ancestors(session, department.id) == [university, other, department]
+    assert subtree(session, faculty.id) == [faculty]
+
+    university.parent_id = department.id
+    with pytest.raises(OrganizationError):
+        session.flush()
+
+
+def test_rebuild_closure_repairs_manual_edits(session: Session):
+    university = OrganizationUnitFactory()
+    faculty = OrganizationUnitFactory(parent=university, kind=OrganizationUnitKind.FACULTY)
+    stray = OrganizationClosureFactory()
+
+    assert rebuild_closure(session) == 5
+    pairs = session.execute(select(OrganizationClosure.ancestor_id, OrganizationClosure.descendant_id)).all()
+    assert (university.id, faculty.id) in pairs
+    assert (stray.ancestor_id, stray.descendant_id) not in pairs
@@ -0,0 +1,20 @@
+from sqlalchemy.orm import Session
+
+from eduhub.plagiarism import fingerprints, overlapping_documents, overlapping_text
+from tests.factories import FingerprintedDocumentFactory, ResourceFingerprintFactory
+
+TEXT = "winnowing selects minimal hashes of word k-grams in every window so copied fragments share fingerprints"
+
+
+def test_overlapping_documents_share_fingerprints(session: Session):
+    values = [int(value) for value in fingerprints(TEXT)]
+    original = FingerprintedDocumentFactory(fingerprint_count=len(values))
+    copy = FingerprintedDocumentFactory(fingerprint_count=len(values))
+    other = FingerprintedDocumentFactory(fingerprint_count=1)
+    for value in values:
+        ResourceFingerprintFactory(fingerprint=value, resource_id=original.resource_id)
+        ResourceFingerprintFactory(fingerprint=value, resource_id=copy.resource_id)
+    ResourceFingerprintFactory(resource_id=other.resource_id)
+
+    assert overlapping_documents(session, original.resource_id) == [(copy.resource_id, 1.0)]
+    assert {resource_id for resource_id, _ in overlapping_text(session, TEXT)} == {original.resource_id, copy.resource_id}
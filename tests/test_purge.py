@@ -0,0 +1,54 @@
+import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import EquipmentStatus
+from eduhub.models import Equipment, Project, TombstoneArchive, project_participant
+from eduhub.purge import purge_batch
+from tests.factories import AccountFactory, BookingFactory, EquipmentFactory, ProjectFactory
+
+DELETED_AT = datetime.datetime.now(tz=datetime.UTC) - datetime.timedelta(days=30)
+CUTOFF = datetime.datetime.now(tz=datetime.UTC) - datetime.timedelta(days=7)
+
+
+def test_tombstones_are_hidden_unless_include_deleted(session: Session):
+    live, deleted = EquipmentFactory(), EquipmentFactory()
+    deleted.soft_delete()
+    session.flush()
+
+    statement = select(Equipment.id).where(Equipment.id.in_([live.id, deleted.id])).order_by(Equipment.id)
+    assert session.scalars(statement).all() == [live.id]
+    assert session.scalars(statement.execution_options(include_deleted=True)).all() == [live.id, deleted.id]
+
+    result = session.execute(
+        update(Equipment).where(Equipment.id.in_([live.id, deleted.id])).values(status=EquipmentStatus.MAINTENANCE)
+    )
+    assert result.rowcount == 1
+
+
+def test_purge_archives_tombstone_with_cascade_rows(session: Session):
+    participant = AccountFactory()
+    project = ProjectFactory(participants=[participant], deleted_at=DELETED_AT)
+    recent = ProjectFactory(deleted_at=datetime.datetime.now(tz=datetime.UTC))
+    project_id = project.id
+    session.flush()
+
+    assert purge_batch(session, Project, CUTOFF, 100) == 1
+    archived = session.scalars(select(TombstoneArchive).where(TombstoneArchive.row_id == project_id)).one()
+    assert archived.table_name == "project"
+    assert archived.data["title"] == project.title
+    assert [row["account_id"] for row in archived.data["dependents"]["project_participant"]] == [participant.id]
+
+    remaining = select(Project.id).where(Project.id.in_([project_id, recent.id])).execution_options(include_deleted=True)
+    assert session.scalars(remaining).all() == [recent.id]
+    assert session.execute(select(project_participant).where(project_participant.c.project_id == project_id)).all() == []
+
+
+def test_purge_keeps_referenced_tombstones(session: Session):
+    equipment = EquipmentFactory(deleted_at=DELETED_AT)
+    BookingFactory(equipment_id=equipment.id)
+
+    assert purge_batch(session, Equipment, CUTOFF, 100) == 0
+    kept = select(Equipment.id).where(Equipment.id == equipment.id).execution_options(include_deleted=True)
+    assert session.scalars(kept).all() == [equipment.id]
@@ -0,0 +1,62 @@
+import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import AccountRole, BookingStatus
+from eduhub.models import AccountBookingUsage, Booking
+from eduhub.quota import Drift, drifts
+from tests.factories import AccountBookingUsageFactory, AccountFactory, BookingFactory, EquipmentFactory
+
+
+def _usage(session: Session, account_id: int) -> int | None:
+    return session.scalar(select(AccountBookingUsage.active_count).where(AccountBookingUsage.account_id == account_id))
+
+
+def test_status_transitions_update_counter(session: Session):
+    booking = BookingFactory(status=BookingStatus.REQUESTED)
+    assert _usage(session, booking.requester_id) == 1
+
+    booking.status = BookingStatus.APPROVED
+    session.flush()
+    assert _usage(session, booking.requester_id) == 1
+
+    booking.status = BookingStatus.CANCELLED
+    session.flush()
+    assert _usage(session, booking.requester_id) == 0
+
+
+def test_booking_without_status_reserves_quota(session: Session):
+    requester = AccountFactory()
+    start_ts = datetime.datetime(2026, 1, 1, 9, tzinfo=datetime.UTC)
+    booking = Booking(
+        equipment_id=EquipmentFactory().id,
+        requester_id=requester.id,
+        approver_id=AccountFactory(role=AccountRole.STAFF).id,
+        start_ts=start_ts,
+        end_ts=start_ts + datetime.timedelta(hours=2),
+    )
+    session.add(booking)
+    session.flush()
+
+    assert booking.status == BookingStatus.REQUESTED
+    assert _usage(session, requester.id) == 1
+
+    booking.status = BookingStatus.CANCELLED
+    session.flush()
+    assert _usage(session, requester.id) == 0
+
+
+def test_soft_deleted_booking_releases_quota(session: Session):
+    booking = BookingFactory(status=BookingStatus.APPROVED)
+    assert _usage(session, booking.requester_id) == 1
+
+    booking.deleted_at = datetime.datetime.now(tz=datetime.UTC)
+    session.flush()
+    assert _usage(session, booking.requester_id) == 0
+
+
+def test_drifts_report_counter_without_bookings(session: Session):
+    usage = AccountBookingUsageFactory(active_count=3)
+
+    assert drifts(session, [usage.account_id]) == [Drift(usage.account_id, 3, 0)]
@@ -0,0 +1,69 @@
+import dataclasses
+import datetime
+import json
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from eduhub.common.types import BookingStatus
+from eduhub.models import Account, Booking, Dataset, Laboratory
+from eduhub.readmodels import fetch, read_model, statement_for, to_dicts, to_json
+from tests.factories import DatasetFactory
+
+ACCOUNT_COUNT = func.count(Account.id)
+
+
+def test_read_model_is_generated_once_per_arguments():
+    assert read_model(Laboratory) is read_model(Laboratory)
+    assert read_model(Laboratory, ["id", "title"]) is read_model(Laboratory, ("id", "title"))
+    assert read_model(Laboratory, ["id"]) is not read_model(Laboratory, ["id", "title"])
+    assert read_model(Laboratory, ["id"], extra={"amount": ACCOUNT_COUNT}) is read_model(Laboratory, ["id"], extra={"amount": ACCOUNT_COUNT})
+    # extra expressions are compared by identity
+    assert read_model(Laboratory, ["id"], extra={"amount": func.count(Account.id)}) is not read_model(
+        Laboratory, ["id"], extra={"amount": ACCOUNT_COUNT}
+    )
+
+
+def test_read_model_projects_columns_and_extra():
+    record = read_model(Laboratory, ["title", "id"], extra={"amount": ACCOUNT_COUNT})
+
+    # mapper order of columns, extra expressions last
+    assert record._fields == ("id", "title", "amount")
+    assert record.__name__ == "LaboratoryRecord"
+    laboratory = record(1, "optics", 3)
+    assert laboratory.to_dict() == {"id": 1, "title": "optics", "amount": 3}
+    assert not hasattr(laboratory, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        laboratory.title = "genomics"
+
+
+def test_statement_for_joins_inherited_tables():
+    record = read_model(Dataset, ["id", "title", "tags"])
+
+    sql = str(statement_for(record).compile(dialect=postgresql.dialect()))
+    assert sql.split("FROM")[1].split() == ["resource", "JOIN", "dataset", "ON", "resource.id", "=", "dataset.id"]
+    assert "resource.title" in sql and "dataset.tags" in sql
+
+
+def test_to_json_serializes_dates_enums_and_sets():
+    record = read_model(Booking, ["id", "status", "start_ts"], extra={"tags": ACCOUNT_COUNT})
+    start_ts = datetime.datetime(2026, 1, 5, 9, tzinfo=datetime.UTC)
+    records = [record(1, start_ts, BookingStatus.APPROVED, {"night"})]
+
+    assert to_dicts(records) == [{"id": 1, "start_ts": start_ts, "status": BookingStatus.APPROVED, "tags": {"night"}}]
+    assert json.loads(to_json(records)) == [
+        {"id": 1, "start_ts": "2026-01-05T09:00:00+00:00", "status": "approved", "tags": ["night"]}
+    ]
+    assert to_json([]) == "[]"
+
+
+def test_fetch_skips_soft_deleted_rows(session: Session):
+    live = DatasetFactory(tags=["air"])
+    DatasetFactory(deleted_at=datetime.datetime.now(tz=datetime.UTC))
+    record = read_model(Dataset, ["id", "tags"])
+
+    records = fetch(session, record, lambda statement: statement.order_by(Dataset.id))
+    assert record(live.id, ["air"]) in records
+    assert {dataset.id for dataset in records} == {live.id}
@@ -0,0 +1,64 @@
+import datetime
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from eduhub.models import RecommendationChange
+from eduhub.recommendations import RecommendationIndex
+from tests.factories import AccountFactory, DatasetFactory, ProfileFactory, ProjectFactory
+
+
+def test_save_and_load_without_pickle(tmp_path: Path):
+    index = RecommendationIndex(
+        vocabulary={},
+        idf=np.empty(0),
+        account_ids=np.array([1], dtype=np.int64),
+        accounts=sp.csr_matrix((0, 0)),
+        project_ids=np.array([10, 11], dtype=np.int64),
+        projects=sp.csr_matrix((0, 0)),
+        partner_ids=np.empty(0, dtype=np.int64),
+        partners=sp.csr_matrix((0, 0)),
+        memberships={},
+        partnerships={},
+    )
+    index.accounts = index._vectorize([Counter({"robotics": 1, "laboratory:1": 1})])
+    index.projects = index._vectorize([Counter({"robotics": 2}), Counter({"genomics": 1})])
+    path = tmp_path / "recommendations.npz"
+    index.save(path)
+
+    loaded = RecommendationIndex.load(path)
+    assert loaded.vocabulary == index.vocabulary
+    assert loaded.similar_projects(1) == index.similar_projects(1)
+
+
+def test_project_change_refreshes_participants(session: Session):
+    account = AccountFactory()
+    ProfileFactory(account=account, interest_areas=["robotics"])
+    project = ProjectFactory(participants=[account])
+    session.flush()
+    index = RecommendationIndex.build(session)
+    index.apply_pending(session)
+
+    DatasetFactory(tags=["graphene"], projects=[project])
+    pending = session.scalars(select(RecommendationChange.entity_id).where(RecommendationChange.kind == "project")).all()
+    assert pending == [project.id]
+
+    index.apply_pending(session)
+    position = index._account_positions[account.id]
+    assert index.accounts[position, index.vocabulary["graphene"]] > 0
+    assert session.scalars(select(RecommendationChange)).all() == []
+
+
+def test_build_skips_soft_deleted_projects(session: Session):
+    live = ProjectFactory()
+    deleted = ProjectFactory(deleted_at=datetime.datetime.now(tz=datetime.UTC))
+    DatasetFactory(tags=["graphene"], projects=[live, deleted])
+    session.flush()
+
+    index = RecommendationIndex.build(session)
+    assert live.id in index._project_positions
+    assert deleted.id not in index._project_positions
@@ -0,0 +1,19 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from eduhub.models import TableChange
+from eduhub.reporting import compact_changes, read_watermarks
+from tests.factories import TableChangeFactory
+
+
+def test_compact_changes_keeps_watermarks(session: Session):
+    TableChangeFactory.create_batch(3, table_name="booking")
+    TableChangeFactory(table_name="equipment", changes=5)
+    connection = session.connection()
+    watermarks = read_watermarks(connection)
+    rows = session.scalar(select(func.count()).select_from(TableChange))
+
+    assert compact_changes(connection) == rows - len(watermarks)
+    assert read_watermarks(connection) == watermarks
+    assert session.scalar(select(func.count()).select_from(TableChange)) == len(watermarks)
+    assert compact_changes(connection) == 0
@@ -0,0 +1,99 @@
+import types
+from typing import Callable
+
+import pytest
+from sqlalchemy import Engine, select
+from sqlalchemy.orm import Session
+
+from eduhub.models import Equipment, EquipmentType
+from eduhub.sharding import (
+    ShardRouter, _amount_key, _interleaved_next, _parents_first, count_per_shard, top_laboratories_by_equipment,
+)
+from tests.factories import LaboratoryShardFactory
+
+
+def _record(id: int, amount: int) -> types.SimpleNamespace:
+    return types.SimpleNamespace(id=id, amount=amount)
+
+
+def test_interleaved_next_id_belongs_to_shard():
+    for amount in (1, 2, 3, 5):
+        for position in range(amount):
+            for current in range(0, 20):
+                following = _interleaved_next(current, position, amount)
+                assert current < following <= current + amount
+                assert following % amount == (position + 1) % amount
+    assert _interleaved_next(0, 0, 2) == 1
+    assert _interleaved_next(0, 1, 2) == 2
+    assert _interleaved_next(7, 1, 3) == 8
+
+
+def test_parents_first_orders_units_by_depth():
+    rows = [
+        {"id": 4, "parent_id": 3},
+        {"id": 3, "parent_id": 1},
+        {"id": 2, "parent_id": 1},
+        {"id": 1, "parent_id": None},
+        {"id": 5, "parent_id": None},
+    ]
+    ordered = [row["id"] for row in _parents_first(rows)]
+    position = {unit_id: index for index, unit_id in enumerate(ordered)}
+    assert sorted(ordered) == [1, 2, 3, 4, 5]
+    assert all(position[row["parent_id"]] < position[row["id"]] for row in rows if row["parent_id"] is not None)
+
+
+def test_top_n_merges_shards_with_id_tie_break():
+    router = ShardRouter("postgresql+psycopg://localhost/directory", ["postgresql+psycopg://localhost/shard"])
+    shards = [[_record(4, 5), _record(1, 3)], [_record(2, 5), _record(7, 4), _record(3, 3)]]
+    router.fan_out = lambda function, parallel=True: shards
+    try:
+        top = router.top_n(lambda session: [], 4, _amount_key)
+    finally:
+        router.close()
+    assert [(record.id, record.amount) for record in top] == [(2, 5), (4, 5), (7, 4), (1, 3)]
+
+
+def test_new_laboratory_goes_to_least_loaded_shard(engine: Engine, session: Session):
+    url = engine.url.render_as_string(hide_password=False)
+    router = ShardRouter(url, [url, url, url])
+    try:
+        assert router._least_loaded(session) == 0
+        LaboratoryShardFactory.create_batch(2, shard=0)
+        LaboratoryShardFactory(shard=2)
+        assert router._least_loaded(session) == 1
+    finally:
+        router.close()
+
+
+@pytest.fixture
+def router(clone_database: Callable[[str], str]):
+    router = ShardRouter(clone_database("directory"), [clone_database("shard_0"), clone_database("shard_1")])
+    yield router
+    router.close()
+
+
+def test_laboratories_are_routed_and_reported_across_shards(router: ShardRouter):
+    with router.directory_session() as directory:
+        equipment_type = EquipmentType(title="microscope")
+        directory.add(equipment_type)
+        directory.commit()
+        equipment_type_id = equipment_type.id
+    assert router.replicate_reference_tables()["equipment_type"] == 1
+    router.prepare_sequences()
+
+    first, second, third = (router.create_laboratory(title) for title in ("optics", "genomics", "robotics"))
+    assert [router.shard_for(laboratory.id) for laboratory in (first, second, third)] == [0, 1, 0]
+    for laboratory, amount in ((first, 2), (second, 3), (third, 1)):
+        with router.session(laboratory.id) as session:
+            session.add_all(
+                Equipment(laboratory_id=laboratory.id, equipment_type_id=equipment_type_id) for _ in range(amount)
+            )
+            session.commit()
+
+    # interleaved sequences keep equipment ids unique across shards
+    ids = router.fan_out(lambda session: session.scalars(select(Equipment.id)).all())
+    assert all(equipment_id % 2 == 1 for equipment_id in ids[0])
+    assert all(equipment_id % 2 == 0 for equipment_id in ids[1])
+    assert count_per_shard(router, Equipment) == [3, 3]
+    top = top_laboratories_by_equipment(router, 2)
+    assert [(record.id, record.amount) for record in top] == [(second.id, 3), (first.id, 2)]
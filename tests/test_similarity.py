@@ -0,0 +1,53 @@
+import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from eduhub.models import Resource, ResourceLshBand, ResourceMinhash
+from eduhub.similarity import rebuild_index, similar_resources
+from tests.factories import DatasetFactory, SoftwareRepositoryFactory
+
+
+def _indexed(session: Session, resource_id: int) -> bool:
+    return session.scalar(select(ResourceMinhash.resource_id).where(ResourceMinhash.resource_id == resource_id)) is not None
+
+
+def test_orm_flush_indexes_repository(session: Session):
+    first = SoftwareRepositoryFactory(title="graph neural network toolkit", description="training on molecules")
+    second = SoftwareRepositoryFactory(title="graph neural network toolkit", description="training on molecules")
+    assert _indexed(session, first.id)
+    assert [resource_id for resource_id, _ in similar_resources(session, first.id)] == [second.id]
+
+
+def test_resources_without_tokens_are_not_indexed(session: Session):
+    first = DatasetFactory(title="", description=None, license=None, tags=[], attributes=None)
+    second = DatasetFactory(title="", description=None, license=None, tags=[], attributes=None)
+    assert not _indexed(session, first.id)
+    assert not _indexed(session, second.id)
+    assert similar_resources(session, first.id) == []
+
+
+def test_soft_deleted_resource_is_removed_from_index(session: Session):
+    repository = SoftwareRepositoryFactory(title="lab scheduling service")
+    assert _indexed(session, repository.id)
+
+    repository.deleted_at = datetime.datetime.now(tz=datetime.UTC)
+    session.flush()
+    assert not _indexed(session, repository.id)
+    assert session.scalars(select(ResourceLshBand).where(ResourceLshBand.resource_id == repository.id)).all() == []
+
+
+def test_rebuild_index_drops_resources_deleted_without_orm(session: Session):
+    deleted = SoftwareRepositoryFactory(title="lab scheduling service")
+    live = SoftwareRepositoryFactory(title="equipment booking service")
+    # Core UPDATE bypasses flush listener, so signature of tombstone stays in index
+    session.connection().execute(
+        update(Resource.__table__)
+        .where(Resource.__table__.c.id == deleted.id)
+        .values(deleted_at=datetime.datetime.now(tz=datetime.UTC))
+    )
+    assert _indexed(session, deleted.id)
+
+    assert rebuild_index(session) >= 1
+    assert not _indexed(session, deleted.id)
+    assert _indexed(session, live.id)
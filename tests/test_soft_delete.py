@@ -0,0 +1,19 @@
+import datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from tests.factories import LaboratoryFactory, ProjectFactory
+
+
+def test_project_titles_are_unique_among_live_projects(session: Session):
+    laboratory = LaboratoryFactory()
+    project = ProjectFactory(laboratory=laboratory, title="Graphene sensors")
+    with pytest.raises(IntegrityError), session.begin_nested():
+        ProjectFactory(laboratory=laboratory, title="Graphene sensors")
+
+    project.soft_delete()
+    session.flush()
+    assert ProjectFactory(laboratory=laboratory, title="Graphene sensors").id != project.id
+    assert ProjectFactory(title="Graphene sensors").laboratory_id != laboratory.id